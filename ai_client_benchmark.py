@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+AI Client Benchmark Script
+Compares per-email HTTP overhead of a fresh client per LLM call (the old
+AIAgentService) with the shared client from ``http_client_pool`` that
+AIAgentServiceV2 uses (HTTP/2 unless HTTP2_ENABLED=false).
+
+Each simulated email makes three sequential requests (meeting detection,
+draft, validation). Requests go to the free Groq models endpoint, so the
+difference measured is connection setup (TCP + TLS), not generation time.
+
+Usage: GROQ_API_KEY=... python ai_client_benchmark.py [emails]
+"""
+
+import asyncio
+import os
+import statistics
+import sys
+import time
+from datetime import datetime
+
+import httpx
+
+os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "backend"))
+
+from utils.http_client import http_client_pool
+
+# Configuration
+API_URL = "https://api.groq.com/openai/v1/models"
+API_KEY = os.environ.get("GROQ_API_KEY", "")
+CALLS_PER_EMAIL = 3
+
+class AIClientBenchmark:
+    def __init__(self, emails: int):
+        self.emails = emails
+        self.headers = {"Authorization": f"Bearer {API_KEY}"}
+    
+    def log(self, message, level="INFO"):
+        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        print(f"[{timestamp}] {level}: {message}")
+    
+    async def email_with_fresh_clients(self):
+        """One email the old way: a new client (new TCP + TLS) per call"""
+        for _ in range(CALLS_PER_EMAIL):
+            async with httpx.AsyncClient(timeout=30.0) as client:
+                response = await client.get(API_URL, headers=self.headers)
+                response.raise_for_status()
+    
+    async def email_with_pooled_client(self, client: httpx.AsyncClient):
+        """One email on the shared pooled client"""
+        for _ in range(CALLS_PER_EMAIL):
+            response = await client.get(API_URL, headers=self.headers)
+            response.raise_for_status()
+    
+    async def measure(self, run_email) -> list:
+        timings = []
+        for _ in range(self.emails):
+            started_at = time.perf_counter()
+            await run_email()
+            timings.append((time.perf_counter() - started_at) * 1000)
+        return timings
+    
+    def report(self, name: str, timings: list):
+        ordered = sorted(timings)
+        p95 = ordered[min(len(ordered) - 1, int(round(0.95 * (len(ordered) - 1))))]
+        self.log(f"{name}: mean {statistics.mean(timings):.1f} ms, p50 {statistics.median(timings):.1f} ms, p95 {p95:.1f} ms per email")
+    
+    async def run(self):
+        if not API_KEY:
+            self.log("GROQ_API_KEY is not set", "ERROR")
+            return False
+        
+        self.log(f"Benchmarking {self.emails} emails x {CALLS_PER_EMAIL} calls against {API_URL}")
+        
+        fresh = await self.measure(self.email_with_fresh_clients)
+        self.report("Fresh client per call", fresh)
+        
+        client = await http_client_pool.get_client()
+        try:
+            # Warm the connection once, as a long-running worker would have
+            await self.email_with_pooled_client(client)
+            pooled = await self.measure(lambda: self.email_with_pooled_client(client))
+            http_version = (await client.get(API_URL, headers=self.headers)).http_version
+        finally:
+            await http_client_pool.close()
+        self.report(f"Pooled client ({http_version})", pooled)
+        
+        saved = statistics.mean(fresh) - statistics.mean(pooled)
+        self.log(f"✅ Pooled client saves {saved:.1f} ms per email ({saved / statistics.mean(fresh) * 100:.0f}%)")
+        return True
+
+if __name__ == "__main__":
+    emails = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    success = asyncio.run(AIClientBenchmark(emails).run())
+    sys.exit(0 if success else 1)
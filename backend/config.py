@@ -1,4 +1,5 @@
 import os
+import socket
 from pathlib import Path
 from dotenv import load_dotenv
 from datetime import timezone, datetime
@@ -33,12 +34,55 @@ class Config:
     # AI APIs
     GROQ_API_KEY = os.environ.get('GROQ_API_KEY', '')
     COHERE_API_KEY = os.environ.get('COHERE_API_KEY', '')
+    HTTP2_ENABLED = os.environ.get('HTTP2_ENABLED', 'true').lower() == 'true'  # pooled API client speaks HTTP/2 (needs h2)
     
     # Groq Models (cost-effective)
     GROQ_DRAFT_MODEL = 'llama-3.3-70b-versatile'  # Good balance of quality and cost
     GROQ_VALIDATION_MODEL = 'llama-3.3-70b-versatile'
     GROQ_CALENDAR_MODEL = 'llama-3.3-70b-versatile'
     
+    # LLM request governor (match the Groq plan's limits)
+    LLM_MAX_CONCURRENT = int(os.environ.get('LLM_MAX_CONCURRENT', '8'))  # concurrent LLM requests per process
+    LLM_REQUESTS_PER_MINUTE = int(os.environ.get('GROQ_REQUESTS_PER_MINUTE', '30'))
+    LLM_TOKENS_PER_MINUTE = int(os.environ.get('GROQ_TOKENS_PER_MINUTE', '6000'))
+    LLM_MAX_RETRIES = 4  # retries after rate-limit responses
+    LLM_RETRY_BASE_DELAY = 2  # seconds, doubled per retry when no retry-after is given
+    LLM_RETRY_MAX_DELAY = 60  # seconds
+    
+    # LLM response cache (Mongo, keyed by model, parameters and normalized prompt)
+    LLM_CACHE_ENABLED = os.environ.get('LLM_CACHE_ENABLED', 'true').lower() == 'true'
+    LLM_CACHE_TTL = int(os.environ.get('LLM_CACHE_TTL', '21600'))  # seconds (6 hours)
+    
+    # Streaming drafts: how often the partial draft is saved while tokens arrive
+    DRAFT_STREAM_SAVE_INTERVAL = 0.5  # seconds
+    
+    # User configuration snapshots (intents, knowledge base, personas)
+    USER_CONFIG_CACHE_SIZE = 1000  # users whose snapshots are kept (LRU)
+    USER_CONFIG_CHECK_INTERVAL = 5  # seconds between version checks without change streams
+    USER_CONFIG_MAX_INTENTS = 500  # active intents loaded per user
+    USER_CONFIG_MAX_KB_CHUNKS = 2000  # knowledge base chunks loaded per user
+    
+    # Knowledge base embeddings and retrieval
+    EMBEDDING_PROVIDER = os.environ.get('EMBEDDING_PROVIDER', 'cohere')  # 'cohere', 'local' (sentence-transformers) or 'none'
+    COHERE_EMBEDDING_MODEL = 'embed-english-v3.0'
+    LOCAL_EMBEDDING_MODEL = os.environ.get('LOCAL_EMBEDDING_MODEL', 'all-MiniLM-L6-v2')
+    EMBEDDING_BATCH_SIZE = 96  # texts per provider call (Cohere's limit)
+    EMBEDDING_MAX_WORKERS = 2  # threads for local model inference
+    EMBEDDING_QUERY_CACHE_TTL = 3600  # seconds
+    KB_CHUNK_SIZE = 800  # characters per knowledge base chunk
+    KB_CHUNK_OVERLAP = 150  # characters shared by consecutive chunks
+    KB_CONTEXT_TOKEN_BUDGET = int(os.environ.get('KB_CONTEXT_TOKEN_BUDGET', '600'))  # knowledge base tokens per draft prompt
+    KB_RETRIEVAL_TOP_K = 8  # chunks ranked before the token budget is applied
+    KB_RETRIEVAL_MIN_SCORE = float(os.environ.get('KB_RETRIEVAL_MIN_SCORE', '0.2'))  # cosine similarity
+    KB_QUERY_MAX_CHARS = 2000  # email text embedded as the retrieval query
+    
+    # Application cache (utils/cache.py)
+    CACHE_BACKEND = os.environ.get('CACHE_BACKEND', 'memory')  # 'memory' (per process) or 'redis' (shared)
+    CACHE_DEFAULT_TTL = 300  # seconds
+    CACHE_MAX_ENTRIES = 10000  # memory backend LRU bounds
+    CACHE_MAX_BYTES = int(os.environ.get('CACHE_MAX_BYTES', str(64 * 1024 * 1024)))
+    CACHE_SWEEP_INTERVAL = 60  # seconds between expired-entry sweeps
+    
     # Cohere Model
     COHERE_CLASSIFICATION_MODEL = 'embed-english-v3.0'
     
@@ -50,6 +94,54 @@ class Config:
     FOLLOW_UP_CHECK_INTERVAL = 300  # 5 minutes
     REMINDER_CHECK_INTERVAL = 3600  # 1 hour
     
+    # Adaptive poll scheduling (EMAIL_POLL_INTERVAL is the starting interval)
+    POLL_MIN_INTERVAL = 30  # seconds, for busy mailboxes
+    POLL_MAX_INTERVAL = 900  # seconds, idle mailboxes back off to 15 minutes
+    POLL_BACKOFF_FACTOR = 1.5  # interval growth after a poll with no new mail
+    POLL_ERROR_MAX_INTERVAL = 3600  # cap for exponential backoff of failing accounts
+    POLL_JITTER = 0.1  # +/-10% to spread polls apart
+    POLL_MAX_CONCURRENT = int(os.environ.get('POLL_MAX_CONCURRENT', '50'))  # polls in flight per process
+    POLL_RESYNC_INTERVAL = 60  # seconds between reloads of account schedules
+    
+    # Worker fleet
+    BACKGROUND_WORKER_ENABLED = os.environ.get('BACKGROUND_WORKER_ENABLED', 'true').lower() == 'true'  # poll inside the API process
+    WORKER_ID = os.environ.get('WORKER_ID', f"{socket.gethostname()}:{os.getpid()}")  # lease owner name
+    LEASE_TTL = 120  # seconds before a crashed worker's lease can be taken over
+    WORKER_SHARDING_ENABLED = os.environ.get('WORKER_SHARDING_ENABLED', 'false').lower() == 'true'  # hash-partition accounts
+    WORKER_MEMBERSHIP_TTL = 180  # seconds without heartbeat before a worker leaves the ring
+    HASH_RING_VNODES = 128  # virtual nodes per worker
+    
+    # Email Processing Queue
+    PROCESSING_WORKERS = int(os.environ.get('PROCESSING_WORKERS', '8'))  # concurrent AI pipelines
+    PROCESSING_QUEUE_SIZE = 500  # queued emails before pollers block
+    PROCESSING_DRAIN_TIMEOUT = 30  # seconds to finish queued emails on shutdown
+    PROCESSING_RECOVERY_AGE = 600  # requeue emails left unprocessed this long (seconds)
+    
+    # Gmail API
+    GMAIL_BATCH_SIZE = 50  # messages per batch request (Gmail recommends <= 50)
+    GOOGLE_API_MAX_WORKERS = int(os.environ.get('GOOGLE_API_MAX_WORKERS', '16'))  # threads for blocking Google API calls
+    GOOGLE_SERVICE_CACHE_SIZE = 1000  # built service objects kept (LRU)
+    
+    # IMAP
+    IMAP_TIMEOUT = 30  # seconds
+    IMAP_MAX_WORKERS = int(os.environ.get('IMAP_MAX_WORKERS', '32'))  # threads for blocking IMAP fetches
+    IMAP_FETCH_BATCH_SIZE = 50  # messages fetched per poll
+    IMAP_MAX_BODY_BYTES = int(os.environ.get('IMAP_MAX_BODY_BYTES', str(256 * 1024)))  # per message, 0 = unlimited
+    IMAP_SESSION_MAX_IDLE = 900  # close persistent sessions unused for 15 minutes
+    IMAP_RECONNECT_BASE_DELAY = 5  # seconds, doubled per failed reconnect
+    IMAP_RECONNECT_MAX_DELAY = 300  # seconds
+    IMAP_IDLE_ENABLED = os.environ.get('IMAP_IDLE_ENABLED', 'false').lower() == 'true'  # push via IMAP IDLE
+    IMAP_IDLE_TIMEOUT = 540  # re-issue IDLE every 9 minutes (servers drop it after 29)
+    IMAP_IDLE_MAX_ACCOUNTS = 200  # one blocked thread per watched account
+    
+    # SMTP
+    SMTP_TIMEOUT = 30  # seconds
+    SMTP_MAX_WORKERS = int(os.environ.get('SMTP_MAX_WORKERS', '8'))  # threads for blocking SMTP sends
+    SMTP_MAX_SESSIONS_PER_HOST = int(os.environ.get('SMTP_MAX_SESSIONS_PER_HOST', '5'))
+    SMTP_ACQUIRE_TIMEOUT = 60  # seconds to wait for a free session slot
+    SMTP_IDLE_TIMEOUT = 240  # close pooled connections unused for 4 minutes
+    SMTP_KEEPALIVE_INTERVAL = 30  # NOOP pooled connections idle longer than this
+    
     # Business Hours (for follow-ups)
     BUSINESS_HOURS_START = 9  # 9 AM
     BUSINESS_HOURS_END = 17  # 5 PM
@@ -43,3 +43,9 @@ class EmailAccountError(EmailAssistantException):
     """Email account related errors"""
     def __init__(self, message: str):
         super().__init__(message, "EMAIL_ACCOUNT_ERROR")
+
+class RateLimitError(ExternalServiceError):
+    """External service rate limit or overload (retry after ``retry_after`` seconds if known)"""
+    def __init__(self, service: str, message: str, retry_after: float = None):
+        self.retry_after = retry_after
+        super().__init__(service, message)
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field, ConfigDict
-from typing import Optional, List, Literal
+from typing import Optional, List, Literal, Dict
 from datetime import datetime, timezone
 import uuid
 
@@ -35,6 +35,7 @@ class Email(BaseModel):
     # Draft & Response
     draft_generated: bool = False
     draft_content: Optional[str] = None
+    draft_partial: Optional[str] = None  # Text of a draft still streaming (or cut off)
     draft_validated: bool = False
     validation_issues: Optional[List[str]] = None
     
@@ -50,6 +51,9 @@ class Email(BaseModel):
     # Token tracking
     tokens_used: int = 0
     
+    # Processing stage durations in milliseconds
+    stage_timings: Optional[Dict[str, float]] = None
+    
     created_at: str = Field(default_factory=lambda: datetime.now(timezone.utc).isoformat())
     updated_at: str = Field(default_factory=lambda: datetime.now(timezone.utc).isoformat())
 
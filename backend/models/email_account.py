@@ -34,6 +34,16 @@ class EmailAccount(BaseModel):
     sync_status: str = 'pending'  # pending, syncing, success, error
     error_message: Optional[str] = None
     
+    # Incremental sync cursors
+    gmail_history_id: Optional[str] = None  # Last seen Gmail mailbox historyId
+    imap_uidvalidity: Optional[int] = None  # INBOX UIDVALIDITY the UID cursor belongs to
+    imap_last_uid: Optional[int] = None  # Highest INBOX UID already fetched
+    
+    # Poll scheduling
+    next_poll_at: Optional[str] = None
+    poll_interval: Optional[float] = None  # seconds, adapted to mail arrival rate
+    poll_error_count: int = 0  # consecutive failed polls (exponential backoff)
+    
     created_at: str = Field(default_factory=lambda: datetime.now(timezone.utc).isoformat())
     updated_at: str = Field(default_factory=lambda: datetime.now(timezone.utc).isoformat())
 
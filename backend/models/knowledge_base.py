@@ -13,13 +13,29 @@ class KnowledgeBase(BaseModel):
     category: Optional[str] = None
     tags: List[str] = []
     
-    # Embedding for RAG (would be computed)
-    embedding: Optional[List[float]] = None
+    # Chunk size/overlap the entry was last split with (see KnowledgeChunk)
+    chunk_settings: Optional[str] = None
     
     is_active: bool = True
     created_at: str = Field(default_factory=lambda: datetime.now(timezone.utc).isoformat())
     updated_at: str = Field(default_factory=lambda: datetime.now(timezone.utc).isoformat())
 
+class KnowledgeChunk(BaseModel):
+    """Overlapping piece of an active knowledge base entry, the unit of retrieval"""
+    model_config = ConfigDict(extra="ignore")
+    
+    id: str  # "<kb_id>:<text digest>:<position>"
+    kb_id: str
+    user_id: str
+    title: str
+    content: str
+    position: int
+    tokens: int  # estimated prompt tokens
+    
+    # Embedding for vector retrieval, and the model that computed it
+    embedding: Optional[List[float]] = None
+    embedding_model: Optional[str] = None
+
 class KnowledgeBaseCreate(BaseModel):
     title: str
     content: str
@@ -0,0 +1,37 @@
+"""MongoDB index definitions"""
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import ASCENDING
+from pymongo.errors import OperationFailure
+import logging
+
+logger = logging.getLogger(__name__)
+
+async def ensure_indexes(db: AsyncIOMotorDatabase):
+    """Create the indexes the application relies on (idempotent)"""
+    try:
+        # Dedup key for ingest: a provider message is stored once per account
+        await db.emails.create_index(
+            [("email_account_id", ASCENDING), ("message_id", ASCENDING)],
+            unique=True,
+            name="email_account_message_unique"
+        )
+    except OperationFailure as e:
+        # Usually pre-existing duplicates; ingest still dedups with a $in query
+        logger.error(f"Could not create unique email message index: {e}")
+    
+    # Lease claiming by workers
+    await db.email_accounts.create_index([("is_active", ASCENDING), ("next_poll_at", ASCENDING)])
+    await db.emails.create_index([("processed", ASCENDING), ("created_at", ASCENDING)])
+    await db.worker_members.create_index("id", unique=True)
+    
+    # LLM response cache: lookup key, and expiry via a TTL index on a BSON date
+    await db.llm_cache.create_index("key", unique=True)
+    await db.llm_cache.create_index("expires_at", expireAfterSeconds=0)
+    
+    # Knowledge base chunks: upserts by ID, snapshot loads by user, re-chunking by entry
+    await db.knowledge_base_chunks.create_index("id", unique=True)
+    await db.knowledge_base_chunks.create_index("user_id")
+    await db.knowledge_base_chunks.create_index("kb_id")
+    
+    # Per-user configuration version for snapshot revalidation
+    await db.user_config_versions.create_index("user_id", unique=True)
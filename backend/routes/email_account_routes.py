@@ -9,6 +9,7 @@ from routes.auth_routes import get_current_user_from_token, get_db
 from services.email_service import EmailService
 from models.email_account import EmailAccount, EmailAccountCreate, EmailAccountUpdate, EmailAccountResponse
 from models.user import User
+from services.user_config import user_config_cache
 
 router = APIRouter(prefix="/email-accounts", tags=["email-accounts"])
 
@@ -70,6 +71,7 @@ async def create_email_account(
     
     doc = account.model_dump()
     await db.email_accounts.insert_one(doc)
+    await user_config_cache.notify_changed(db, user.id)
     
     return EmailAccountResponse(
         id=account.id,
@@ -156,6 +158,7 @@ async def update_email_account(
             {"id": account_id},
             {"$set": update_dict}
         )
+        await user_config_cache.notify_changed(db, user.id)
     
     updated_doc = await db.email_accounts.find_one({"id": account_id})
     
@@ -185,6 +188,8 @@ async def delete_email_account(
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="Account not found")
     
+    await user_config_cache.notify_changed(db, user.id)
+    
     return {"message": "Account deleted successfully"}
 
 @router.post("/{account_id}/test")
@@ -1,6 +1,13 @@
 from fastapi import APIRouter, Depends, HTTPException, Query
-from typing import List, Optional
+from fastapi.responses import StreamingResponse
+from typing import AsyncIterator, Dict, List, Optional
 from motor.motor_asyncio import AsyncIOMotorDatabase
+from datetime import datetime, timezone
+import json
+import time
+import logging
+
+from config import config
 
 from routes.auth_routes import get_current_user_from_token, get_db
 from services.email_service import EmailService
@@ -9,8 +16,14 @@ from models.email import Email, EmailResponse, EmailSend
 from models.user import User
 from models.email_account import EmailAccount
 
+logger = logging.getLogger(__name__)
+
 router = APIRouter(prefix="/emails", tags=["emails"])
 
+def _sse(event: str, data: Dict) -> str:
+    """Format a server-sent event"""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
 @router.get("", response_model=List[EmailResponse])
 async def list_emails(
     status: Optional[str] = Query(None),
@@ -223,10 +236,84 @@ async def reprocess_email(
     if not email_doc:
         raise HTTPException(status_code=404, detail="Email not found")
     
-    # Queue for reprocessing
+    # Queue for reprocessing (user-initiated, so ahead of background LLM work)
     from workers.email_worker import process_email
+    from utils.llm_governor import llm_governor, LANE_INTERACTIVE
     import asyncio
     
-    asyncio.create_task(process_email(email_id))
+    with llm_governor.lane(LANE_INTERACTIVE):
+        asyncio.create_task(process_email(email_id))
     
     return {"success": True, "message": "Email queued for reprocessing"}
+
+@router.post("/{email_id}/draft/stream")
+async def stream_draft(
+    email_id: str,
+    user: User = Depends(get_current_user_from_token),
+    db: AsyncIOMotorDatabase = Depends(get_db)
+):
+    """Regenerate the draft for an email, streamed as server-sent events
+    
+    Emits ``token`` events with text as it is generated, then a ``done``
+    event with the validation result (or an ``error`` event). The text so
+    far is saved to ``draft_partial`` as it grows; ``draft_content`` is only
+    replaced once the draft is complete, and is left for review, never sent.
+    """
+    email_doc = await db.emails.find_one({"id": email_id, "user_id": user.id})
+    
+    if not email_doc:
+        raise HTTPException(status_code=404, detail="Email not found")
+    
+    from services.ai_agent_service_v2 import AIAgentServiceV2
+    from utils.llm_governor import llm_governor, LANE_INTERACTIVE
+    
+    email = Email(**email_doc)
+    ai_service = AIAgentServiceV2.for_database(db)
+    
+    async def save_partial(text: str):
+        await db.emails.update_one({"id": email_id}, {"$set": {
+            "draft_partial": text,
+            "updated_at": datetime.now(timezone.utc).isoformat()
+        }})
+    
+    async def events() -> AsyncIterator[str]:
+        # A user is waiting on this request: skip ahead of background LLM work
+        with llm_governor.lane(LANE_INTERACTIVE):
+            try:
+                intent_id, intent_confidence = await ai_service.classify_intent(email, email.user_id)
+                
+                parts = []
+                last_saved = time.monotonic()
+                async for text in ai_service.stream_draft(email, email.user_id, intent_id):
+                    parts.append(text)
+                    yield _sse("token", {"text": text})
+                    
+                    if time.monotonic() - last_saved >= config.DRAFT_STREAM_SAVE_INTERVAL:
+                        await save_partial("".join(parts))
+                        last_saved = time.monotonic()
+                
+                draft = "".join(parts).strip()
+                valid, issues = await ai_service.validate_draft(draft, email, intent_id)
+                
+                # Same record and billing as the processing pipeline
+                result = EmailService.draft_result(
+                    intent_id, intent_confidence, draft, valid, issues, ai_service.get_tokens_used()
+                )
+                result["draft_partial"] = None
+                await EmailService(db).save_draft_result(email, result)
+                
+                yield _sse("done", {
+                    "draft": draft,
+                    "valid": valid,
+                    "issues": issues,
+                    "tokens_used": ai_service.get_tokens_used()
+                })
+            except Exception as e:
+                logger.error(f"Error streaming draft for email {email_id}: {e}")
+                yield _sse("error", {"detail": str(e)})
+    
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
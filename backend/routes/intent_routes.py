@@ -5,6 +5,7 @@ from motor.motor_asyncio import AsyncIOMotorDatabase
 from routes.auth_routes import get_current_user_from_token, get_db
 from models.intent import Intent, IntentCreate, IntentUpdate, IntentResponse
 from models.user import User
+from services.user_config import user_config_cache
 
 router = APIRouter(prefix="/intents", tags=["intents"])
 
@@ -27,6 +28,7 @@ async def create_intent(
     
     doc = intent.model_dump()
     await db.intents.insert_one(doc)
+    await user_config_cache.notify_changed(db, user.id)
     
     return IntentResponse(
         id=intent.id,
@@ -107,6 +109,7 @@ async def update_intent(
             {"id": intent_id},
             {"$set": update_dict}
         )
+        await user_config_cache.notify_changed(db, user.id)
     
     updated_doc = await db.intents.find_one({"id": intent_id})
     
@@ -134,4 +137,6 @@ async def delete_intent(
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="Intent not found")
     
+    await user_config_cache.notify_changed(db, user.id)
+    
     return {"message": "Intent deleted successfully"}
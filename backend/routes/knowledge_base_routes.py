@@ -5,6 +5,8 @@ from motor.motor_asyncio import AsyncIOMotorDatabase
 from routes.auth_routes import get_current_user_from_token, get_db
 from models.knowledge_base import KnowledgeBase, KnowledgeBaseCreate, KnowledgeBaseUpdate, KnowledgeBaseResponse
 from models.user import User
+from services.knowledge_chunks import knowledge_chunker
+from services.user_config import user_config_cache
 
 router = APIRouter(prefix="/knowledge-base", tags=["knowledge-base"])
 
@@ -25,6 +27,9 @@ async def create_knowledge_base(
     
     doc = kb.model_dump()
     await db.knowledge_base.insert_one(doc)
+    await knowledge_chunker.sync(db, doc)
+    await user_config_cache.notify_changed(db, user.id)
+    user_config_cache.embed_pending(db, user.id)
     
     return KnowledgeBaseResponse(
         id=kb.id,
@@ -102,6 +107,12 @@ async def update_knowledge_base(
     
     updated_doc = await db.knowledge_base.find_one({"id": kb_id})
     
+    if update_dict:
+        # Unchanged chunks keep their IDs and embeddings
+        await knowledge_chunker.sync(db, updated_doc)
+        await user_config_cache.notify_changed(db, user.id)
+        user_config_cache.embed_pending(db, user.id)
+    
     return KnowledgeBaseResponse(
         id=updated_doc['id'],
         title=updated_doc['title'],
@@ -124,4 +135,7 @@ async def delete_knowledge_base(
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="Knowledge base entry not found")
     
+    await knowledge_chunker.delete(db, kb_id)
+    await user_config_cache.notify_changed(db, user.id)
+    
     return {"message": "Knowledge base entry deleted successfully"}
@@ -8,6 +8,7 @@ from urllib.parse import urlparse
 
 from routes.auth_routes import get_current_user_from_token, get_db
 from services.oauth_service import OAuthService
+from services.user_config import user_config_cache
 from models.email_account import EmailAccount
 from models.calendar import CalendarProvider
 from models.user import User
@@ -196,6 +197,7 @@ async def google_oauth_callback_get(
             
             doc = account.model_dump()
             await db.email_accounts.insert_one(doc)
+            await user_config_cache.notify_changed(db, user_id)
         
         return RedirectResponse(url=f"{frontend_url}/email-accounts?success=true&email={email}")
     else:
@@ -276,6 +278,7 @@ async def google_oauth_callback(
         
         doc = account.model_dump()
         await db.email_accounts.insert_one(doc)
+        await user_config_cache.notify_changed(db, user_id)
         
         return {"success": True, "account_id": account.id, "email": email}
     else:
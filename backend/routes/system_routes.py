@@ -5,6 +5,7 @@ from datetime import datetime, timezone, timedelta
 
 from routes.auth_routes import get_current_user_from_token, get_db
 from services.queue_service import queue_service
+from utils.metrics import metrics
 from models.user import User
 
 router = APIRouter(prefix="/system", tags=["system"])
@@ -54,6 +55,13 @@ async def get_system_status(
         "mongodb": mongo_status
     }
 
+@router.get("/metrics")
+async def get_system_metrics(
+    user: User = Depends(get_current_user_from_token)
+):
+    """Get in-process metrics (external call latency, queue depths, counters)"""
+    return metrics.snapshot()
+
 @router.post("/test-email-processing")
 async def test_email_processing(
     user: User = Depends(get_current_user_from_token),
@@ -61,7 +69,8 @@ async def test_email_processing(
 ):
     """Test email processing with a sample email"""
     from models.email import Email
-    from services.ai_agent_service import AIAgentService
+    from services.ai_agent_service_v2 import AIAgentServiceV2
+    from utils.llm_governor import llm_governor, LANE_INTERACTIVE
     
     # Create test email
     test_email = Email(
@@ -75,19 +84,21 @@ async def test_email_processing(
         received_at=datetime.now(timezone.utc).isoformat()
     )
     
-    ai_service = AIAgentService(db)
-    
-    # Test intent detection
-    intent_id, intent_confidence = await ai_service.classify_intent(test_email, user.id)
-    
-    # Test meeting detection
-    is_meeting, meeting_confidence, meeting_details = await ai_service.detect_meeting(test_email)
-    
-    # Test draft generation
-    draft, tokens = await ai_service.generate_draft(test_email, user.id, intent_id)
-    
-    # Test validation
-    valid, issues = await ai_service.validate_draft(draft, test_email, user.id, intent_id)
+    ai_service = AIAgentServiceV2.for_database(db)
+    
+    # A user is waiting on this request: skip ahead of background LLM work
+    with llm_governor.lane(LANE_INTERACTIVE):
+        # Test intent detection
+        intent_id, intent_confidence = await ai_service.classify_intent(test_email, user.id)
+        
+        # Test meeting detection
+        is_meeting, meeting_confidence, meeting_details = await ai_service.detect_meeting(test_email)
+        
+        # Test draft generation
+        draft, tokens = await ai_service.generate_draft(test_email, user.id, intent_id)
+        
+        # Test validation
+        valid, issues = await ai_service.validate_draft(draft, test_email, intent_id)
     
     return {
         "success": True,
@@ -10,6 +10,7 @@ from container import initialize_container
 from middleware.error_handler import global_exception_handler, validation_exception_handler
 from middleware.security import RateLimitMiddleware, SecurityHeadersMiddleware
 from exceptions import EmailAssistantException
+from workers.rounds import RoundCoordinator
 
 # Configure logging with better format
 logging.basicConfig(
@@ -28,6 +29,9 @@ client = AsyncIOMotorClient(
 )
 db = client[config.DB_NAME]
 
+# Periodic background rounds (a round is skipped while its previous run is still going)
+background_rounds = RoundCoordinator('background')
+
 # Create FastAPI app
 app = FastAPI(
     title="AI Email Assistant API",
@@ -125,34 +129,57 @@ async def startup_event():
         initialize_container(db, config.JWT_SECRET)
         logger.info("✓ Service container initialized")
         
+        # Create indexes (unique message key makes email ingest idempotent)
+        from repositories.indexes import ensure_indexes
+        await ensure_indexes(db)
+        logger.info("✓ Database indexes ensured")
+        
+        # Parse Google API discovery documents once
+        from utils.google_api import google_service_cache
+        google_service_cache.load_discovery_documents()
+        logger.info("✓ Google API discovery documents loaded")
+        
+        # Invalidate configuration snapshots from Mongo change streams
+        from services.user_config import user_config_cache
+        user_config_cache.start_watching(db)
+        
+        # Chunk knowledge base entries written before chunking (or under other chunk settings)
+        from services.knowledge_chunks import knowledge_chunker
+        asyncio.create_task(knowledge_chunker.backfill(db))
+        
         # Start background worker in separate task
-        from workers.email_worker import poll_all_accounts, check_follow_ups, check_reminders
+        from workers.email_worker import poll_due_accounts, check_follow_ups, check_reminders, maintain_mail_sessions, processing_queue, requeue_unprocessed_emails
         
         async def background_worker():
             poll_counter = 0
             follow_up_counter = 0
             reminder_counter = 0
             
+            processing_queue.start()
             logger.info("✓ Background worker started")
             
             while True:
                 try:
-                    # Poll emails every 60 seconds
+                    # Poll accounts as they come due
+                    background_rounds.start('poll', poll_due_accounts)
+                    
+                    # Maintain mail sessions and recover stuck emails every 60 seconds
                     if poll_counter % config.EMAIL_POLL_INTERVAL == 0:
-                        asyncio.create_task(poll_all_accounts())
+                        background_rounds.start('maintain_sessions', maintain_mail_sessions)
+                        background_rounds.start('requeue', requeue_unprocessed_emails)
                         poll_counter = 0
                     
                     # Check follow-ups every 5 minutes
                     if follow_up_counter % config.FOLLOW_UP_CHECK_INTERVAL == 0:
-                        asyncio.create_task(check_follow_ups())
+                        background_rounds.start('follow_ups', check_follow_ups)
                         follow_up_counter = 0
                     
                     # Check reminders every hour
                     if reminder_counter % config.REMINDER_CHECK_INTERVAL == 0:
-                        asyncio.create_task(check_reminders())
+                        background_rounds.start('reminders', check_reminders)
                         reminder_counter = 0
                     
-                    await asyncio.sleep(1)
+                    await background_rounds.sleep()
                     poll_counter += 1
                     follow_up_counter += 1
                     reminder_counter += 1
@@ -160,8 +187,11 @@ async def startup_event():
                     logger.error(f"Background worker error: {e}", exc_info=True)
                     await asyncio.sleep(5)
         
-        # Start background worker
-        asyncio.create_task(background_worker())
+        # Start background worker (disable when a separate worker fleet does the polling)
+        if config.BACKGROUND_WORKER_ENABLED:
+            asyncio.create_task(background_worker())
+        else:
+            logger.info("✓ Background worker disabled (BACKGROUND_WORKER_ENABLED=false)")
         
         logger.info("=" * 60)
         logger.info("✓ AI Email Assistant API is ready!")
@@ -174,11 +204,54 @@ async def startup_event():
 async def shutdown_event():
     logger.info("Shutting down AI Email Assistant API...")
     
+    # Stop scheduled polls and finish queued email processing while HTTP clients are still open
+    from workers.email_worker import poll_scheduler, processing_queue
+    await background_rounds.stop()
+    await poll_scheduler.stop()
+    await processing_queue.drain(config.PROCESSING_DRAIN_TIMEOUT)
+    logger.info("✓ Email processing queue drained")
+    
+    # Leave the worker ring so other workers take over this node's accounts
+    if config.WORKER_SHARDING_ENABLED and config.BACKGROUND_WORKER_ENABLED:
+        from workers.email_worker import worker_membership
+        await worker_membership.leave()
+        logger.info("✓ Left worker membership")
+    
+    # Stop the cache sweeper / close the Redis cache connection
+    from utils.cache import cache_service
+    await cache_service.close()
+    from services.user_config import user_config_cache
+    await user_config_cache.stop()
+    
     # Close HTTP client pool
     from utils.http_client import http_client_pool
     await http_client_pool.close()
     logger.info("✓ HTTP client pool closed")
     
+    # Shut down Google API thread pool
+    from utils.google_api import google_api_client
+    google_api_client.shutdown()
+    logger.info("✓ Google API thread pool closed")
+    
+    # Stop IMAP IDLE watchers and log out persistent IMAP sessions
+    from workers.email_worker import imap_idle_supervisor
+    from services.imap_session import imap_session_manager
+    from utils.executors import imap_executor, smtp_executor
+    imap_idle_supervisor.stop()
+    await imap_executor.run(imap_session_manager.close_all, operation='close')
+    imap_executor.shutdown()
+    logger.info("✓ IMAP sessions closed")
+    
+    # Shut down local embedding model threads
+    from utils.executors import embedding_executor
+    embedding_executor.shutdown()
+    
+    # Close pooled SMTP connections
+    from services.smtp_pool import smtp_pool
+    await smtp_executor.run(smtp_pool.close_all, operation='close')
+    smtp_executor.shutdown()
+    logger.info("✓ SMTP connections closed")
+    
     # Close database connection
     client.close()
     logger.info("✓ Database connection closed")
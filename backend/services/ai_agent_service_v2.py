@@ -1,19 +1,33 @@
 """Improved AI Agent Service with better architecture"""
 import json
-from typing import List, Optional, Dict, Tuple
+from datetime import datetime, timezone, timedelta
+from typing import AsyncIterator, List, Optional, Dict, Tuple
+from motor.motor_asyncio import AsyncIOMotorCollection, AsyncIOMotorDatabase
+from pymongo.errors import DuplicateKeyError
+import hashlib
 import logging
+import re
 from abc import ABC, abstractmethod
 
 from config import config
 from models.email import Email
-from models.intent import Intent
-from repositories.base_repository import GenericRepository
+from repositories.base_repository import GenericRepository, RepositoryFactory
 from utils.http_client import http_client_pool
-from utils.cache import cache_result
-from exceptions import ExternalServiceError
+from utils.llm_governor import LLMGovernor, llm_governor, estimate_tokens
+from utils.metrics import metrics
+from services.embedding_service import knowledge_embedder
+from services.user_config import UserConfigSnapshot, user_config_cache
+from exceptions import ExternalServiceError, RateLimitError
 
 logger = logging.getLogger(__name__)
 
+# Response cache hit/miss totals across all CachedModel instances
+_cache_stats = {'hits': 0, 'misses': 0}
+metrics.register_gauge(
+    'llm.cache.hit_rate',
+    lambda: round(_cache_stats['hits'] / max(1, _cache_stats['hits'] + _cache_stats['misses']), 4)
+)
+
 class AIModel(ABC):
     """Abstract AI model interface (Open/Closed Principle)"""
     
@@ -26,6 +40,14 @@ class AIModel(ABC):
     async def classify(self, text: str, categories: List[str]) -> Tuple[str, float]:
         """Classify text"""
         pass
+    
+    async def stream(self, prompt: str, **kwargs) -> AsyncIterator[Tuple[str, int]]:
+        """Generate response as ``(text, tokens)`` chunks; ``tokens`` is the total, on the last chunk
+        
+        Models without native streaming return the whole response as one chunk.
+        """
+        content, tokens = await self.generate(prompt, **kwargs)
+        yield content, tokens
 
 class GroqModel(AIModel):
     """Groq LLM implementation"""
@@ -35,42 +57,92 @@ class GroqModel(AIModel):
         self.model = model
         self.base_url = 'https://api.groq.com/openai/v1/chat/completions'
     
+    def _request(self, prompt: str, system_prompt: Optional[str], temperature: float, max_tokens: int, **extra) -> Dict:
+        """Headers and JSON body for a chat completion request"""
+        messages = []
+        if system_prompt:
+            messages.append({'role': 'system', 'content': system_prompt})
+        messages.append({'role': 'user', 'content': prompt})
+        
+        return {
+            'headers': {
+                'Authorization': f'Bearer {self.api_key}',
+                'Content-Type': 'application/json'
+            },
+            'json': {
+                'model': self.model,
+                'messages': messages,
+                'temperature': temperature,
+                'max_tokens': max_tokens,
+                **extra
+            }
+        }
+    
+    def _check_status(self, response):
+        if response.status_code in (429, 503):
+            # Rate limited or over capacity: the governor backs off and retries
+            raise RateLimitError('Groq', f"API error: {response.status_code}", self._retry_after(response))
+        if response.status_code != 200:
+            raise ExternalServiceError('Groq', f"API error: {response.status_code}")
+    
     async def generate(self, prompt: str, system_prompt: str = None, temperature: float = 0.7, max_tokens: int = 800) -> Tuple[str, int]:
         """Generate text using Groq"""
         try:
             client = await http_client_pool.get_client()
             
-            messages = []
-            if system_prompt:
-                messages.append({'role': 'system', 'content': system_prompt})
-            messages.append({'role': 'user', 'content': prompt})
-            
-            response = await client.post(
-                self.base_url,
-                headers={
-                    'Authorization': f'Bearer {self.api_key}',
-                    'Content-Type': 'application/json'
-                },
-                json={
-                    'model': self.model,
-                    'messages': messages,
-                    'temperature': temperature,
-                    'max_tokens': max_tokens
-                }
-            )
-            
-            if response.status_code != 200:
-                raise ExternalServiceError('Groq', f"API error: {response.status_code}")
+            response = await client.post(self.base_url, **self._request(prompt, system_prompt, temperature, max_tokens))
+            self._check_status(response)
             
             result = response.json()
             content = result['choices'][0]['message']['content'].strip()
             tokens = result.get('usage', {}).get('total_tokens', 0)
             
             return content, tokens
+        except ExternalServiceError:
+            raise
         except Exception as e:
             logger.error(f"Groq API error: {e}")
             raise ExternalServiceError('Groq', str(e))
     
+    async def stream(self, prompt: str, system_prompt: str = None, temperature: float = 0.7, max_tokens: int = 800) -> AsyncIterator[Tuple[str, int]]:
+        """Generate text using Groq's server-sent event stream"""
+        try:
+            client = await http_client_pool.get_client()
+            request = self._request(
+                prompt, system_prompt, temperature, max_tokens,
+                stream=True, stream_options={'include_usage': True}
+            )
+            
+            async with client.stream('POST', self.base_url, **request) as response:
+                self._check_status(response)
+                
+                async for line in response.aiter_lines():
+                    if not line.startswith('data:'):
+                        continue
+                    data = line[5:].strip()
+                    if data == '[DONE]':
+                        break
+                    
+                    chunk = json.loads(data)
+                    text = ''.join((choice.get('delta') or {}).get('content') or '' for choice in chunk.get('choices', []))
+                    # Usage arrives on the final chunk (``x_groq.usage`` on older API versions)
+                    usage = chunk.get('usage') or (chunk.get('x_groq') or {}).get('usage') or {}
+                    tokens = usage.get('total_tokens', 0)
+                    if text or tokens:
+                        yield text, tokens
+        except ExternalServiceError:
+            raise
+        except Exception as e:
+            logger.error(f"Groq streaming error: {e}")
+            raise ExternalServiceError('Groq', str(e))
+    
+    @staticmethod
+    def _retry_after(response) -> Optional[float]:
+        try:
+            return float(response.headers.get('retry-after'))
+        except (TypeError, ValueError):
+            return None
+    
     async def classify(self, text: str, categories: List[str]) -> Tuple[str, float]:
         """Simple classification using Groq"""
         prompt = f"""Classify this text into one of these categories: {', '.join(categories)}
@@ -89,64 +161,243 @@ Respond with only the category name."""
         
         return categories[0] if categories else "unknown", 0.5
 
+class GovernedModel(AIModel):
+    """Runs another model's calls through the LLM governor (rate limits, priorities, retries)"""
+    
+    def __init__(self, model: AIModel, governor: LLMGovernor):
+        self.model = model
+        self.governor = governor
+    
+    async def generate(self, prompt: str, **kwargs) -> Tuple[str, int]:
+        """Generate response"""
+        estimated = estimate_tokens(prompt + (kwargs.get('system_prompt') or ''), kwargs.get('max_tokens', 800))
+        return await self.governor.run(lambda: self.model.generate(prompt, **kwargs), estimated, operation='generate')
+    
+    async def classify(self, text: str, categories: List[str]) -> Tuple[str, float]:
+        """Classify text"""
+        return await self.governor.run(lambda: self.model.classify(text, categories), estimate_tokens(text, 50), operation='classify')
+    
+    async def stream(self, prompt: str, **kwargs) -> AsyncIterator[Tuple[str, int]]:
+        """Stream response"""
+        estimated = estimate_tokens(prompt + (kwargs.get('system_prompt') or ''), kwargs.get('max_tokens', 800))
+        async for chunk in self.governor.stream(lambda: self.model.stream(prompt, **kwargs), estimated):
+            yield chunk
+
+class CachedModel(AIModel):
+    """Persistent response cache in front of another model
+    
+    Responses are stored in Mongo keyed by model, generation parameters and
+    a hash of the normalized prompt, so repeat content (newsletters,
+    notifications, the same question sent to several aliases) costs no
+    tokens. Normalization drops the ``Current Date & Time`` line and
+    collapses whitespace; the TTL bounds how stale a reused answer can be.
+    Cache errors never fail the call.
+    """
+    
+    TIMESTAMP_LINE = re.compile(r'^\s*Current Date & Time:.*$', re.MULTILINE)
+    
+    def __init__(self, model: AIModel, model_name: str, collection: AsyncIOMotorCollection, ttl: int):
+        self.model = model
+        self.model_name = model_name
+        self.collection = collection
+        self.ttl = ttl
+    
+    @classmethod
+    def normalize(cls, prompt: str) -> str:
+        """Prompt text with the timestamp line removed and whitespace collapsed"""
+        return ' '.join(cls.TIMESTAMP_LINE.sub('', prompt).split())
+    
+    def cache_key(self, prompt: str, **kwargs) -> str:
+        key_data = json.dumps({
+            'model': self.model_name,
+            'params': {name: kwargs[name] for name in sorted(kwargs)},
+            'prompt': self.normalize(prompt)
+        }, sort_keys=True, default=str)
+        return hashlib.sha256(key_data.encode()).hexdigest()
+    
+    async def _lookup(self, key: str) -> Optional[str]:
+        try:
+            cached = await self.collection.find_one({"key": key}, {"_id": 0, "content": 1, "tokens": 1})
+        except Exception as e:
+            logger.error(f"LLM cache lookup failed: {e}")
+            cached = None
+        
+        if cached is None:
+            _cache_stats['misses'] += 1
+            metrics.increment('llm.cache.misses')
+            return None
+        
+        _cache_stats['hits'] += 1
+        metrics.increment('llm.cache.hits')
+        metrics.increment('llm.cache.tokens_saved', cached.get('tokens', 0))
+        return cached['content']
+    
+    async def generate(self, prompt: str, **kwargs) -> Tuple[str, int]:
+        """Generate response, reusing a cached one when available (0 tokens spent)"""
+        key = self.cache_key(prompt, **kwargs)
+        
+        cached = await self._lookup(key)
+        if cached is not None:
+            return cached, 0
+        
+        content, tokens = await self.model.generate(prompt, **kwargs)
+        await self._store(key, content, tokens)
+        return content, tokens
+    
+    async def stream(self, prompt: str, **kwargs) -> AsyncIterator[Tuple[str, int]]:
+        """Stream response; a cached one arrives as a single chunk, a fresh one is cached when complete"""
+        key = self.cache_key(prompt, **kwargs)
+        
+        cached = await self._lookup(key)
+        if cached is not None:
+            yield cached, 0
+            return
+        
+        parts = []
+        total_tokens = 0
+        async for text, tokens in self.model.stream(prompt, **kwargs):
+            parts.append(text)
+            total_tokens = tokens or total_tokens
+            yield text, tokens
+        await self._store(key, ''.join(parts).strip(), total_tokens)
+    
+    async def _store(self, key: str, content: str, tokens: int):
+        now = datetime.now(timezone.utc)
+        try:
+            await self.collection.update_one(
+                {"key": key},
+                {"$setOnInsert": {
+                    "key": key,
+                    "model": self.model_name,
+                    "content": content,
+                    "tokens": tokens,
+                    "created_at": now.isoformat(),
+                    # BSON date (not an ISO string) so the TTL index can expire it
+                    "expires_at": now + timedelta(seconds=self.ttl)
+                }},
+                upsert=True
+            )
+        except DuplicateKeyError:
+            pass  # Another worker cached the same prompt concurrently
+        except Exception as e:
+            logger.error(f"LLM cache write failed: {e}")
+    
+    async def classify(self, text: str, categories: List[str]) -> Tuple[str, float]:
+        """Classify text"""
+        return await self.model.classify(text, categories)
+
+def cached_groq_model(model_name: str, collection: AsyncIOMotorCollection) -> AIModel:
+    """Groq model behind the LLM governor and, if enabled, the response cache"""
+    model = GovernedModel(GroqModel(config.GROQ_API_KEY, model_name), llm_governor)
+    if not config.LLM_CACHE_ENABLED:
+        return model
+    return CachedModel(model, model_name, collection, config.LLM_CACHE_TTL)
+
 class IntentClassifier:
     """Intent classification with multiple strategies"""
     
     def __init__(self, repository: GenericRepository):
         self.repository = repository
     
-    @cache_result(ttl=300, key_prefix="intent")
     async def classify_by_keywords(self, email: Email, user_id: str) -> Tuple[Optional[str], float]:
-        """Keyword-based classification (fast, no API cost)"""
-        intents = await self.repository.find_many(
-            {"user_id": user_id, "is_active": True},
-            sort=[("priority", -1)]
-        )
+        """Keyword-based classification (fast, no API cost)
+        
+        The highest-priority intent with a keyword in the subject or body
+        wins; among equal priorities, the one with more keyword hits.
+        """
+        matcher = (await user_config_cache.get(self.repository.db, user_id)).intent_matcher
+        hits = matcher.hits(f"{email.subject} {email.body}")
+        intent_id = matcher.best(hits)
         
-        if not intents:
+        if intent_id is None:
             return None, 0.0
         
-        email_text = f"{email.subject} {email.body}".lower()
+        logger.info(f"Intent {intent_id} matched by {hits[intent_id]} keyword hits")
+        return intent_id, 0.9  # High confidence for keyword match
+
+class MeetingDetector:
+    """Meeting request detection and extraction"""
+    
+    def __init__(self, model: AIModel):
+        self.model = model
+    
+    async def detect(self, email: Email) -> Tuple[bool, float, Optional[Dict], int]:
+        """Detect a meeting request; returns flag, confidence, details and tokens used"""
+        current_time = config.get_datetime_string()
         
-        # Score each intent
-        best_intent = None
-        best_score = 0.0
+        prompt = f"""Current Date & Time: {current_time}
+
+Analyze this email and determine if it contains a meeting request or invitation.
+
+Email Subject: {email.subject}
+Email Body: {email.body}
+
+If a meeting is detected, extract:
+1. Meeting date and time (convert to ISO format YYYY-MM-DDTHH:MM:SS)
+2. Duration or end time
+3. Location (physical or virtual)
+4. Meeting title/purpose
+5. Attendees
+
+Respond in JSON format:
+{{
+  "is_meeting": true/false,
+  "confidence": 0.0-1.0,
+  "details": {{
+    "title": "...",
+    "start_time": "2025-01-15T14:00:00",
+    "end_time": "2025-01-15T15:00:00",
+    "location": "...",
+    "description": "...",
+    "attendees": ["email@example.com"]
+  }}
+}}
+
+If no meeting detected, set is_meeting to false and confidence to 0.0."""
         
-        for intent_doc in intents:
-            intent = Intent(**intent_doc)
-            score = 0.0
-            
-            # Check keywords
-            for keyword in intent.keywords:
-                if keyword.lower() in email_text:
-                    score += 1.0
-            
-            # Normalize score
-            if intent.keywords:
-                score = score / len(intent.keywords)
+        tokens = 0
+        try:
+            result, tokens = await self.model.generate(
+                prompt,
+                system_prompt="You are a meeting detection AI. Always respond with valid JSON.",
+                temperature=0.3,
+                max_tokens=500
+            )
             
-            if score > best_score:
-                best_score = score
-                best_intent = intent.id
-        
-        if best_score > 0.5:
-            return best_intent, best_score
-        
-        return None, 0.0
+            data = json.loads(result)
+            return data.get('is_meeting', False), data.get('confidence', 0.0), data.get('details'), tokens
+        except json.JSONDecodeError:
+            logger.error(f"Failed to parse meeting detection JSON: {result}")
+            return False, 0.0, None, tokens
+        except Exception as e:
+            logger.error(f"Meeting detection error: {e}")
+            return False, 0.0, None, tokens
 
 class DraftGenerator:
     """Draft generation with context"""
     
+    SYSTEM_PROMPT = "You are a professional email writing assistant. Write clear, actionable emails with no placeholders."
+    
     def __init__(self, model: AIModel, repositories: Dict[str, GenericRepository]):
         self.model = model
         self.repositories = repositories
     
     async def generate(self, email: Email, user_id: str, intent_id: Optional[str] = None) -> Tuple[str, int]:
         """Generate email draft"""
+        prompt = await self._build_prompt(email, user_id, intent_id)
+        return await self.model.generate(prompt, system_prompt=self.SYSTEM_PROMPT, temperature=0.7, max_tokens=800)
+    
+    async def stream(self, email: Email, user_id: str, intent_id: Optional[str] = None) -> AsyncIterator[Tuple[str, int]]:
+        """Generate email draft as ``(text, tokens)`` chunks"""
+        prompt = await self._build_prompt(email, user_id, intent_id)
+        async for chunk in self.model.stream(prompt, system_prompt=self.SYSTEM_PROMPT, temperature=0.7, max_tokens=800):
+            yield chunk
+    
+    async def _build_prompt(self, email: Email, user_id: str, intent_id: Optional[str] = None) -> str:
         current_time = config.get_datetime_string()
-        context = await self._get_context(user_id, email.email_account_id, intent_id)
+        context = await self._get_context(email, user_id, intent_id)
         
-        prompt = f"""Current Date & Time: {current_time}
+        return f"""Current Date & Time: {current_time}
 
 You are an AI email assistant. Generate a professional email response.
 
@@ -166,18 +417,14 @@ Generate a clear, professional response that:
 6. Contains NO placeholders like [Your Name] or [Date]
 
 Respond with ONLY the email body text, no subject line."""
-        
-        system_prompt = "You are a professional email writing assistant. Write clear, actionable emails with no placeholders."
-        
-        return await self.model.generate(prompt, system_prompt=system_prompt, temperature=0.7)
     
-    async def _get_context(self, user_id: str, account_id: str, intent_id: Optional[str] = None) -> str:
-        """Build context for draft generation"""
+    async def _get_context(self, email: Email, user_id: str, intent_id: Optional[str] = None) -> str:
+        """Build context for draft generation from the user's configuration snapshot"""
+        snapshot = await user_config_cache.get(self.repositories['intents'].db, user_id)
         context_parts = []
         
         # Get account details
-        account_repo = self.repositories['email_accounts']
-        account_doc = await account_repo.find_by_id(account_id)
+        account_doc = snapshot.accounts.get(email.email_account_id)
         
         if account_doc:
             if account_doc.get('persona'):
@@ -187,24 +434,49 @@ Respond with ONLY the email body text, no subject line."""
         
         # Get intent
         if intent_id:
-            intent_repo = self.repositories['intents']
-            intent_doc = await intent_repo.find_by_id(intent_id)
+            intent_doc = snapshot.intents.get(intent_id)
             if intent_doc:
                 context_parts.append(f"Intent: {intent_doc['name']}")
                 context_parts.append(f"Response Guidelines: {intent_doc['prompt']}")
         
-        # Get knowledge base
-        kb_repo = self.repositories['knowledge_base']
-        kb_docs = await kb_repo.find_many(
-            {"user_id": user_id, "is_active": True},
-            limit=5
-        )
+        # Get the knowledge base chunks most relevant to the email
+        kb_chunks = await self._relevant_knowledge(snapshot, email)
         
-        if kb_docs:
-            kb_text = "\n".join([f"- {doc['title']}: {doc['content'][:200]}..." for doc in kb_docs])
+        if kb_chunks:
+            kb_text = "\n".join([f"- {chunk['title']}: {chunk['content']}" for chunk in kb_chunks])
             context_parts.append(f"Knowledge Base:\n{kb_text}")
         
         return "\n\n".join(context_parts)
+    
+    async def _relevant_knowledge(self, snapshot: UserConfigSnapshot, email: Email) -> List[Dict]:
+        """Best-ranked knowledge base chunks that fit within KB_CONTEXT_TOKEN_BUDGET"""
+        selected = []
+        used = 0
+        for chunk in await self._rank_chunks(snapshot, email):
+            if used + chunk['tokens'] <= config.KB_CONTEXT_TOKEN_BUDGET:
+                selected.append(chunk)
+                used += chunk['tokens']
+        
+        metrics.increment('kb.retrieval.chunks', len(selected))
+        metrics.increment('kb.retrieval.tokens', used)
+        return selected
+    
+    async def _rank_chunks(self, snapshot: UserConfigSnapshot, email: Email) -> List[Dict]:
+        """Chunks by similarity to the email: vector search, or BM25 without embeddings"""
+        query_text = f"{email.subject}\n{email.body}"[:config.KB_QUERY_MAX_CHARS]
+        
+        if snapshot.kb_index.size:
+            query = await knowledge_embedder.embed_query(query_text)
+            if query is not None:
+                metrics.increment('kb.retrieval.vector')
+                results = snapshot.kb_index.search(query, config.KB_RETRIEVAL_TOP_K, config.KB_RETRIEVAL_MIN_SCORE)
+                return [chunk for chunk, _ in results]
+        
+        # No embedding provider, chunks not embedded yet, or the provider failed
+        metrics.increment('kb.retrieval.lexical')
+        results = snapshot.kb_lexical.search(query_text, config.KB_RETRIEVAL_TOP_K)
+        # The lexical index is shared with newer snapshots of the user
+        return [snapshot.kb_chunks[chunk_id] for chunk_id, _ in results if chunk_id in snapshot.kb_chunks]
 
 class DraftValidator:
     """Draft validation"""
@@ -212,8 +484,8 @@ class DraftValidator:
     def __init__(self, model: AIModel):
         self.model = model
     
-    async def validate(self, draft: str, email: Email, intent_prompt: Optional[str] = None) -> Tuple[bool, List[str]]:
-        """Validate draft quality"""
+    async def validate(self, draft: str, email: Email, intent_prompt: Optional[str] = None) -> Tuple[bool, List[str], int]:
+        """Validate draft quality; returns validity, issues and tokens used"""
         current_time = config.get_datetime_string()
         
         prompt = f"""Current Date & Time: {current_time}
@@ -243,8 +515,9 @@ Respond in JSON:
   "issues": ["list of issues found, empty if valid"]
 }}"""
         
+        tokens = 0
         try:
-            result, _ = await self.model.generate(
+            result, tokens = await self.model.generate(
                 prompt,
                 system_prompt="You are a validation AI. Always respond with valid JSON.",
                 temperature=0.2,
@@ -252,33 +525,61 @@ Respond in JSON:
             )
             
             data = json.loads(result)
-            return data.get('valid', False), data.get('issues', [])
+            return data.get('valid', False), data.get('issues', []), tokens
         except json.JSONDecodeError:
             logger.error(f"Failed to parse validation JSON: {result}")
-            return True, []  # Assume valid on parse error
+            return True, [], tokens  # Assume valid on parse error
         except Exception as e:
             logger.error(f"Validation error: {e}")
-            return True, []
+            return True, [], tokens
 
 class AIAgentServiceV2:
-    """Refactored AI Agent Service with dependency injection"""
+    """Refactored AI Agent Service with dependency injection
+    
+    The single AI pipeline engine: the worker and routes create one per
+    email (``for_database``) so ``tokens_used`` counts that email's usage.
+    """
     
     def __init__(self, repositories: Dict[str, GenericRepository]):
         self.repositories = repositories
         
-        # Initialize AI models
-        self.groq_model = GroqModel(config.GROQ_API_KEY, config.GROQ_DRAFT_MODEL)
+        # Initialize AI models (pooled HTTP client, LLM governor, response cache)
+        llm_cache = repositories['intents'].db.llm_cache
+        self.calendar_model = cached_groq_model(config.GROQ_CALENDAR_MODEL, llm_cache)
+        self.draft_model = cached_groq_model(config.GROQ_DRAFT_MODEL, llm_cache)
+        self.validation_model = cached_groq_model(config.GROQ_VALIDATION_MODEL, llm_cache)
         
         # Initialize components
         self.intent_classifier = IntentClassifier(repositories['intents'])
-        self.draft_generator = DraftGenerator(self.groq_model, repositories)
-        self.draft_validator = DraftValidator(self.groq_model)
+        self.meeting_detector = MeetingDetector(self.calendar_model)
+        self.draft_generator = DraftGenerator(self.draft_model, repositories)
+        self.draft_validator = DraftValidator(self.validation_model)
         
         self.tokens_used = 0
     
+    @classmethod
+    def for_database(cls, db: AsyncIOMotorDatabase) -> 'AIAgentServiceV2':
+        """Build a service on the repositories of ``db``"""
+        factory = RepositoryFactory(db)
+        return cls({
+            'intents': factory.get_intent_repository(),
+            'knowledge_base': factory.get_knowledge_base_repository(),
+            'email_accounts': factory.get_email_account_repository(),
+        })
+    
     async def classify_intent(self, email: Email, user_id: str) -> Tuple[Optional[str], float]:
         """Classify email intent"""
-        return await self.intent_classifier.classify_by_keywords(email, user_id)
+        try:
+            return await self.intent_classifier.classify_by_keywords(email, user_id)
+        except Exception as e:
+            logger.error(f"Error classifying intent: {e}")
+            return None, 0.0
+    
+    async def detect_meeting(self, email: Email) -> Tuple[bool, float, Optional[Dict]]:
+        """Detect meeting request"""
+        is_meeting, confidence, details, tokens = await self.meeting_detector.detect(email)
+        self.tokens_used += tokens
+        return is_meeting, confidence, details
     
     async def generate_draft(self, email: Email, user_id: str, intent_id: Optional[str] = None) -> Tuple[str, int]:
         """Generate email draft"""
@@ -286,15 +587,26 @@ class AIAgentServiceV2:
         self.tokens_used += tokens
         return draft, tokens
     
+    async def stream_draft(self, email: Email, user_id: str, intent_id: Optional[str] = None) -> AsyncIterator[str]:
+        """Generate email draft, yielding text as it arrives"""
+        async for text, tokens in self.draft_generator.stream(email, user_id, intent_id):
+            # Tokens are reported once, on the last chunk
+            self.tokens_used += tokens
+            if text:
+                yield text
+    
     async def validate_draft(self, draft: str, email: Email, intent_id: Optional[str] = None) -> Tuple[bool, List[str]]:
         """Validate draft"""
         intent_prompt = None
         if intent_id:
-            intent_doc = await self.repositories['intents'].find_by_id(intent_id)
+            snapshot = await user_config_cache.get(self.repositories['intents'].db, email.user_id)
+            intent_doc = snapshot.intents.get(intent_id)
             if intent_doc:
                 intent_prompt = intent_doc['prompt']
         
-        return await self.draft_validator.validate(draft, email, intent_prompt)
+        valid, issues, tokens = await self.draft_validator.validate(draft, email, intent_prompt)
+        self.tokens_used += tokens
+        return valid, issues
     
     def get_tokens_used(self) -> int:
         """Get total tokens used"""
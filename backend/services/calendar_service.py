@@ -2,13 +2,13 @@ from typing import List, Optional, Dict
 from motor.motor_asyncio import AsyncIOMotorDatabase
 from datetime import datetime, timezone, timedelta
 import logging
-from googleapiclient.discovery import build
 from google.oauth2.credentials import Credentials
 import httpx
 
 from config import config
 from models.calendar import CalendarProvider, CalendarEvent, CalendarEventCreate
 from services.oauth_service import OAuthService
+from utils.google_api import google_api_client, google_service_cache
 
 logger = logging.getLogger(__name__)
 
@@ -49,6 +49,9 @@ class CalendarService:
                     provider.access_token = new_tokens['access_token']
                     provider.token_expires_at = new_tokens['token_expires_at']
                     
+                    # Services built with the old token must not be reused
+                    google_service_cache.invalidate(provider.id)
+                    
                     logger.info(f"Token refreshed successfully for {provider.email}")
                 else:
                     logger.error(f"Failed to refresh token for {provider.email}")
@@ -73,7 +76,9 @@ class CalendarService:
                 client_secret=config.GOOGLE_CLIENT_SECRET
             )
             
-            service = build('calendar', 'v3', credentials=creds)
+            service = await google_service_cache.get_service(
+                provider.id, provider.token_expires_at, 'calendar', 'v3', creds
+            )
             
             event = {
                 'summary': event_data.get('title'),
@@ -96,7 +101,10 @@ class CalendarService:
                 },
             }
             
-            result = service.events().insert(calendarId='primary', body=event).execute()
+            result = await google_api_client.execute(
+                service.events().insert(calendarId='primary', body=event),
+                operation='calendar.insert'
+            )
             return result.get('id')
         except Exception as e:
             logger.error(f"Error creating Google Calendar event: {e}")
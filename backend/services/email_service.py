@@ -1,24 +1,34 @@
 import imaplib
-import smtplib
 import email
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
-from typing import List, Optional, Dict
+from typing import List, Optional, Dict, Tuple, Set, AsyncIterator, Iterator
 from motor.motor_asyncio import AsyncIOMotorDatabase
 from datetime import datetime, timezone
-import asyncio
 import logging
-from googleapiclient.discovery import build
+import re
+from googleapiclient.errors import HttpError
+from pymongo.errors import BulkWriteError
 from google.oauth2.credentials import Credentials
 import base64
 
 from config import config
+from exceptions import EmailAccountError
 from models.email import Email, EmailSend
 from models.email_account import EmailAccount
 from services.oauth_service import OAuthService
+from services.imap_session import imap_session_manager, stream_uid_fetch
+from services.smtp_pool import smtp_pool
+from utils.executors import imap_executor, smtp_executor
+from utils.google_api import google_api_client, google_service_cache, execute_request
 
 logger = logging.getLogger(__name__)
 
+# Labels excluded from polling (mirrors the -category/-is:sent search filters)
+GMAIL_EXCLUDED_LABELS = {'SENT', 'DRAFT', 'CATEGORY_PROMOTIONS', 'CATEGORY_SOCIAL', 'CATEGORY_FORUMS'}
+
+DUPLICATE_KEY_ERROR = 11000
+
 class EmailService:
     def __init__(self, db: AsyncIOMotorDatabase):
         self.db = db
@@ -56,6 +66,9 @@ class EmailService:
                     account.access_token = new_tokens['access_token']
                     account.token_expires_at = new_tokens['token_expires_at']
                     
+                    # Services built with the old token must not be reused
+                    google_service_cache.invalidate(account.id)
+                    
                     logger.info(f"Token refreshed successfully for {account.email}")
                 else:
                     logger.error(f"Failed to refresh token for {account.email}")
@@ -73,156 +86,433 @@ class EmailService:
         return None
     
     async def fetch_emails_oauth_gmail(self, account: EmailAccount) -> List[Dict]:
-        """Fetch emails using Gmail API (OAuth)"""
+        """Fetch emails using Gmail API (OAuth)
+        
+        Failures are raised so the poll is recorded as failed (error status
+        and backoff) rather than as a poll that found nothing.
+        """
         try:
-            # Ensure token is valid
-            account = await self.ensure_token_valid(account)
-            
-            creds = Credentials(
-                token=account.access_token,
-                refresh_token=account.refresh_token,
-                token_uri="https://oauth2.googleapis.com/token",
-                client_id=config.GOOGLE_CLIENT_ID,
-                client_secret=config.GOOGLE_CLIENT_SECRET
+            emails = []
+            async for batch in self.iter_emails_oauth_gmail(account):
+                emails.extend(batch)
+            return emails
+        except Exception as e:
+            logger.error(f"Error fetching Gmail OAuth emails: {e}")
+            raise
+    
+    async def iter_emails_oauth_gmail(self, account: EmailAccount) -> AsyncIterator[List[Dict]]:
+        """Stream new Gmail messages in parsed batches
+        
+        Uses the mailbox history cursor (``gmail_history_id``) when available so
+        an idle mailbox costs a single ``history.list`` call, and falls back to a
+        date-based search on first sync or when the cursor has expired.
+        Candidates are fetched through the batch endpoint in two passes:
+        ``format='metadata'`` to drop known and filtered messages, then
+        ``format='full'`` only for the survivors. The new cursor is set on
+        ``account.gmail_history_id`` once every message was retrieved, for the
+        caller to persist after the emails are stored.
+        """
+        # Ensure token is valid
+        account = await self.ensure_token_valid(account)
+        
+        creds = Credentials(
+            token=account.access_token,
+            refresh_token=account.refresh_token,
+            token_uri="https://oauth2.googleapis.com/token",
+            client_id=config.GOOGLE_CLIENT_ID,
+            client_secret=config.GOOGLE_CLIENT_SECRET
+        )
+        
+        service = await google_service_cache.get_service(
+            account.id, account.token_expires_at, 'gmail', 'v1', creds
+        )
+        
+        message_ids = None
+        history_id = None
+        if account.gmail_history_id:
+            message_ids, history_id = await google_api_client.run(
+                self._list_gmail_history, service, creds, account.gmail_history_id, operation='gmail.history'
             )
+        
+        if message_ids is None:
+            # Full sync: take the cursor before searching so mail arriving
+            # during the search is picked up by the next incremental sync
+            profile = await google_api_client.execute(
+                service.users().getProfile(userId='me'), operation='gmail.profile'
+            )
+            history_id = profile.get('historyId')
+            message_ids = await google_api_client.run(
+                self._search_gmail_messages, service, creds, account, operation='gmail.search'
+            )
+        
+        complete = True
+        batch_size = config.GMAIL_BATCH_SIZE
+        
+        for start in range(0, len(message_ids), batch_size):
+            chunk = message_ids[start:start + batch_size]
             
-            service = build('gmail', 'v1', credentials=creds)
-            
-            # Build query to only fetch emails received after account was connected
-            from dateutil import parser
-            created_at = parser.isoparse(account.created_at)
-            
-            # Use last_sync if available, otherwise use created_at
-            if account.last_sync:
-                after_date = parser.isoparse(account.last_sync)
-            else:
-                after_date = created_at
-            
-            # Format date for Gmail query (YYYY/MM/DD)
-            date_query = after_date.strftime('%Y/%m/%d')
+            # Pass 1: metadata only, to filter before pulling bodies
+            metadata, failed = await google_api_client.run(
+                self._batch_get_gmail_messages, service, creds, chunk, 'metadata',
+                metadata_headers=['From', 'To', 'Subject', 'Date'], operation='gmail.batch_metadata'
+            )
+            complete = complete and not failed
             
-            # Fetch unread messages received after the specified date
-            query = f'is:unread after:{date_query} -category:promotions -category:social -category:forums -is:sent'
+            candidates = [
+                msg_id for msg_id, message in metadata.items()
+                if not set(message.get('labelIds', [])) & GMAIL_EXCLUDED_LABELS
+            ]
+            known = await self.find_existing_message_ids(account.id, candidates)
+            candidates = [msg_id for msg_id in candidates if msg_id not in known]
             
-            results = service.users().messages().list(
-                userId='me',
-                q=query,
-                maxResults=50
-            ).execute()
+            if not candidates:
+                continue
             
-            messages = results.get('messages', [])
-            emails = []
+            # Pass 2: full bodies for new messages only
+            messages, failed = await google_api_client.run(
+                self._batch_get_gmail_messages, service, creds, candidates, 'full', operation='gmail.batch_full'
+            )
+            complete = complete and not failed
             
-            for msg in messages:
-                message = service.users().messages().get(
-                    userId='me',
-                    id=msg['id'],
-                    format='full'
-                ).execute()
+            yield [self._parse_gmail_message(messages[msg_id]) for msg_id in candidates if msg_id in messages]
+        
+        # Only advance the cursor when nothing was skipped, otherwise failed
+        # messages would never be seen again
+        if history_id and complete:
+            account.gmail_history_id = str(history_id)
+    
+    def _batch_get_gmail_messages(self, service, creds: Credentials, message_ids: List[str], fmt: str, metadata_headers: List[str] = None) -> Tuple[Dict[str, Dict], List[str]]:
+        """Fetch messages with a single Gmail batch request
+        
+        Returns ``(messages by id, failed ids)``. Messages deleted since they
+        were listed (404) are left out of both: retrying them can never
+        succeed, so they must not hold back the history cursor.
+        """
+        messages = {}
+        failed = []
+        
+        def on_response(request_id, response, exception):
+            if exception is None:
+                messages[request_id] = response
+            elif isinstance(exception, HttpError) and exception.resp.status == 404:
+                logger.info(f"Gmail message {request_id} was deleted before it could be fetched")
+            else:
+                logger.warning(f"Gmail batch get failed for message {request_id}: {exception}")
+                failed.append(request_id)
+        
+        batch = service.new_batch_http_request(callback=on_response)
+        for msg_id in message_ids:
+            params = {'userId': 'me', 'id': msg_id, 'format': fmt}
+            if metadata_headers:
+                params['metadataHeaders'] = metadata_headers
+            batch.add(service.users().messages().get(**params), request_id=msg_id)
+        execute_request(batch, creds)
+        
+        return messages, failed
+    
+    @staticmethod
+    def _parse_gmail_message(message: Dict) -> Dict:
+        """Convert a Gmail API message (format='full') to the internal email dict"""
+        headers = {h['name']: h['value'] for h in message['payload']['headers']}
+        
+        # Get body
+        body = ''
+        if 'parts' in message['payload']:
+            for part in message['payload']['parts']:
+                if part['mimeType'] == 'text/plain':
+                    body = base64.urlsafe_b64decode(part['body']['data']).decode('utf-8')
+                    break
+        elif 'body' in message['payload']:
+            body = base64.urlsafe_b64decode(message['payload']['body']['data']).decode('utf-8')
+        
+        return {
+            'message_id': message['id'],
+            'from': headers.get('From', ''),
+            'to': headers.get('To', '').split(','),
+            'subject': headers.get('Subject', ''),
+            'body': body,
+            'received_at': headers.get('Date', '')
+        }
+    
+    async def find_existing_message_ids(self, account_id: str, message_ids: List[str]) -> Set[str]:
+        """Return the subset of provider message IDs already stored for the account"""
+        if not message_ids:
+            return set()
+        
+        docs = await self.db.emails.find(
+            {"email_account_id": account_id, "message_id": {"$in": message_ids}},
+            {"_id": 0, "message_id": 1}
+        ).to_list(len(message_ids))
+        
+        return {doc['message_id'] for doc in docs}
+    
+    def _search_gmail_messages(self, service, creds: Credentials, account: EmailAccount) -> List[str]:
+        """Date-based search used for the first sync or when the history cursor expired"""
+        from dateutil import parser
+        created_at = parser.isoparse(account.created_at)
+        
+        # Use last_sync if available, otherwise use created_at
+        if account.last_sync:
+            after_date = parser.isoparse(account.last_sync)
+        else:
+            after_date = created_at
+        
+        # Format date for Gmail query (YYYY/MM/DD)
+        date_query = after_date.strftime('%Y/%m/%d')
+        
+        # Fetch unread messages received after the specified date
+        query = f'is:unread after:{date_query} -category:promotions -category:social -category:forums -is:sent'
+        
+        results = execute_request(service.users().messages().list(
+            userId='me',
+            q=query,
+            maxResults=50
+        ), creds)
+        
+        return [msg['id'] for msg in results.get('messages', [])]
+    
+    def _list_gmail_history(self, service, creds: Credentials, start_history_id: str) -> Tuple[Optional[List[str]], Optional[str]]:
+        """List inbox messages added since ``start_history_id``
+        
+        Returns ``(message_ids, latest_history_id)``, or ``(None, None)`` when
+        Gmail no longer has history that far back and a full sync is required.
+        """
+        message_ids = []
+        seen = set()
+        latest_history_id = start_history_id
+        page_token = None
+        
+        try:
+            while True:
+                params = {
+                    'userId': 'me',
+                    'startHistoryId': start_history_id,
+                    'historyTypes': ['messageAdded'],
+                    'labelId': 'INBOX',
+                    'maxResults': 500
+                }
+                if page_token:
+                    params['pageToken'] = page_token
                 
-                # Parse email
-                headers = {h['name']: h['value'] for h in message['payload']['headers']}
+                response = execute_request(service.users().history().list(**params), creds)
+                latest_history_id = response.get('historyId', latest_history_id)
                 
-                # Get body
-                body = ''
-                if 'parts' in message['payload']:
-                    for part in message['payload']['parts']:
-                        if part['mimeType'] == 'text/plain':
-                            body = base64.urlsafe_b64decode(part['body']['data']).decode('utf-8')
-                            break
-                elif 'body' in message['payload']:
-                    body = base64.urlsafe_b64decode(message['payload']['body']['data']).decode('utf-8')
+                for record in response.get('history', []):
+                    for added in record.get('messagesAdded', []):
+                        message = added.get('message', {})
+                        msg_id = message.get('id')
+                        if not msg_id or msg_id in seen:
+                            continue
+                        seen.add(msg_id)
+                        
+                        # Same filter as the date-based search query
+                        labels = set(message.get('labelIds', []))
+                        if 'UNREAD' not in labels or labels & GMAIL_EXCLUDED_LABELS:
+                            continue
+                        message_ids.append(msg_id)
                 
-                emails.append({
-                    'message_id': message['id'],
-                    'from': headers.get('From', ''),
-                    'to': headers.get('To', '').split(','),
-                    'subject': headers.get('Subject', ''),
-                    'body': body,
-                    'received_at': headers.get('Date', '')
-                })
-            
-            return emails
-        except Exception as e:
-            logger.error(f"Error fetching Gmail OAuth emails: {e}")
-            return []
+                page_token = response.get('nextPageToken')
+                if not page_token:
+                    break
+        except HttpError as e:
+            if e.resp.status == 404:
+                logger.info(f"Gmail history {start_history_id} expired, falling back to full sync")
+                return None, None
+            raise
+        
+        return message_ids, latest_history_id
     
     async def fetch_emails_imap(self, account: EmailAccount) -> List[Dict]:
-        """Fetch emails using IMAP"""
+        """Fetch emails using IMAP (failures are raised, as for Gmail)"""
         try:
-            # Run IMAP in thread pool since it's blocking
-            loop = asyncio.get_event_loop()
-            emails = await loop.run_in_executor(
-                None,
-                self._fetch_imap_sync,
-                account
-            )
+            # Mail stored before UID tracking is keyed differently (by sequence
+            # number), so searching it again would ingest it twice
+            seed_high_water = account.imap_last_uid is None and await self.db.emails.find_one(
+                {"email_account_id": account.id}, {"_id": 1}
+            ) is not None
+            
+            # Run IMAP in its dedicated thread pool since it's blocking
+            emails = await imap_executor.run(self._fetch_imap_sync, account, seed_high_water, operation='fetch')
             return emails
         except Exception as e:
             logger.error(f"Error fetching IMAP emails: {e}")
-            return []
+            raise
     
-    def _fetch_imap_sync(self, account: EmailAccount) -> List[Dict]:
-        """Synchronous IMAP fetch"""
-        try:
-            from dateutil import parser
-            
-            mail = imaplib.IMAP4_SSL(account.imap_host, account.imap_port)
-            mail.login(account.email, account.password)
-            mail.select('inbox')
-            
-            # Determine the date to search from
-            if account.last_sync:
-                after_date = parser.isoparse(account.last_sync)
-            else:
-                after_date = parser.isoparse(account.created_at)
-            
-            # Format date for IMAP SINCE query (DD-MMM-YYYY)
-            date_str = after_date.strftime('%d-%b-%Y')
-            
-            # Search for unread emails received after the specified date
-            status, messages = mail.search(None, f'(UNSEEN SINCE {date_str})')
-            email_ids = messages[0].split()
-            
-            emails = []
-            for email_id in email_ids[-50:]:  # Last 50 unread
-                status, msg_data = mail.fetch(email_id, '(RFC822)')
+    def _fetch_imap_sync(self, account: EmailAccount, seed_high_water: bool = False) -> List[Dict]:
+        """Synchronous IMAP fetch over the account's persistent session
+        
+        Fetches by UID above the stored high-water mark (``imap_last_uid``),
+        falling back to an ``UNSEEN SINCE`` search on first sync or when the
+        mailbox UIDVALIDITY changed. With ``seed_high_water`` (an account that
+        already has mail stored from before UID tracking) the first sync only
+        records UIDNEXT as the high-water mark and fetches nothing. All
+        messages come from a single ``UID FETCH ... BODY.PEEK[]`` whose
+        responses are parsed as they stream in, so polling never marks mail as
+        read. The new UIDVALIDITY/high-water are
+        set on the account for the caller to persist once emails are stored.
+        """
+        session = imap_session_manager.get(account)
+        
+        with session.lock:
+            try:
+                mail = session.connection()
                 
-                for response_part in msg_data:
-                    if isinstance(response_part, tuple):
-                        msg = email.message_from_bytes(response_part[1])
-                        
-                        subject = msg['subject']
-                        from_email = msg['from']
-                        to_email = msg['to']
-                        date = msg['date']
-                        
-                        # Get body
-                        body = ''
-                        if msg.is_multipart():
-                            for part in msg.walk():
-                                if part.get_content_type() == 'text/plain':
-                                    body = part.get_payload(decode=True).decode('utf-8', errors='ignore')
-                                    break
-                        else:
-                            body = msg.get_payload(decode=True).decode('utf-8', errors='ignore')
-                        
-                        emails.append({
-                            'message_id': str(email_id),
-                            'from': from_email,
-                            'to': [to_email] if to_email else [],
-                            'subject': subject or '',
-                            'body': body,
-                            'received_at': date or ''
-                        })
-            
-            mail.close()
-            mail.logout()
+                status, data = mail.status('INBOX', '(UIDVALIDITY UIDNEXT)')
+                uidvalidity, uidnext = self._parse_imap_status(data[0])
+                
+                if account.imap_last_uid is None and seed_high_water:
+                    uids = []
+                    high_water = uidnext - 1
+                    logger.info(f"Starting UID sync for {account.email} at UID {high_water}")
+                elif account.imap_uidvalidity != uidvalidity or account.imap_last_uid is None:
+                    uids = self._search_imap_unseen(mail, account)
+                    high_water = uidnext - 1
+                else:
+                    uids, high_water = self._new_imap_uids(mail, account.imap_last_uid, uidnext)
+                
+                emails = []
+                if uids:
+                    wanted = set(uids)
+                    message_set = self._compress_uid_set(uids)
+                    
+                    # Cap the bytes pulled per message so large attachments are
+                    # never loaded just to read the text/plain part
+                    body_item = 'BODY.PEEK[]'
+                    if config.IMAP_MAX_BODY_BYTES:
+                        body_item += f'<0.{config.IMAP_MAX_BODY_BYTES}>'
+                    
+                    try:
+                        for msg_data in stream_uid_fetch(mail, message_set, f'(UID FLAGS {body_item})'):
+                            for uid, flags, raw in self._iter_imap_fetch_response(msg_data):
+                                # Mail already read elsewhere is skipped, as with the UNSEEN search
+                                if uid not in wanted or b'\\Seen' in flags:
+                                    continue
+                                emails.append(self._parse_imap_message(raw, uidvalidity, uid))
+                    except Exception:
+                        # The response may be partially unread; never reuse the connection
+                        session.reset()
+                        raise
+                
+                account.imap_uidvalidity = uidvalidity
+                account.imap_last_uid = high_water
+                
+                return emails
+            except (imaplib.IMAP4.abort, OSError):
+                # Connection-level failure: reconnect on the next poll
+                session.reset()
+                raise
+    
+    @staticmethod
+    def _parse_imap_status(line: bytes) -> Tuple[int, int]:
+        """Extract UIDVALIDITY and UIDNEXT from a STATUS response line"""
+        uidvalidity = re.search(rb'UIDVALIDITY (\d+)', line)
+        uidnext = re.search(rb'UIDNEXT (\d+)', line)
+        if not uidvalidity or not uidnext:
+            raise EmailAccountError(f"Unexpected IMAP STATUS response: {line!r}")
+        return int(uidvalidity.group(1)), int(uidnext.group(1))
+    
+    def _search_imap_unseen(self, mail, account: EmailAccount) -> List[int]:
+        """UIDs of unread mail since the last sync (first sync or UIDVALIDITY reset)"""
+        from dateutil import parser
+        
+        # Determine the date to search from
+        if account.last_sync:
+            after_date = parser.isoparse(account.last_sync)
+        else:
+            after_date = parser.isoparse(account.created_at)
+        
+        # Format date for IMAP SINCE query (DD-MMM-YYYY)
+        date_str = after_date.strftime('%d-%b-%Y')
+        
+        status, data = mail.uid('search', None, f'(UNSEEN SINCE {date_str})')
+        uids = [int(uid) for uid in data[0].split()]
+        return uids[-config.IMAP_FETCH_BATCH_SIZE:]  # Last N unread
+    
+    def _new_imap_uids(self, mail, last_uid: int, uidnext: int) -> Tuple[List[int], int]:
+        """UIDs above the high-water mark, capped per poll
+        
+        Returns ``(uids, new_high_water)``. When more than a batch arrived,
+        the high-water only advances past the UIDs actually returned.
+        """
+        if uidnext - 1 <= last_uid:
+            return [], last_uid
+        
+        # "n:*" always matches the highest UID, so filter explicitly
+        status, data = mail.uid('search', None, f'UID {last_uid + 1}:*')
+        uids = sorted(uid for uid in (int(u) for u in data[0].split()) if uid > last_uid)
+        
+        if len(uids) > config.IMAP_FETCH_BATCH_SIZE:
+            uids = uids[:config.IMAP_FETCH_BATCH_SIZE]
+            return uids, uids[-1]
+        return uids, max(uidnext - 1, uids[-1] if uids else last_uid)
+    
+    @staticmethod
+    def _compress_uid_set(uids: List[int]) -> str:
+        """Render sorted UIDs as an IMAP message set with ranges (1,2,3,7 -> 1:3,7)"""
+        ranges = []
+        start = prev = None
+        for uid in sorted(uids):
+            if prev is not None and uid == prev + 1:
+                prev = uid
+                continue
+            if start is not None:
+                ranges.append(f"{start}:{prev}" if start != prev else str(start))
+            start = prev = uid
+        if start is not None:
+            ranges.append(f"{start}:{prev}" if start != prev else str(start))
+        return ','.join(ranges)
+    
+    @staticmethod
+    def _iter_imap_fetch_response(msg_data: List) -> Iterator[Tuple[int, bytes, bytes]]:
+        """Yield ``(uid, flags, raw_message)`` from an imaplib FETCH response
+        
+        Servers may send FLAGS before or after the message literal, so the
+        trailing fragment is inspected as well.
+        """
+        for i, part in enumerate(msg_data):
+            if not isinstance(part, tuple):
+                continue
+            meta = part[0]
+            if i + 1 < len(msg_data) and isinstance(msg_data[i + 1], bytes):
+                meta += msg_data[i + 1]
             
-            return emails
-        except Exception as e:
-            logger.error(f"IMAP sync error: {e}")
-            return []
+            uid = re.search(rb'UID (\d+)', meta)
+            flags = re.search(rb'FLAGS \(([^)]*)\)', meta)
+            if not uid:
+                continue
+            yield int(uid.group(1)), flags.group(1) if flags else b'', part[1]
+    
+    @staticmethod
+    def _parse_imap_message(raw: bytes, uidvalidity: int, uid: int) -> Dict:
+        """Convert a raw RFC822 message to the internal email dict"""
+        msg = email.message_from_bytes(raw)
+        
+        subject = msg['subject']
+        from_email = msg['from']
+        to_email = msg['to']
+        date = msg['date']
+        
+        # Get body
+        body = ''
+        if msg.is_multipart():
+            for part in msg.walk():
+                if part.get_content_type() == 'text/plain':
+                    body = part.get_payload(decode=True).decode('utf-8', errors='ignore')
+                    break
+        else:
+            body = msg.get_payload(decode=True).decode('utf-8', errors='ignore')
+        
+        # Message-ID survives UIDVALIDITY resets; the UID key is the fallback
+        message_id = (msg['message-id'] or '').strip() or f"uid:{uidvalidity}:{uid}"
+        
+        return {
+            'message_id': message_id,
+            'from': from_email,
+            'to': [to_email] if to_email else [],
+            'subject': subject or '',
+            'body': body,
+            'received_at': date or ''
+        }
     
     async def send_email_oauth_gmail(self, account: EmailAccount, email_data: EmailSend) -> bool:
         """Send email using Gmail API"""
@@ -238,7 +528,9 @@ class EmailService:
                 client_secret=config.GOOGLE_CLIENT_SECRET
             )
             
-            service = build('gmail', 'v1', credentials=creds)
+            service = await google_service_cache.get_service(
+                account.id, account.token_expires_at, 'gmail', 'v1', creds
+            )
             
             message = MIMEMultipart()
             message['to'] = ', '.join(email_data.to_email)
@@ -251,10 +543,10 @@ class EmailService:
             
             raw_message = base64.urlsafe_b64encode(message.as_bytes()).decode('utf-8')
             
-            service.users().messages().send(
-                userId='me',
-                body={'raw': raw_message}
-            ).execute()
+            await google_api_client.execute(
+                service.users().messages().send(userId='me', body={'raw': raw_message}),
+                operation='gmail.send'
+            )
             
             return True
         except Exception as e:
@@ -264,20 +556,14 @@ class EmailService:
     async def send_email_smtp(self, account: EmailAccount, email_data: EmailSend) -> bool:
         """Send email using SMTP"""
         try:
-            loop = asyncio.get_event_loop()
-            result = await loop.run_in_executor(
-                None,
-                self._send_smtp_sync,
-                account,
-                email_data
-            )
+            result = await smtp_executor.run(self._send_smtp_sync, account, email_data, operation='send')
             return result
         except Exception as e:
             logger.error(f"Error sending SMTP email: {e}")
             return False
     
     def _send_smtp_sync(self, account: EmailAccount, email_data: EmailSend) -> bool:
-        """Synchronous SMTP send"""
+        """Synchronous SMTP send over a pooled connection"""
         try:
             message = MIMEMultipart()
             message['From'] = account.email
@@ -289,21 +575,18 @@ class EmailService:
             
             message.attach(MIMEText(email_data.body, 'plain'))
             
-            server = smtplib.SMTP_SSL(account.smtp_host, account.smtp_port)
-            server.login(account.email, account.password)
-            
             recipients = email_data.to_email + (email_data.cc or []) + (email_data.bcc or [])
-            server.sendmail(account.email, recipients, message.as_string())
+            smtp_pool.send(account, recipients, message.as_string())
             
-            server.quit()
             return True
         except Exception as e:
             logger.error(f"SMTP sync error: {e}")
             return False
     
-    async def save_email(self, user_id: str, account_id: str, email_data: Dict) -> Email:
-        """Save email to database"""
-        email_obj = Email(
+    @staticmethod
+    def _build_email(user_id: str, account_id: str, email_data: Dict) -> Email:
+        """Build an inbound Email from fetched message data"""
+        return Email(
             user_id=user_id,
             email_account_id=account_id,
             message_id=email_data['message_id'],
@@ -314,8 +597,73 @@ class EmailService:
             received_at=email_data.get('received_at', datetime.now(timezone.utc).isoformat()),
             direction='inbound'
         )
+    
+    async def save_email(self, user_id: str, account_id: str, email_data: Dict) -> Email:
+        """Save email to database"""
+        email_obj = self._build_email(user_id, account_id, email_data)
         
         doc = email_obj.model_dump()
         await self.db.emails.insert_one(doc)
         
         return email_obj
+    
+    async def save_new_emails(self, user_id: str, account_id: str, emails: List[Dict]) -> List[Email]:
+        """Save fetched emails not yet stored for the account, in one bulk write
+        
+        Duplicates are filtered with a single ``$in`` query and the rest are
+        written with an unordered ``insert_many``. Duplicate-key errors from
+        a concurrent poller (unique ``email_account_id`` + ``message_id``
+        index) are ignored, so ingest is idempotent. Returns the emails
+        actually inserted.
+        """
+        candidates = {}
+        for email_data in emails:
+            candidates.setdefault(email_data['message_id'], email_data)
+        
+        existing = await self.find_existing_message_ids(account_id, list(candidates))
+        new_emails = [
+            self._build_email(user_id, account_id, email_data)
+            for message_id, email_data in candidates.items()
+            if message_id not in existing
+        ]
+        if not new_emails:
+            return []
+        
+        try:
+            await self.db.emails.insert_many([e.model_dump() for e in new_emails], ordered=False)
+        except BulkWriteError as e:
+            errors = e.details.get('writeErrors', [])
+            if any(error.get('code') != DUPLICATE_KEY_ERROR for error in errors):
+                raise
+            duplicates = {error['index'] for error in errors}
+            logger.info(f"Skipped {len(duplicates)} emails already stored by another poller")
+            new_emails = [e for i, e in enumerate(new_emails) if i not in duplicates]
+        
+        return new_emails
+    
+    @staticmethod
+    def draft_result(intent_id: Optional[str], intent_confidence: float, draft: str, valid: bool, issues: List[str], tokens: int) -> Dict:
+        """Email fields recorded for a generated and validated draft"""
+        return {
+            "intent_detected": intent_id,
+            "intent_confidence": intent_confidence,
+            "draft_generated": True,
+            "draft_content": draft,
+            "tokens_used": tokens,
+            "draft_validated": valid,
+            "validation_issues": issues,
+            "status": 'draft_ready' if valid else 'escalated'
+        }
+    
+    async def save_draft_result(self, email: Email, update_data: Dict):
+        """Store a draft result (see ``draft_result``) on the email and bill its tokens to the user"""
+        update_data["updated_at"] = datetime.now(timezone.utc).isoformat()
+        await self.db.emails.update_one({"id": email.id}, {"$set": update_data})
+        
+        # Track tokens for user
+        tokens = update_data.get("tokens_used", 0)
+        if tokens > 0:
+            await self.db.users.update_one(
+                {"id": email.user_id},
+                {"$inc": {"tokens_used": tokens}}
+            )
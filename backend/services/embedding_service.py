@@ -0,0 +1,233 @@
+"""Knowledge base embeddings and vector retrieval"""
+from abc import ABC, abstractmethod
+from typing import Dict, List, Optional, Tuple
+from motor.motor_asyncio import AsyncIOMotorDatabase
+import numpy as np
+import asyncio
+import hashlib
+import importlib.util
+import logging
+
+from config import config
+from utils.cache import cache_service
+from utils.executors import embedding_executor
+from utils.http_client import http_client_pool
+from utils.metrics import metrics
+from exceptions import ExternalServiceError, RateLimitError
+
+logger = logging.getLogger(__name__)
+
+# What a text is embedded for (asymmetric models embed queries and documents differently)
+INPUT_DOCUMENT = 'search_document'
+INPUT_QUERY = 'search_query'
+
+class EmbeddingProvider(ABC):
+    """Turns texts into embedding vectors"""
+    
+    # Identifies the vector space; stored with each embedding
+    model: str
+    
+    @abstractmethod
+    async def embed(self, texts: List[str], input_type: str) -> List[List[float]]:
+        """Embed texts (at most EMBEDDING_BATCH_SIZE per call)"""
+        pass
+
+class CohereEmbeddingProvider(EmbeddingProvider):
+    """Cohere embed API on the pooled HTTP client"""
+    
+    def __init__(self, api_key: str, model: str):
+        self.api_key = api_key
+        self.model = model
+        self.base_url = 'https://api.cohere.com/v2/embed'
+    
+    async def embed(self, texts: List[str], input_type: str) -> List[List[float]]:
+        try:
+            client = await http_client_pool.get_client()
+            
+            with metrics.timer('embedding.request'):
+                response = await client.post(
+                    self.base_url,
+                    headers={
+                        'Authorization': f'Bearer {self.api_key}',
+                        'Content-Type': 'application/json'
+                    },
+                    json={
+                        'model': self.model,
+                        'texts': texts,
+                        'input_type': input_type,
+                        'embedding_types': ['float'],
+                        'truncate': 'END'
+                    }
+                )
+            
+            if response.status_code == 429:
+                raise RateLimitError('Cohere', f"API error: {response.status_code}")
+            if response.status_code != 200:
+                raise ExternalServiceError('Cohere', f"API error: {response.status_code}")
+            
+            return response.json()['embeddings']['float']
+        except ExternalServiceError:
+            raise
+        except Exception as e:
+            logger.error(f"Cohere API error: {e}")
+            raise ExternalServiceError('Cohere', str(e))
+
+class LocalEmbeddingProvider(EmbeddingProvider):
+    """sentence-transformers model run in-process (optional dependency, not in requirements.txt)"""
+    
+    def __init__(self, model_name: str):
+        self.model_name = model_name
+        self.model = f"local:{model_name}"
+        self._encoder = None
+        self._loading = asyncio.Lock()
+    
+    async def _get_encoder(self):
+        async with self._loading:
+            if self._encoder is None:
+                from sentence_transformers import SentenceTransformer
+                self._encoder = await embedding_executor.run(SentenceTransformer, self.model_name, operation='load')
+                logger.info(f"Local embedding model {self.model_name} loaded")
+        return self._encoder
+    
+    async def embed(self, texts: List[str], input_type: str) -> List[List[float]]:
+        encoder = await self._get_encoder()
+        vectors = await embedding_executor.run(encoder.encode, texts, operation='encode')
+        return vectors.tolist()
+
+def create_embedding_provider() -> Optional[EmbeddingProvider]:
+    """Provider selected by EMBEDDING_PROVIDER (None disables retrieval)"""
+    if config.EMBEDDING_PROVIDER == 'local':
+        # Fail at startup rather than on the first knowledge base write
+        if importlib.util.find_spec('sentence_transformers') is None:
+            raise RuntimeError("EMBEDDING_PROVIDER=local requires sentence-transformers (pip install sentence-transformers)")
+        return LocalEmbeddingProvider(config.LOCAL_EMBEDDING_MODEL)
+    if config.EMBEDDING_PROVIDER == 'cohere' and config.COHERE_API_KEY:
+        return CohereEmbeddingProvider(config.COHERE_API_KEY, config.COHERE_EMBEDDING_MODEL)
+    return None
+
+class KnowledgeIndex:
+    """In-memory cosine similarity index over one user's knowledge base chunks
+    
+    Chunks without an embedding from the current model are counted as
+    ``pending`` and left out of searches until they are embedded.
+    """
+    
+    def __init__(self, chunk_docs: List[Dict], model: Optional[str]):
+        self.docs: List[Dict] = []
+        self.pending = 0
+        vectors = []
+        
+        for doc in chunk_docs:
+            # Vectors live in the matrix only, not in the snapshot's documents
+            embedding = doc.pop('embedding', None)
+            if embedding and model and doc.get('embedding_model') == model and (not vectors or len(embedding) == len(vectors[0])):
+                self.docs.append(doc)
+                vectors.append(embedding)
+            else:
+                self.pending += 1
+        
+        self.matrix: Optional[np.ndarray] = None
+        if vectors:
+            matrix = np.asarray(vectors, dtype=np.float32)
+            norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+            norms[norms == 0] = 1.0
+            self.matrix = matrix / norms
+    
+    @property
+    def size(self) -> int:
+        return len(self.docs)
+    
+    def search(self, query: List[float], k: int, min_score: float = -1.0) -> List[Tuple[Dict, float]]:
+        """Top ``k`` chunks by cosine similarity to ``query``, best first"""
+        if self.matrix is None or k <= 0:
+            return []
+        
+        vector = np.asarray(query, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        if vector.shape != (self.matrix.shape[1],) or not norm:
+            return []
+        
+        scores = self.matrix @ (vector / norm)
+        if k < len(scores):
+            top = np.argpartition(-scores, k - 1)[:k]
+        else:
+            top = np.arange(len(scores))
+        top = top[np.argsort(-scores[top])]
+        
+        return [(self.docs[i], float(scores[i])) for i in top if scores[i] >= min_score]
+
+class KnowledgeEmbedder:
+    """Computes and stores knowledge base chunk embeddings, and embeds retrieval queries"""
+    
+    def __init__(self, provider: Optional[EmbeddingProvider], batch_size: int):
+        self.provider = provider
+        self.batch_size = batch_size
+    
+    @property
+    def enabled(self) -> bool:
+        return self.provider is not None
+    
+    @property
+    def model(self) -> Optional[str]:
+        return self.provider.model if self.provider else None
+    
+    @staticmethod
+    def document_text(doc: Dict) -> str:
+        return f"{doc['title']}\n{doc['content']}"
+    
+    async def embed_pending(self, db: AsyncIOMotorDatabase, user_id: str) -> int:
+        """Embed a user's chunks that lack a current embedding; returns how many were stored
+        
+        Errors are logged, not raised: chunks left unembedded are picked up
+        by the next call.
+        """
+        if not self.enabled:
+            return 0
+        
+        docs = await db.knowledge_base_chunks.find(
+            {"user_id": user_id, "embedding_model": {"$ne": self.model}},
+            {"_id": 0, "id": 1, "title": 1, "content": 1}
+        ).to_list(config.USER_CONFIG_MAX_KB_CHUNKS)
+        
+        stored = 0
+        for start in range(0, len(docs), self.batch_size):
+            batch = docs[start:start + self.batch_size]
+            try:
+                vectors = await self.provider.embed([self.document_text(doc) for doc in batch], INPUT_DOCUMENT)
+            except Exception as e:
+                logger.error(f"Error embedding knowledge base for user {user_id}: {e}")
+                break
+            
+            # Chunk IDs change with their text, so a vector never lands on edited text
+            results = await asyncio.gather(*[
+                db.knowledge_base_chunks.update_one(
+                    {"id": doc['id']},
+                    {"$set": {"embedding": vector, "embedding_model": self.model}}
+                )
+                for doc, vector in zip(batch, vectors)
+            ])
+            stored += sum(result.modified_count for result in results)
+        
+        metrics.increment('embedding.documents', stored)
+        return stored
+    
+    async def embed_query(self, text: str) -> Optional[List[float]]:
+        """Embedding of a retrieval query (cached), None if the provider failed"""
+        if not self.enabled:
+            return None
+        
+        key = f"embedding:{self.model}:{hashlib.sha256(text.encode()).hexdigest()}"
+        
+        async def load():
+            vectors = await self.provider.embed([text], INPUT_QUERY)
+            return vectors[0]
+        
+        try:
+            return await cache_service.get_or_load(key, load, config.EMBEDDING_QUERY_CACHE_TTL)
+        except Exception as e:
+            logger.error(f"Error embedding retrieval query: {e}")
+            metrics.increment('embedding.query_errors')
+            return None
+
+# Global knowledge base embedder
+knowledge_embedder = KnowledgeEmbedder(create_embedding_provider(), config.EMBEDDING_BATCH_SIZE)
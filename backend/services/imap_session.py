@@ -0,0 +1,318 @@
+"""Persistent IMAP sessions with health checks, reconnect backoff and IDLE push"""
+from typing import Awaitable, Callable, Dict, Iterator, List, Optional
+import imaplib
+import threading
+import asyncio
+import random
+import select
+import time
+import logging
+
+from config import config
+from exceptions import EmailAccountError
+from models.email_account import EmailAccount
+from utils.executors import BlockingExecutor
+from utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+class IMAPSession:
+    """Long-lived IMAP connection for one email account
+    
+    Not thread-safe: callers hold ``lock`` for the whole exchange and run it
+    from a worker thread, never on the event loop.
+    """
+    
+    def __init__(self, host: str, port: int, username: str, password: str):
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.lock = threading.Lock()
+        self.last_used = time.monotonic()
+        self._conn: Optional[imaplib.IMAP4_SSL] = None
+        self._failures = 0
+        self._retry_at = 0.0
+    
+    def matches(self, host: str, port: int, username: str, password: str) -> bool:
+        """Check whether the session was opened with these settings"""
+        return (self.host, self.port, self.username, self.password) == (host, port, username, password)
+    
+    def connection(self) -> imaplib.IMAP4_SSL:
+        """Get an authenticated connection with INBOX selected, reconnecting if needed"""
+        self.last_used = time.monotonic()
+        
+        if self._conn is not None:
+            try:
+                # Health check; also makes the server report new messages
+                self._conn.noop()
+                return self._conn
+            except (imaplib.IMAP4.error, OSError) as e:
+                logger.info(f"IMAP session for {self.username} is stale, reconnecting: {e}")
+                self.reset()
+        
+        now = time.monotonic()
+        if now < self._retry_at:
+            raise EmailAccountError(
+                f"IMAP reconnect to {self.host} backing off for {self._retry_at - now:.0f}s"
+            )
+        
+        try:
+            conn = imaplib.IMAP4_SSL(self.host, self.port, timeout=config.IMAP_TIMEOUT)
+            conn.login(self.username, self.password)
+            conn.select('inbox')
+        except Exception:
+            self._failures += 1
+            delay = min(
+                config.IMAP_RECONNECT_MAX_DELAY,
+                config.IMAP_RECONNECT_BASE_DELAY * 2 ** (self._failures - 1)
+            )
+            self._retry_at = now + delay * random.uniform(0.8, 1.2)
+            metrics.increment('imap.connect_failures')
+            raise
+        
+        metrics.increment('imap.connects')
+        self._failures = 0
+        self._retry_at = 0.0
+        self._conn = conn
+        return conn
+    
+    def idle(self, timeout: float) -> bool:
+        """Wait in IMAP IDLE until new mail arrives or ``timeout`` seconds pass
+        
+        Returns True when the server reported new messages.
+        """
+        conn = self.connection()
+        if 'IDLE' not in conn.capabilities:
+            raise EmailAccountError(f"IMAP server {self.host} does not support IDLE")
+        
+        tag = conn._new_tag()
+        conn.tagged_commands.pop(tag, None)
+        
+        try:
+            conn.send(tag + b' IDLE\r\n')
+            response = conn.readline()
+            if not response.startswith(b'+'):
+                raise imaplib.IMAP4.abort(f"IDLE rejected: {response!r}")
+            
+            new_mail = False
+            deadline = time.monotonic() + timeout
+            while not new_mail:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                # select() rather than socket timeouts, which leave the
+                # buffered reader unusable
+                if not conn.sock.pending():
+                    readable, _, _ = select.select([conn.sock], [], [], remaining)
+                    if not readable:
+                        break
+                line = conn.readline()
+                if not line:
+                    raise imaplib.IMAP4.abort("connection closed during IDLE")
+                new_mail = self._is_new_mail(line)
+            
+            conn.send(b'DONE\r\n')
+            while True:
+                line = conn.readline()
+                if not line:
+                    raise imaplib.IMAP4.abort("connection closed while ending IDLE")
+                if line.startswith(tag):
+                    if not line[len(tag):].strip().upper().startswith(b'OK'):
+                        raise imaplib.IMAP4.abort(f"IDLE failed: {line!r}")
+                    break
+                new_mail = new_mail or self._is_new_mail(line)
+        except Exception:
+            self.reset()
+            raise
+        
+        self.last_used = time.monotonic()
+        return new_mail
+    
+    @staticmethod
+    def _is_new_mail(line: bytes) -> bool:
+        return line.startswith(b'*') and line.rstrip().upper().endswith((b'EXISTS', b'RECENT'))
+    
+    def reset(self):
+        """Drop the connection without logging out (used after errors)"""
+        if self._conn is not None:
+            try:
+                self._conn.shutdown()
+            except Exception:
+                pass
+            self._conn = None
+    
+    def close(self):
+        """Log out and close the connection"""
+        if self._conn is not None:
+            try:
+                self._conn.logout()
+            except Exception:
+                pass
+            self._conn = None
+
+def stream_uid_fetch(conn: imaplib.IMAP4, message_set: str, items: str) -> Iterator[List]:
+    """Issue one ``UID FETCH`` and yield untagged FETCH data as each response arrives
+    
+    ``conn.uid('fetch', ...)`` buffers every literal until the command
+    completes; reading response by response keeps at most one message in
+    memory. Yields imaplib-style data lists (``(meta, literal)`` tuples
+    followed by trailing fragments). A caller that stops early leaves the
+    rest of the response unread and must reset the connection.
+    """
+    tag = conn._command('UID', 'FETCH', message_set, items)
+    
+    while conn.tagged_commands.get(tag) is None:
+        conn._get_response()
+        fetched = conn.untagged_responses.pop('FETCH', None)
+        if fetched:
+            yield fetched
+    
+    typ, data = conn.tagged_commands.pop(tag)
+    if typ != 'OK':
+        raise imaplib.IMAP4.error(f"UID FETCH failed: {data}")
+    
+    fetched = conn.untagged_responses.pop('FETCH', None)
+    if fetched:
+        yield fetched
+
+class IMAPSessionManager:
+    """Keeps one persistent IMAP session per email account and purpose
+    
+    Fetching and IDLE use separate sessions because IDLE occupies the
+    connection until new mail arrives.
+    """
+    
+    def __init__(self):
+        self._sessions: Dict[str, IMAPSession] = {}
+        self._lock = threading.Lock()
+        metrics.register_gauge('imap.sessions', lambda: len(self._sessions))
+    
+    def get(self, account: EmailAccount, purpose: str = 'fetch') -> IMAPSession:
+        """Get the session for an account, replacing it if its settings changed"""
+        key = f"{account.id}:{purpose}"
+        settings = (account.imap_host, account.imap_port, account.email, account.password)
+        stale = None
+        
+        with self._lock:
+            session = self._sessions.get(key)
+            if session is None or not session.matches(*settings):
+                stale = session
+                session = IMAPSession(*settings)
+                self._sessions[key] = session
+        
+        if stale is not None:
+            self._close_session(stale)
+        return session
+    
+    def drop(self, account_id: str, purpose: str):
+        """Forget an account's session and close its socket without logging out
+        
+        Never blocks, so it is safe on the event loop; a thread waiting on the
+        connection (e.g. in IDLE) gets an error and returns right away.
+        """
+        with self._lock:
+            session = self._sessions.pop(f"{account_id}:{purpose}", None)
+        if session is not None:
+            session.reset()
+    
+    def close_unused(self, max_idle_seconds: float) -> int:
+        """Close sessions not used for ``max_idle_seconds`` (blocking; run off the event loop)"""
+        cutoff = time.monotonic() - max_idle_seconds
+        with self._lock:
+            keys = [k for k, s in self._sessions.items() if s.last_used < cutoff]
+            sessions = [self._sessions.pop(k) for k in keys]
+        for session in sessions:
+            self._close_session(session)
+        return len(sessions)
+    
+    def close_all(self):
+        """Close every session (blocking; run off the event loop)"""
+        with self._lock:
+            sessions = list(self._sessions.values())
+            self._sessions.clear()
+        for session in sessions:
+            self._close_session(session)
+    
+    @staticmethod
+    def _close_session(session: IMAPSession):
+        # A session busy in IDLE or a fetch is dropped rather than waited on
+        if session.lock.acquire(blocking=False):
+            try:
+                session.close()
+            finally:
+                session.lock.release()
+        else:
+            session.reset()
+
+class IMAPIdleSupervisor:
+    """Runs one IMAP IDLE watcher per account and triggers a poll on new mail"""
+    
+    def __init__(self, manager: IMAPSessionManager, on_new_mail: Callable[[str], Awaitable], max_accounts: int):
+        self.manager = manager
+        self.on_new_mail = on_new_mail
+        self.max_accounts = max_accounts
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self._settings: Dict[str, tuple] = {}
+        # IDLE blocks a thread per account, so it gets its own pool
+        self._executor = BlockingExecutor('imap-idle', max_accounts)
+        metrics.register_gauge('imap.idle_watchers', lambda: len(self._tasks))
+    
+    def sync(self, accounts: List[EmailAccount]):
+        """Start watchers for new accounts and stop watchers of removed or changed ones"""
+        wanted = {}
+        for account in accounts[:self.max_accounts]:
+            wanted[account.id] = account
+        
+        for account_id in list(self._tasks):
+            account = wanted.get(account_id)
+            if account is None or self._settings[account_id] != self._fingerprint(account):
+                self._stop_watcher(account_id)
+        
+        for account_id, account in wanted.items():
+            if account_id not in self._tasks:
+                self._settings[account_id] = self._fingerprint(account)
+                self._tasks[account_id] = asyncio.create_task(self._watch(account))
+    
+    async def _watch(self, account: EmailAccount):
+        # get() may log out a stale session, so keep it off the event loop
+        session = await self._executor.run(self.manager.get, account, 'idle', operation='connect')
+        logger.info(f"IMAP IDLE watcher started for {account.email}")
+        
+        while True:
+            try:
+                new_mail = await self._executor.run(self._idle_once, session, operation='idle')
+                if new_mail:
+                    metrics.increment('imap.idle_notifications')
+                    await self.on_new_mail(account.id)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"IMAP IDLE error for {account.email}: {e}")
+                await asyncio.sleep(config.IMAP_RECONNECT_BASE_DELAY)
+    
+    @staticmethod
+    def _idle_once(session: IMAPSession) -> bool:
+        with session.lock:
+            return session.idle(config.IMAP_IDLE_TIMEOUT)
+    
+    @staticmethod
+    def _fingerprint(account: EmailAccount) -> tuple:
+        return (account.imap_host, account.imap_port, account.email, account.password)
+    
+    def _stop_watcher(self, account_id: str):
+        task = self._tasks.pop(account_id, None)
+        self._settings.pop(account_id, None)
+        if task is not None:
+            task.cancel()
+            # Cancelling the task leaves the IDLE thread blocked on the socket
+            self.manager.drop(account_id, 'idle')
+    
+    def stop(self):
+        """Stop all watchers"""
+        for account_id in list(self._tasks):
+            self._stop_watcher(account_id)
+        self._executor.shutdown()
+
+# Global IMAP session manager
+imap_session_manager = IMAPSessionManager()
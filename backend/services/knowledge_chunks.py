@@ -0,0 +1,115 @@
+"""Splitting knowledge base entries into overlapping chunks for retrieval"""
+from typing import Dict, List
+from motor.motor_asyncio import AsyncIOMotorDatabase
+import asyncio
+import hashlib
+import logging
+
+from config import config
+from services.user_config import user_config_cache
+
+logger = logging.getLogger(__name__)
+
+def split_text(text: str, size: int, overlap: int) -> List[str]:
+    """Split on word boundaries into chunks of up to ``size`` characters
+    
+    Consecutive chunks share up to ``overlap`` characters so a passage cut at
+    a boundary is still whole in one of them. Words longer than ``size`` get
+    a chunk of their own.
+    """
+    words = text.split()
+    chunks = []
+    start = 0
+    
+    while start < len(words):
+        end = start + 1
+        length = len(words[start])
+        while end < len(words) and length + 1 + len(words[end]) <= size:
+            length += 1 + len(words[end])
+            end += 1
+        chunks.append(" ".join(words[start:end]))
+        if end >= len(words):
+            break
+        
+        # Start the next chunk up to ``overlap`` characters before this one ends
+        next_start = end
+        shared = 0
+        while next_start - 1 > start and shared + len(words[next_start - 1]) + 1 <= overlap:
+            next_start -= 1
+            shared += len(words[next_start]) + 1
+        start = next_start
+    
+    return chunks
+
+class KnowledgeChunker:
+    """Keeps ``knowledge_base_chunks`` in step with knowledge base entries
+    
+    Chunk IDs are derived from the entry's text and the chunk settings, so
+    re-chunking unchanged text keeps existing chunks (and their embeddings),
+    and concurrent writers of the same text produce the same chunks.
+    """
+    
+    def __init__(self, size: int, overlap: int):
+        self.size = size
+        self.overlap = overlap
+        self.settings = f"{size}:{overlap}"
+    
+    def chunk_docs(self, kb_doc: Dict) -> List[Dict]:
+        """Chunk documents for a knowledge base entry"""
+        digest = hashlib.sha256(f"{self.settings}\n{kb_doc['title']}\n{kb_doc['content']}".encode()).hexdigest()[:16]
+        return [
+            {
+                "id": f"{kb_doc['id']}:{digest}:{position}",
+                "kb_id": kb_doc['id'],
+                "user_id": kb_doc['user_id'],
+                "title": kb_doc['title'],
+                "content": text,
+                "position": position,
+                # ~4 characters per token, as in the prompt line "- title: content"
+                "tokens": (len(kb_doc['title']) + len(text)) // 4 + 2
+            }
+            for position, text in enumerate(split_text(kb_doc['content'], self.size, self.overlap))
+        ]
+    
+    async def sync(self, db: AsyncIOMotorDatabase, kb_doc: Dict) -> int:
+        """Write an entry's chunks and remove outdated ones (all of them if the entry is inactive)"""
+        chunks = self.chunk_docs(kb_doc) if kb_doc.get('is_active', True) else []
+        
+        await asyncio.gather(*[
+            db.knowledge_base_chunks.update_one({"id": chunk['id']}, {"$setOnInsert": chunk}, upsert=True)
+            for chunk in chunks
+        ])
+        await db.knowledge_base_chunks.delete_many({
+            "kb_id": kb_doc['id'],
+            "id": {"$nin": [chunk['id'] for chunk in chunks]}
+        })
+        await db.knowledge_base.update_one({"id": kb_doc['id']}, {"$set": {"chunk_settings": self.settings}})
+        
+        return len(chunks)
+    
+    async def delete(self, db: AsyncIOMotorDatabase, kb_id: str):
+        """Remove a deleted entry's chunks"""
+        await db.knowledge_base_chunks.delete_many({"kb_id": kb_id})
+    
+    async def backfill(self, db: AsyncIOMotorDatabase):
+        """Chunk entries written before chunking or under other chunk settings"""
+        user_ids = set()
+        cursor = db.knowledge_base.find(
+            {"chunk_settings": {"$ne": self.settings}},
+            {"_id": 0, "id": 1, "user_id": 1, "title": 1, "content": 1, "is_active": 1}
+        )
+        
+        async for kb_doc in cursor:
+            try:
+                await self.sync(db, kb_doc)
+                user_ids.add(kb_doc['user_id'])
+            except Exception as e:
+                logger.error(f"Error chunking knowledge base entry {kb_doc['id']}: {e}")
+        
+        for user_id in user_ids:
+            await user_config_cache.notify_changed(db, user_id)
+        if user_ids:
+            logger.info(f"Chunked knowledge base entries of {len(user_ids)} users")
+
+# Global knowledge base chunker
+knowledge_chunker = KnowledgeChunker(config.KB_CHUNK_SIZE, config.KB_CHUNK_OVERLAP)
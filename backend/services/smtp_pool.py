@@ -0,0 +1,192 @@
+"""Pooled, authenticated SMTP connections reused across sends"""
+from collections import deque
+from typing import Deque, Dict, List, Tuple
+import smtplib
+import socket
+import threading
+import time
+import logging
+
+from config import config
+from exceptions import EmailAccountError
+from models.email_account import EmailAccount
+from utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# Errors after which a pooled connection is discarded and the send retried
+# on a fresh one (stale keep-alive, server shutdown 421, timeouts)
+RECONNECT_ERRORS = (smtplib.SMTPServerDisconnected, socket.timeout, ConnectionError)
+
+class PooledSMTPConnection:
+    """Authenticated SMTP connection with usage timestamps"""
+    
+    def __init__(self, server: smtplib.SMTP_SSL):
+        self.server = server
+        self.last_used = time.monotonic()
+    
+    def close(self):
+        try:
+            self.server.quit()
+        except Exception:
+            try:
+                self.server.close()
+            except Exception:
+                pass
+
+class SMTPConnectionPool:
+    """Per-account pool of SMTP connections
+    
+    Idle connections are kept per account and reused for follow-up batches,
+    reminder bursts and auto-replies instead of paying TLS + AUTH per message.
+    Concurrent sessions per SMTP host are bounded. Blocking: call from a
+    worker thread.
+    """
+    
+    def __init__(self, max_sessions_per_host: int, idle_timeout: float, keepalive_interval: float):
+        self.max_sessions_per_host = max_sessions_per_host
+        self.idle_timeout = idle_timeout
+        self.keepalive_interval = keepalive_interval
+        self._idle: Dict[Tuple, Deque[PooledSMTPConnection]] = {}
+        self._host_slots: Dict[str, threading.BoundedSemaphore] = {}
+        self._lock = threading.Lock()
+        metrics.register_gauge('smtp.idle_connections', self.idle_count)
+    
+    @staticmethod
+    def _key(account: EmailAccount) -> Tuple:
+        return (account.smtp_host, account.smtp_port, account.email, account.password)
+    
+    def _host_slot(self, host: str) -> threading.BoundedSemaphore:
+        with self._lock:
+            slot = self._host_slots.get(host)
+            if slot is None:
+                slot = threading.BoundedSemaphore(self.max_sessions_per_host)
+                self._host_slots[host] = slot
+            return slot
+    
+    def send(self, account: EmailAccount, recipients: List[str], message: str):
+        """Send a message over a pooled connection, reconnecting once if it went stale"""
+        slot = self._host_slot(account.smtp_host)
+        if not slot.acquire(timeout=config.SMTP_ACQUIRE_TIMEOUT):
+            metrics.increment('smtp.acquire_timeouts')
+            raise EmailAccountError(f"No SMTP session available for {account.smtp_host}")
+        
+        try:
+            conn, reused = self._checkout(account)
+            try:
+                conn.server.sendmail(account.email, recipients, message)
+            except Exception as e:
+                conn.close()
+                if not (reused and self._should_reconnect(e)):
+                    raise
+                # Only a reused connection is retried: the failure means it
+                # went stale while pooled, not that the message was rejected
+                logger.info(f"Pooled SMTP connection for {account.email} went stale, reconnecting: {e}")
+                metrics.increment('smtp.reconnects')
+                conn = self._connect(account)
+                try:
+                    conn.server.sendmail(account.email, recipients, message)
+                except Exception:
+                    conn.close()
+                    raise
+            
+            metrics.increment('smtp.sent')
+            self._checkin(account, conn)
+        finally:
+            slot.release()
+    
+    @staticmethod
+    def _should_reconnect(error: Exception) -> bool:
+        if isinstance(error, RECONNECT_ERRORS):
+            return True
+        return isinstance(error, smtplib.SMTPResponseException) and error.smtp_code == 421
+    
+    def _checkout(self, account: EmailAccount) -> Tuple[PooledSMTPConnection, bool]:
+        """Take an idle connection for the account, or open a new one"""
+        key = self._key(account)
+        while True:
+            with self._lock:
+                idle = self._idle.get(key)
+                conn = idle.pop() if idle else None
+            if conn is None:
+                return self._connect(account), False
+            
+            if time.monotonic() - conn.last_used > self.idle_timeout:
+                conn.close()
+                continue
+            if time.monotonic() - conn.last_used > self.keepalive_interval and not self._is_alive(conn):
+                conn.close()
+                continue
+            
+            metrics.increment('smtp.reused')
+            return conn, True
+    
+    def _connect(self, account: EmailAccount) -> PooledSMTPConnection:
+        server = smtplib.SMTP_SSL(account.smtp_host, account.smtp_port, timeout=config.SMTP_TIMEOUT)
+        try:
+            server.login(account.email, account.password)
+        except Exception:
+            server.close()
+            raise
+        metrics.increment('smtp.connects')
+        return PooledSMTPConnection(server)
+    
+    def _checkin(self, account: EmailAccount, conn: PooledSMTPConnection):
+        conn.last_used = time.monotonic()
+        with self._lock:
+            self._idle.setdefault(self._key(account), deque()).append(conn)
+    
+    @staticmethod
+    def _is_alive(conn: PooledSMTPConnection) -> bool:
+        try:
+            code, _ = conn.server.noop()
+            return code == 250
+        except Exception:
+            return False
+    
+    def maintain(self) -> int:
+        """Close expired idle connections and NOOP the rest to keep them open
+        
+        Returns the number of connections closed.
+        """
+        now = time.monotonic()
+        with self._lock:
+            pooled = [(key, conn) for key, idle in self._idle.items() for conn in idle]
+            self._idle.clear()
+        
+        closed = 0
+        keep = []
+        for key, conn in pooled:
+            if now - conn.last_used > self.idle_timeout:
+                conn.close()
+                closed += 1
+            elif now - conn.last_used > self.keepalive_interval and not self._is_alive(conn):
+                conn.close()
+                closed += 1
+            else:
+                keep.append((key, conn))
+        
+        with self._lock:
+            for key, conn in keep:
+                self._idle.setdefault(key, deque()).append(conn)
+        return closed
+    
+    def idle_count(self) -> int:
+        """Number of idle pooled connections"""
+        with self._lock:
+            return sum(len(idle) for idle in self._idle.values())
+    
+    def close_all(self):
+        """Close every idle connection"""
+        with self._lock:
+            pooled = [conn for idle in self._idle.values() for conn in idle]
+            self._idle.clear()
+        for conn in pooled:
+            conn.close()
+
+# Global SMTP connection pool
+smtp_pool = SMTPConnectionPool(
+    max_sessions_per_host=config.SMTP_MAX_SESSIONS_PER_HOST,
+    idle_timeout=config.SMTP_IDLE_TIMEOUT,
+    keepalive_interval=config.SMTP_KEEPALIVE_INTERVAL
+)
@@ -0,0 +1,260 @@
+"""Per-user configuration snapshots for the AI pipeline (intents, knowledge base, personas)"""
+from collections import OrderedDict
+from typing import Dict, List, Optional, Set
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo.errors import OperationFailure
+import asyncio
+import time
+import logging
+
+from config import config
+from services.embedding_service import KnowledgeIndex, knowledge_embedder
+from utils.bm25 import BM25Index
+from utils.keyword_matcher import IntentMatcher
+from utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# Collections a snapshot is built from, and the account fields it uses
+WATCHED_COLLECTIONS = ('intents', 'knowledge_base', 'knowledge_base_chunks', 'email_accounts')
+ACCOUNT_FIELDS = ('persona', 'signature', 'is_active')
+
+class UserConfigSnapshot:
+    """Everything per-email processing reads about a user's configuration"""
+    
+    def __init__(self, intent_docs: List[Dict], chunk_docs: List[Dict], account_docs: List[Dict], kb_lexical: BM25Index):
+        # Active intents by ID, in priority order
+        self.intents: Dict[str, Dict] = {doc['id']: doc for doc in intent_docs}
+        self.intent_matcher = IntentMatcher(intent_docs)
+        # Builds the vector index and strips embeddings from the chunks
+        self.kb_index = KnowledgeIndex(chunk_docs, knowledge_embedder.model)
+        # Chunks of active knowledge base entries by ID, and their lexical index
+        self.kb_chunks: Dict[str, Dict] = {doc['id']: doc for doc in chunk_docs}
+        self.kb_lexical = kb_lexical
+        self.accounts: Dict[str, Dict] = {doc['id']: doc for doc in account_docs}
+        self.loaded_at = time.monotonic()
+
+class UserConfigCache:
+    """Read-through LRU of user configuration snapshots
+    
+    Snapshots are dropped when a user's intents, knowledge base or account
+    persona/signature change. With a replica set a Mongo change stream
+    delivers those changes to every process and cached snapshots are used
+    without any reads. Otherwise (standalone Mongo) routes bump a per-user
+    version in ``user_config_versions`` and a snapshot is revalidated
+    against it at most every ``check_interval`` seconds.
+    """
+    
+    def __init__(self, max_size: int, check_interval: float):
+        self.max_size = max_size
+        self.check_interval = check_interval
+        self._snapshots: "OrderedDict[str, UserConfigSnapshot]" = OrderedDict()
+        # Kept across invalidations so reloads only index the chunks that changed
+        self._lexical: Dict[str, BM25Index] = {}
+        self._versions: Dict[str, int] = {}
+        self._checked_at: Dict[str, float] = {}
+        self._loading: Dict[str, asyncio.Future] = {}
+        self._epoch = 0
+        self._watcher: Optional[asyncio.Task] = None
+        self._embedding: Dict[str, asyncio.Task] = {}
+        self._embed_again: Set[str] = set()
+        self.watching = False
+        metrics.register_gauge('user_config.snapshots', lambda: len(self._snapshots))
+        metrics.register_gauge('user_config.watching', lambda: int(self.watching))
+    
+    async def get(self, db: AsyncIOMotorDatabase, user_id: str) -> UserConfigSnapshot:
+        """Get a user's snapshot, loading it from Mongo if missing or stale"""
+        snapshot = self._snapshots.get(user_id)
+        if snapshot is not None and await self._is_current(db, user_id):
+            self._snapshots.move_to_end(user_id)
+            metrics.increment('user_config.hits')
+            return snapshot
+        
+        while user_id in self._loading:
+            loading = self._loading[user_id]
+            try:
+                return await asyncio.shield(loading)
+            except asyncio.CancelledError:
+                if not loading.cancelled() or asyncio.current_task().cancelling():
+                    raise
+                # The loading caller was cancelled, not us: load again
+        
+        metrics.increment('user_config.misses')
+        loading = asyncio.get_running_loop().create_future()
+        self._loading[user_id] = loading
+        try:
+            snapshot = await self._load(db, user_id)
+            loading.set_result(snapshot)
+            return snapshot
+        except asyncio.CancelledError:
+            loading.cancel()
+            raise
+        except Exception as e:
+            loading.set_exception(e)
+            loading.exception()  # Waiters re-raise it; don't warn when there are none
+            raise
+        finally:
+            del self._loading[user_id]
+    
+    async def _is_current(self, db: AsyncIOMotorDatabase, user_id: str) -> bool:
+        if self.watching:
+            return True
+        if time.monotonic() - self._checked_at.get(user_id, 0.0) < self.check_interval:
+            return True
+        version = await self._read_version(db, user_id)
+        self._checked_at[user_id] = time.monotonic()
+        return version == self._versions.get(user_id)
+    
+    async def _read_version(self, db: AsyncIOMotorDatabase, user_id: str) -> int:
+        version_doc = await db.user_config_versions.find_one({"user_id": user_id}, {"_id": 0, "version": 1})
+        return version_doc['version'] if version_doc else 0
+    
+    async def _load(self, db: AsyncIOMotorDatabase, user_id: str) -> UserConfigSnapshot:
+        epoch = self._epoch
+        version = await self._read_version(db, user_id)
+        
+        with metrics.timer('user_config.load'):
+            intent_docs, chunk_docs, account_docs = await asyncio.gather(
+                db.intents.find(
+                    {"user_id": user_id, "is_active": True},
+                    {"_id": 0, "id": 1, "name": 1, "prompt": 1, "keywords": 1, "priority": 1, "auto_send": 1}
+                ).sort("priority", -1).to_list(config.USER_CONFIG_MAX_INTENTS),
+                db.knowledge_base_chunks.find(
+                    {"user_id": user_id},
+                    {"_id": 0, "id": 1, "kb_id": 1, "title": 1, "content": 1, "tokens": 1, "embedding": 1, "embedding_model": 1}
+                ).sort("id", 1).to_list(config.USER_CONFIG_MAX_KB_CHUNKS),
+                db.email_accounts.find(
+                    {"user_id": user_id},
+                    {"_id": 0, "id": 1, **{field: 1 for field in ACCOUNT_FIELDS}}
+                ).to_list(None)
+            )
+            # Chunk IDs change with their text, so only new chunks are tokenized
+            kb_lexical = self._lexical.setdefault(user_id, BM25Index())
+            added, removed = kb_lexical.sync({doc['id']: f"{doc['title']}\n{doc['content']}" for doc in chunk_docs})
+            metrics.increment('user_config.lexical.indexed', added)
+            metrics.increment('user_config.lexical.removed', removed)
+            snapshot = UserConfigSnapshot(intent_docs, chunk_docs, account_docs, kb_lexical)
+        
+        # Don't cache a snapshot that an invalidation may have overtaken while loading
+        if epoch == self._epoch:
+            self._snapshots[user_id] = snapshot
+            self._snapshots.move_to_end(user_id)
+            self._versions[user_id] = version
+            self._checked_at[user_id] = time.monotonic()
+            while len(self._snapshots) > self.max_size:
+                evicted, _ = self._snapshots.popitem(last=False)
+                self._lexical.pop(evicted, None)
+                self._versions.pop(evicted, None)
+                self._checked_at.pop(evicted, None)
+        
+        if snapshot.kb_index.pending:
+            self.embed_pending(db, user_id)
+        
+        return snapshot
+    
+    def embed_pending(self, db: AsyncIOMotorDatabase, user_id: str):
+        """Embed a user's chunks that have no current embedding in the background
+        
+        Called after knowledge base writes and when a snapshot has pending
+        chunks (e.g. after a model change). A call made while the user's
+        embedding is already running makes it run once more afterwards.
+        """
+        if not knowledge_embedder.enabled:
+            return
+        if user_id in self._embedding:
+            self._embed_again.add(user_id)
+            return
+        
+        async def embed():
+            try:
+                if await knowledge_embedder.embed_pending(db, user_id):
+                    await self.notify_changed(db, user_id)
+            except Exception as e:
+                logger.error(f"Error embedding knowledge base for user {user_id}: {e}")
+            finally:
+                del self._embedding[user_id]
+                if user_id in self._embed_again:
+                    self._embed_again.discard(user_id)
+                    self.embed_pending(db, user_id)
+        
+        self._embedding[user_id] = asyncio.create_task(embed())
+    
+    def invalidate(self, user_id: Optional[str] = None):
+        """Drop one user's snapshot in this process (all users if None)"""
+        self._epoch += 1
+        metrics.increment('user_config.invalidations')
+        if user_id is None:
+            self._snapshots.clear()
+            self._versions.clear()
+            self._checked_at.clear()
+            return
+        self._snapshots.pop(user_id, None)
+        self._versions.pop(user_id, None)
+        self._checked_at.pop(user_id, None)
+    
+    async def notify_changed(self, db: AsyncIOMotorDatabase, user_id: str):
+        """Record that a user's configuration changed (call after intent, KB or account writes)
+        
+        Other processes pick the change up from the change stream, or from the
+        bumped version when change streams are unavailable.
+        """
+        await db.user_config_versions.update_one({"user_id": user_id}, {"$inc": {"version": 1}}, upsert=True)
+        self.invalidate(user_id)
+    
+    async def watch(self, db: AsyncIOMotorDatabase):
+        """Invalidate snapshots from a change stream until cancelled
+        
+        Returns (leaving version checks in charge) if the deployment does
+        not support change streams.
+        """
+        pipeline = [{"$match": {
+            "ns.coll": {"$in": list(WATCHED_COLLECTIONS)},
+            "$or": [
+                {"ns.coll": {"$in": ["intents", "knowledge_base"]}},
+                # Chunks are only deleted along with a knowledge_base write
+                {"ns.coll": "knowledge_base_chunks", "operationType": {"$ne": "delete"}},
+                {"ns.coll": "email_accounts", "operationType": {"$in": ["insert", "replace", "delete"]}},
+                # Polling updates accounts constantly; only these fields matter here
+                *[{"ns.coll": "email_accounts", f"updateDescription.updatedFields.{field}": {"$exists": True}} for field in ACCOUNT_FIELDS]
+            ]
+        }}]
+        
+        while True:
+            try:
+                async with db.watch(pipeline, full_document='updateLookup') as stream:
+                    # Changes may have been missed while not watching
+                    self.invalidate()
+                    self.watching = True
+                    logger.info("Watching configuration changes (change stream)")
+                    async for change in stream:
+                        user_id = (change.get('fullDocument') or {}).get('user_id')
+                        # Deletes only carry the _id: drop everything
+                        self.invalidate(user_id)
+            except OperationFailure as e:
+                logger.info(f"Change streams unavailable, using version checks for config snapshots: {e}")
+                return
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Configuration change stream error: {e}")
+                await asyncio.sleep(5)
+            finally:
+                self.watching = False
+    
+    def start_watching(self, db: AsyncIOMotorDatabase):
+        """Run ``watch`` in the background"""
+        if self._watcher is None or self._watcher.done():
+            self._watcher = asyncio.create_task(self.watch(db))
+    
+    async def stop(self):
+        """Stop watching for configuration changes"""
+        if self._watcher is not None:
+            self._watcher.cancel()
+            try:
+                await self._watcher
+            except asyncio.CancelledError:
+                pass
+            self._watcher = None
+
+# Global user configuration snapshot cache
+user_config_cache = UserConfigCache(config.USER_CONFIG_CACHE_SIZE, config.USER_CONFIG_CHECK_INTERVAL)
@@ -0,0 +1,105 @@
+"""BM25 lexical search for knowledge base chunks"""
+from typing import Dict, List, Tuple
+import heapq
+import math
+import re
+
+TOKEN_PATTERN = re.compile(r"\w+")
+
+# Too common in emails to say anything about relevance
+STOPWORDS = frozenset("""
+a an and are as at be been but by can could do for from had has have i if in into is it its
+me my no not of on or our please so than that the their them then there these they this to
+us was we were what when which will with would you your
+""".split())
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase word tokens without stopwords"""
+    return [token for token in TOKEN_PATTERN.findall(text.lower()) if token not in STOPWORDS]
+
+class BM25Index:
+    """Inverted index with Okapi BM25 scoring
+    
+    Documents are added and removed individually, so the index is kept up to
+    date by applying what changed instead of re-tokenizing everything.
+    """
+    
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self._postings: Dict[str, Dict[str, int]] = {}
+        self._lengths: Dict[str, int] = {}
+        self._total_length = 0
+    
+    def __len__(self) -> int:
+        return len(self._lengths)
+    
+    def __contains__(self, doc_id: str) -> bool:
+        return doc_id in self._lengths
+    
+    def add(self, doc_id: str, text: str):
+        """Index a document (replacing any document with the same ID)"""
+        self.remove(doc_id)
+        tokens = tokenize(text)
+        for token in tokens:
+            postings = self._postings.setdefault(token, {})
+            postings[doc_id] = postings.get(doc_id, 0) + 1
+        self._lengths[doc_id] = len(tokens)
+        self._total_length += len(tokens)
+    
+    def remove(self, doc_id: str):
+        """Remove a document if indexed"""
+        length = self._lengths.pop(doc_id, None)
+        if length is None:
+            return
+        self._total_length -= length
+        for token in [token for token, postings in self._postings.items() if doc_id in postings]:
+            del self._postings[token][doc_id]
+            if not self._postings[token]:
+                del self._postings[token]
+    
+    def sync(self, documents: Dict[str, str]) -> Tuple[int, int]:
+        """Make the index hold exactly ``documents`` (ID -> text); returns (added, removed)
+        
+        Document IDs must change when their text does: documents already
+        indexed under the same ID are kept as they are.
+        """
+        removed = [doc_id for doc_id in self._lengths if doc_id not in documents]
+        if removed:
+            self._remove_many(removed)
+        added = [doc_id for doc_id in documents if doc_id not in self._lengths]
+        for doc_id in added:
+            self.add(doc_id, documents[doc_id])
+        return len(added), len(removed)
+    
+    def _remove_many(self, doc_ids: List[str]):
+        """Remove several documents in one pass over the postings"""
+        doc_ids = set(doc_ids)
+        for doc_id in doc_ids:
+            self._total_length -= self._lengths.pop(doc_id)
+        for token in list(self._postings):
+            postings = self._postings[token]
+            for doc_id in doc_ids.intersection(postings):
+                del postings[doc_id]
+            if not postings:
+                del self._postings[token]
+    
+    def search(self, query: str, k: int) -> List[Tuple[str, float]]:
+        """Top ``k`` document IDs by BM25 score for ``query``, best first (matches only)"""
+        if not self._lengths or k <= 0:
+            return []
+        
+        count = len(self._lengths)
+        average_length = self._total_length / count or 1.0
+        scores: Dict[str, float] = {}
+        
+        for token in set(tokenize(query)):
+            postings = self._postings.get(token)
+            if not postings:
+                continue
+            idf = math.log(1 + (count - len(postings) + 0.5) / (len(postings) + 0.5))
+            for doc_id, frequency in postings.items():
+                norm = self.k1 * (1 - self.b + self.b * self._lengths[doc_id] / average_length)
+                scores[doc_id] = scores.get(doc_id, 0.0) + idf * frequency * (self.k1 + 1) / (frequency + norm)
+        
+        return heapq.nlargest(k, scores.items(), key=lambda item: item[1])
@@ -1,82 +1,257 @@
 """Caching layer for performance optimization"""
-from typing import Any, Optional, Callable
-from functools import wraps
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+import asyncio
 import json
-import hashlib
+import time
 import logging
-from datetime import datetime, timedelta
+
+from config import config
+from utils.metrics import metrics
 
 logger = logging.getLogger(__name__)
 
+class CacheBackend(ABC):
+    """Storage for serialized cache values"""
+    
+    @abstractmethod
+    async def get(self, key: str) -> Optional[bytes]:
+        """Get a value, None if missing or expired"""
+        pass
+    
+    @abstractmethod
+    async def set(self, key: str, value: bytes, ttl: int):
+        """Store a value for ``ttl`` seconds"""
+        pass
+    
+    @abstractmethod
+    async def delete(self, key: str):
+        """Delete a value"""
+        pass
+    
+    @abstractmethod
+    async def delete_prefix(self, prefix: str):
+        """Delete all values whose key starts with ``prefix``"""
+        pass
+    
+    @abstractmethod
+    async def clear(self):
+        """Delete all values"""
+        pass
+    
+    async def close(self):
+        """Release resources"""
+        pass
+
+class MemoryCacheBackend(CacheBackend):
+    """In-process LRU bounded by entry count and total bytes
+    
+    Expired entries are removed by a periodic sweeper (started on first
+    write) as well as on read, so values nobody asks for again do not pile up.
+    """
+    
+    def __init__(self, max_entries: int, max_bytes: int, sweep_interval: float):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.sweep_interval = sweep_interval
+        self._entries: "OrderedDict[str, Tuple[float, bytes]]" = OrderedDict()
+        self._bytes = 0
+        self._sweeper: Optional[asyncio.Task] = None
+        metrics.register_gauge('cache.entries', lambda: len(self._entries))
+        metrics.register_gauge('cache.bytes', lambda: self._bytes)
+    
+    async def get(self, key: str) -> Optional[bytes]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry[0] <= time.monotonic():
+            self._remove(key)
+            metrics.increment('cache.expired')
+            return None
+        self._entries.move_to_end(key)
+        return entry[1]
+    
+    async def set(self, key: str, value: bytes, ttl: int):
+        self._start_sweeper()
+        if len(value) > self.max_bytes:
+            return
+        self._remove(key)
+        self._entries[key] = (time.monotonic() + ttl, value)
+        self._bytes += len(value)
+        while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            metrics.increment('cache.evictions')
+    
+    async def delete(self, key: str):
+        self._remove(key)
+    
+    async def delete_prefix(self, prefix: str):
+        for key in [k for k in self._entries if k.startswith(prefix)]:
+            self._remove(key)
+    
+    async def clear(self):
+        self._entries.clear()
+        self._bytes = 0
+    
+    def _remove(self, key: str):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= len(entry[1])
+    
+    def sweep(self) -> int:
+        """Remove expired entries; returns how many were removed"""
+        now = time.monotonic()
+        expired = [key for key, (expires_at, _) in self._entries.items() if expires_at <= now]
+        for key in expired:
+            self._remove(key)
+        if expired:
+            metrics.increment('cache.expired', len(expired))
+        return len(expired)
+    
+    def _start_sweeper(self):
+        if self._sweeper is None or self._sweeper.done():
+            self._sweeper = asyncio.create_task(self._sweep_periodically())
+    
+    async def _sweep_periodically(self):
+        while True:
+            await asyncio.sleep(self.sweep_interval)
+            try:
+                self.sweep()
+            except Exception as e:
+                logger.error(f"Error sweeping cache: {e}")
+    
+    async def close(self):
+        if self._sweeper is not None:
+            self._sweeper.cancel()
+            self._sweeper = None
+
+class RedisCacheBackend(CacheBackend):
+    """Redis-backed cache shared by all API and worker processes
+    
+    Redis handles expiry and eviction (configure ``maxmemory-policy``).
+    Errors are logged and treated as misses so Redis outages only cost speed.
+    """
+    
+    def __init__(self, url: str, namespace: str = 'cache:'):
+        import redis.asyncio as redis_asyncio
+        self.redis = redis_asyncio.from_url(url)
+        self.namespace = namespace
+    
+    async def get(self, key: str) -> Optional[bytes]:
+        try:
+            return await self.redis.get(self.namespace + key)
+        except Exception as e:
+            logger.error(f"Redis cache get failed: {e}")
+            return None
+    
+    async def set(self, key: str, value: bytes, ttl: int):
+        try:
+            await self.redis.set(self.namespace + key, value, ex=ttl)
+        except Exception as e:
+            logger.error(f"Redis cache set failed: {e}")
+    
+    async def delete(self, key: str):
+        try:
+            await self.redis.delete(self.namespace + key)
+        except Exception as e:
+            logger.error(f"Redis cache delete failed: {e}")
+    
+    async def delete_prefix(self, prefix: str):
+        try:
+            keys = [key async for key in self.redis.scan_iter(match=f"{self.namespace}{prefix}*", count=500)]
+            if keys:
+                await self.redis.delete(*keys)
+        except Exception as e:
+            logger.error(f"Redis cache delete_prefix failed: {e}")
+    
+    async def clear(self):
+        await self.delete_prefix('')
+    
+    async def close(self):
+        await self.redis.aclose()
+
 class CacheService:
-    """Simple in-memory cache (use Redis in production)"""
+    """JSON-serialized cache with single-flight loading
+    
+    Concurrent misses for the same key share one load instead of all
+    computing the value.
+    """
     
-    def __init__(self):
-        self._cache = {}
-        self._expiry = {}
+    def __init__(self, backend: CacheBackend):
+        self.backend = backend
+        self._loading: Dict[str, asyncio.Future] = {}
     
-    def get(self, key: str) -> Optional[Any]:
+    async def get(self, key: str) -> Optional[Any]:
         """Get value from cache"""
-        if key in self._cache:
-            # Check expiry
-            if key in self._expiry:
-                if datetime.now() > self._expiry[key]:
-                    # Expired
-                    del self._cache[key]
-                    del self._expiry[key]
-                    return None
-            return self._cache[key]
-        return None
-    
-    def set(self, key: str, value: Any, ttl: int = 300):
-        """Set value in cache with TTL (seconds)"""
-        self._cache[key] = value
-        if ttl > 0:
-            self._expiry[key] = datetime.now() + timedelta(seconds=ttl)
-    
-    def delete(self, key: str):
+        value = await self.backend.get(key)
+        if value is None:
+            return None
+        return json.loads(value)
+    
+    async def set(self, key: str, value: Any, ttl: int = config.CACHE_DEFAULT_TTL):
+        """Set value in cache with TTL (seconds); values must be JSON-serializable"""
+        await self.backend.set(key, json.dumps(value).encode(), ttl)
+    
+    async def get_or_load(self, key: str, load: Callable[[], Awaitable[Any]], ttl: int = config.CACHE_DEFAULT_TTL) -> Any:
+        """Get value from cache, calling ``load`` once on a miss (None results are not cached)"""
+        value = await self.get(key)
+        if value is not None:
+            metrics.increment('cache.hits')
+            return value
+        
+        loading = self._loading.get(key)
+        if loading is not None:
+            metrics.increment('cache.coalesced')
+            try:
+                return await asyncio.shield(loading)
+            except asyncio.CancelledError:
+                if not loading.cancelled():
+                    raise
+                # The loading caller was cancelled, not us: load again
+                return await self.get_or_load(key, load, ttl)
+        
+        metrics.increment('cache.misses')
+        loading = asyncio.get_running_loop().create_future()
+        self._loading[key] = loading
+        try:
+            value = await load()
+            if value is not None:
+                await self.set(key, value, ttl)
+            loading.set_result(value)
+            return value
+        except asyncio.CancelledError:
+            loading.cancel()
+            raise
+        except Exception as e:
+            loading.set_exception(e)
+            loading.exception()  # Waiters re-raise it; don't warn when there are none
+            raise
+        finally:
+            del self._loading[key]
+    
+    async def delete(self, key: str):
         """Delete from cache"""
-        if key in self._cache:
-            del self._cache[key]
-        if key in self._expiry:
-            del self._expiry[key]
+        await self.backend.delete(key)
     
-    def clear(self):
+    async def invalidate_prefix(self, prefix: str):
+        """Invalidate all keys starting with ``prefix``"""
+        await self.backend.delete_prefix(prefix)
+    
+    async def clear(self):
         """Clear all cache"""
-        self._cache.clear()
-        self._expiry.clear()
-    
-    def invalidate_pattern(self, pattern: str):
-        """Invalidate all keys matching pattern"""
-        keys_to_delete = [k for k in self._cache.keys() if pattern in k]
-        for key in keys_to_delete:
-            self.delete(key)
+        await self.backend.clear()
+    
+    async def close(self):
+        """Stop background work and close connections"""
+        await self.backend.close()
 
-# Global cache instance
-cache_service = CacheService()
+def create_cache_backend() -> CacheBackend:
+    """Backend selected by CACHE_BACKEND (memory per process, or redis shared)"""
+    if config.CACHE_BACKEND == 'redis':
+        return RedisCacheBackend(config.REDIS_URL)
+    return MemoryCacheBackend(config.CACHE_MAX_ENTRIES, config.CACHE_MAX_BYTES, config.CACHE_SWEEP_INTERVAL)
 
-def cache_result(ttl: int = 300, key_prefix: str = ""):
-    """Decorator to cache function results"""
-    def decorator(func: Callable):
-        @wraps(func)
-        async def wrapper(*args, **kwargs):
-            # Generate cache key
-            key_data = f"{key_prefix}:{func.__name__}:{str(args)}:{str(kwargs)}"
-            cache_key = hashlib.md5(key_data.encode()).hexdigest()
-            
-            # Check cache
-            cached = cache_service.get(cache_key)
-            if cached is not None:
-                logger.debug(f"Cache hit: {func.__name__}")
-                return cached
-            
-            # Execute function
-            result = await func(*args, **kwargs)
-            
-            # Cache result
-            cache_service.set(cache_key, result, ttl)
-            logger.debug(f"Cache miss: {func.__name__}")
-            
-            return result
-        return wrapper
-    return decorator
+# Global cache instance
+cache_service = CacheService(create_cache_backend())
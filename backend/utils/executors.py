@@ -0,0 +1,86 @@
+"""Named, bounded thread pools for blocking I/O"""
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Optional
+import threading
+import asyncio
+import time
+import logging
+
+from config import config
+from utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+class BlockingExecutor:
+    """Dedicated thread pool for one kind of blocking work
+    
+    Keeps mail and Google API I/O off the event loop's default executor, which
+    is shared by the whole process and sized by CPU count. Each pool reports
+    its queue depth, active threads, queue wait and latency.
+    """
+    
+    def __init__(self, name: str, max_workers: int, metric_prefix: Optional[str] = None):
+        self.name = name
+        self.max_workers = max_workers
+        self.metric_prefix = metric_prefix or name.replace('-', '_')
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._queued = 0
+        self._active = 0
+        metrics.register_gauge(f"{self.metric_prefix}.queue_depth", lambda: self._queued)
+        metrics.register_gauge(f"{self.metric_prefix}.active", lambda: self._active)
+    
+    def _get_executor(self) -> ThreadPoolExecutor:
+        """Get or create the thread pool"""
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.max_workers,
+                thread_name_prefix=self.name
+            )
+            logger.info(f"{self.name} thread pool initialized ({self.max_workers} workers)")
+        return self._executor
+    
+    def _adjust(self, queued: int = 0, active: int = 0):
+        with self._lock:
+            self._queued += queued
+            self._active += active
+    
+    async def run(self, func: Callable, *args, operation: str = 'call', **kwargs) -> Any:
+        """Run a blocking call in the pool and record its queue wait and latency"""
+        submitted_at = time.perf_counter()
+        
+        def timed_call():
+            started_at = time.perf_counter()
+            self._adjust(queued=-1, active=1)
+            metrics.observe(f"{self.metric_prefix}.{operation}.queue_wait", started_at - submitted_at)
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self._adjust(active=-1)
+        
+        self._adjust(queued=1)
+        future = self._get_executor().submit(timed_call)
+        # A cancelled future never started, so it is still counted as queued
+        future.add_done_callback(lambda f: f.cancelled() and self._adjust(queued=-1))
+        
+        try:
+            return await asyncio.wrap_future(future)
+        except Exception:
+            metrics.increment(f"{self.metric_prefix}.{operation}.errors")
+            raise
+        finally:
+            metrics.observe(f"{self.metric_prefix}.{operation}.latency", time.perf_counter() - submitted_at)
+    
+    def shutdown(self):
+        """Shut down the thread pool"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+            logger.info(f"{self.name} thread pool closed")
+
+# Global executors for blocking mail I/O
+imap_executor = BlockingExecutor('imap', config.IMAP_MAX_WORKERS)
+smtp_executor = BlockingExecutor('smtp', config.SMTP_MAX_WORKERS)
+
+# Local embedding model inference (CPU-bound)
+embedding_executor = BlockingExecutor('embedding', config.EMBEDDING_MAX_WORKERS)
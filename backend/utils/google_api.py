@@ -0,0 +1,123 @@
+"""Async adapter for the synchronous googleapiclient library"""
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+from googleapiclient.discovery import build_from_document
+from googleapiclient.discovery_cache import get_static_doc
+from google_auth_httplib2 import AuthorizedHttp
+import httplib2
+import threading
+import json
+import logging
+
+from config import config
+from utils.executors import BlockingExecutor
+from utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# Per-thread HTTP connections: httplib2 is not thread-safe, so cached service
+# objects must never share their built-in connection across pool threads
+_thread_local = threading.local()
+
+def execute_request(request, credentials=None) -> Any:
+    """Execute a googleapiclient request (or batch) on this thread's connection
+    
+    Must be called from a pool thread. ``credentials`` is required for batch
+    requests, which do not carry their own HTTP object.
+    """
+    if credentials is None:
+        credentials = getattr(getattr(request, 'http', None), 'credentials', None)
+    if credentials is None:
+        return request.execute()
+    
+    http = getattr(_thread_local, 'http', None)
+    if http is None:
+        http = httplib2.Http(timeout=60)
+        _thread_local.http = http
+    return request.execute(http=AuthorizedHttp(credentials, http=http))
+
+class GoogleAPIClient(BlockingExecutor):
+    """Runs googleapiclient calls on a dedicated bounded thread pool
+    
+    googleapiclient performs blocking HTTP inside ``build()`` and
+    ``.execute()``; running those on the event loop stalls every request
+    handler. The pool is shared by the API process and the background worker.
+    """
+    
+    def __init__(self, max_workers: int):
+        super().__init__('google-api', max_workers, metric_prefix='google_api')
+    
+    async def execute(self, request, operation: str = 'call') -> Any:
+        """Execute a prepared googleapiclient request in the pool"""
+        return await self.run(execute_request, request, operation=operation)
+
+class GoogleServiceCache:
+    """LRU cache of built Google API service objects
+    
+    Entries are keyed by owner (email account or calendar provider) and API,
+    and tagged with a token version so a refreshed token rebuilds the service.
+    Discovery documents are parsed once instead of on every ``build()``.
+    """
+    
+    DISCOVERY_APIS = (('gmail', 'v1'), ('calendar', 'v3'))
+    
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self._services: "OrderedDict[Tuple[str, str, str], Tuple[str, Any]]" = OrderedDict()
+        self._documents: Dict[Tuple[str, str], Dict] = {}
+        self._lock = threading.Lock()
+    
+    def load_discovery_documents(self):
+        """Load the static discovery documents bundled with googleapiclient"""
+        for api, version in self.DISCOVERY_APIS:
+            self._get_document(api, version)
+        logger.info(f"Loaded {len(self._documents)} Google API discovery documents")
+    
+    def _get_document(self, api: str, version: str) -> Dict:
+        document = self._documents.get((api, version))
+        if document is None:
+            document = json.loads(get_static_doc(api, version))
+            self._documents[(api, version)] = document
+        return document
+    
+    async def get_service(self, owner_id: str, token_version: Optional[str], api: str, version: str, credentials) -> Any:
+        """Get a cached service object, building it in the Google API pool on a miss"""
+        key = (owner_id, api, version)
+        with self._lock:
+            entry = self._services.get(key)
+            if entry is not None and entry[0] == token_version:
+                self._services.move_to_end(key)
+                metrics.increment('google_api.service_cache.hits')
+                return entry[1]
+        
+        metrics.increment('google_api.service_cache.misses')
+        document = self._get_document(api, version)
+        service = await google_api_client.run(
+            build_from_document, document, credentials=credentials, operation=f"{api}.build"
+        )
+        
+        with self._lock:
+            self._services[key] = (token_version, service)
+            self._services.move_to_end(key)
+            while len(self._services) > self.max_size:
+                self._services.popitem(last=False)
+                metrics.increment('google_api.service_cache.evictions')
+        
+        return service
+    
+    def invalidate(self, owner_id: str):
+        """Drop all cached services for an owner (e.g. after a token refresh)"""
+        with self._lock:
+            for key in [k for k in self._services if k[0] == owner_id]:
+                del self._services[key]
+    
+    def clear(self):
+        """Drop all cached services"""
+        with self._lock:
+            self._services.clear()
+
+# Global Google API client
+google_api_client = GoogleAPIClient(config.GOOGLE_API_MAX_WORKERS)
+
+# Global Google service object cache
+google_service_cache = GoogleServiceCache(config.GOOGLE_SERVICE_CACHE_SIZE)
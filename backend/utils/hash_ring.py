@@ -0,0 +1,37 @@
+"""Consistent hashing for partitioning keys across nodes"""
+from typing import Iterable, List, Optional
+import bisect
+import hashlib
+
+class HashRing:
+    """Consistent hash ring with virtual nodes
+    
+    Adding or removing a node only moves the keys in the ranges that node
+    owned, so most keys keep their owner when membership changes.
+    """
+    
+    def __init__(self, nodes: Iterable[str] = (), vnodes: int = 64):
+        self.vnodes = vnodes
+        self.nodes = sorted(set(nodes))
+        self._points: List[int] = []
+        self._owners: List[str] = []
+        
+        ring = sorted(
+            (self._hash(f"{node}#{i}"), node)
+            for node in self.nodes
+            for i in range(vnodes)
+        )
+        for point, node in ring:
+            self._points.append(point)
+            self._owners.append(node)
+    
+    @staticmethod
+    def _hash(key: str) -> int:
+        return int.from_bytes(hashlib.md5(key.encode('utf-8')).digest()[:8], 'big')
+    
+    def owner(self, key: str) -> Optional[str]:
+        """Get the node owning ``key`` (None if the ring is empty)"""
+        if not self._points:
+            return None
+        index = bisect.bisect(self._points, self._hash(key)) % len(self._points)
+        return self._owners[index]
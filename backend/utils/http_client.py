@@ -3,6 +3,8 @@ import httpx
 import logging
 from typing import Optional
 
+from config import config
+
 logger = logging.getLogger(__name__)
 
 class HTTPClientPool:
@@ -16,6 +18,7 @@ class HTTPClientPool:
         if self._client is None or self._client.is_closed:
             self._client = httpx.AsyncClient(
                 timeout=30.0,
+                http2=config.HTTP2_ENABLED,  # multiplex concurrent LLM calls over one connection
                 limits=httpx.Limits(
                     max_keepalive_connections=20,
                     max_connections=100,
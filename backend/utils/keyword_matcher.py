@@ -0,0 +1,85 @@
+"""Multi-keyword matching for intent classification"""
+from collections import deque
+from typing import Dict, Iterable, List, Optional, Tuple
+
+class KeywordAutomaton:
+    """Aho-Corasick automaton over lowercase keywords
+    
+    Counts every (possibly overlapping) occurrence of every keyword in one
+    pass over the text, regardless of how many keywords there are. Matching
+    is by substring, like ``keyword in text``.
+    """
+    
+    def __init__(self, keywords: Iterable[Tuple[str, int]]):
+        """Build from ``(keyword, label)`` pairs; a hit counts toward its label"""
+        self._goto: List[Dict[str, int]] = [{}]
+        self._outputs: List[Tuple[int, ...]] = [()]
+        
+        for keyword, label in keywords:
+            keyword = keyword.lower()
+            if not keyword:
+                continue
+            node = 0
+            for char in keyword:
+                next_node = self._goto[node].get(char)
+                if next_node is None:
+                    next_node = len(self._goto)
+                    self._goto[node][char] = next_node
+                    self._goto.append({})
+                    self._outputs.append(())
+                node = next_node
+            self._outputs[node] += (label,)
+        
+        self._fail = [0] * len(self._goto)
+        self._build_failure_links()
+    
+    def _build_failure_links(self):
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, child in self._goto[node].items():
+                queue.append(child)
+                fallback = self._fail[node]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[child] = self._goto[fallback].get(char, 0)
+                # Keywords ending at the fallback also end here
+                self._outputs[child] += self._outputs[self._fail[child]]
+    
+    def count(self, text: str) -> Dict[int, int]:
+        """Hits per label in ``text`` (compared lowercased)"""
+        goto, fail, outputs = self._goto, self._fail, self._outputs
+        counts: Dict[int, int] = {}
+        node = 0
+        for char in text.lower():
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0)
+            if outputs[node]:
+                for label in outputs[node]:
+                    counts[label] = counts.get(label, 0) + 1
+        return counts
+
+class IntentMatcher:
+    """Compiled keyword matcher for one user's active intents"""
+    
+    def __init__(self, intent_docs: List[Dict]):
+        # (intent_id, priority) in the order the intents were loaded
+        self.intents: List[Tuple[str, int]] = [(doc['id'], doc.get('priority', 0)) for doc in intent_docs]
+        self.automaton = KeywordAutomaton(
+            (keyword, index)
+            for index, doc in enumerate(intent_docs)
+            for keyword in set(keyword.lower() for keyword in doc.get('keywords', []))
+        )
+    
+    def hits(self, text: str) -> Dict[str, int]:
+        """Keyword occurrences per intent ID (intents without hits are left out)"""
+        return {self.intents[index][0]: count for index, count in self.automaton.count(text).items()}
+    
+    def best(self, hits: Dict[str, int]) -> Optional[str]:
+        """Highest-priority intent with hits; more hits breaks ties, then load order"""
+        best_id, best_score = None, None
+        for intent_id, priority in self.intents:
+            if intent_id in hits and (best_score is None or (priority, hits[intent_id]) > best_score):
+                best_id, best_score = intent_id, (priority, hits[intent_id])
+        return best_id
@@ -0,0 +1,257 @@
+"""Concurrency, rate limiting, priorities and retries for LLM API calls"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, AsyncIterator, Awaitable, Callable, List, Tuple
+import asyncio
+import heapq
+import itertools
+import random
+import time
+import logging
+
+from config import config
+from exceptions import RateLimitError
+from utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# Priority lanes: lower value is served first
+LANE_INTERACTIVE = 0
+LANE_BACKGROUND = 1
+LANE_NAMES = {LANE_INTERACTIVE: 'interactive', LANE_BACKGROUND: 'background'}
+
+_current_lane: ContextVar[int] = ContextVar('llm_lane', default=LANE_BACKGROUND)
+
+def estimate_tokens(text: str, max_tokens: int) -> int:
+    """Rough token estimate for a request: ~4 characters per prompt token plus the completion budget"""
+    return len(text) // 4 + max_tokens
+
+class TokenBucket:
+    """Token bucket refilled continuously at ``per_minute`` units per minute"""
+    
+    def __init__(self, per_minute: float):
+        self.capacity = per_minute
+        self.rate = per_minute / 60.0
+        self.tokens = per_minute
+        self.updated = time.monotonic()
+    
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+    
+    def wait_time(self, amount: float) -> float:
+        """Seconds until ``amount`` units are available"""
+        self._refill()
+        amount = min(amount, self.capacity)
+        if self.tokens >= amount:
+            return 0.0
+        return (amount - self.tokens) / self.rate
+    
+    def consume(self, amount: float):
+        self._refill()
+        self.tokens -= amount
+    
+    def adjust(self, amount: float):
+        """Give back (positive) or take (negative) units after the real cost is known"""
+        self._refill()
+        self.tokens = min(self.capacity, self.tokens + amount)
+
+class LLMGovernor:
+    """Admission control shared by every LLM call in the process
+    
+    Calls wait for a concurrency slot, then for both the requests-per-minute
+    and tokens-per-minute buckets; the interactive lane goes before the
+    background lane at both steps.
+    Rate-limit responses pause all calls for ``retry-after`` (or a jittered
+    exponential backoff) and the call is retried.
+    """
+    
+    def __init__(self, max_concurrent: int, requests_per_minute: int, tokens_per_minute: int, max_retries: int):
+        self.max_concurrent = max_concurrent
+        self.max_retries = max_retries
+        self._requests = TokenBucket(requests_per_minute)
+        self._tokens = TokenBucket(tokens_per_minute)
+        self._active = 0
+        self._waiters: List[Tuple[int, int, asyncio.Future]] = []
+        self._sequence = itertools.count()
+        self._rate_waiters: List[Tuple[int, int]] = []
+        self._rate_changed = asyncio.Condition()
+        self._paused_until = 0.0
+        metrics.register_gauge('llm.active', lambda: self._active)
+        metrics.register_gauge('llm.waiting', lambda: sum(1 for _, _, f in self._waiters if not f.done()))
+    
+    @staticmethod
+    @contextmanager
+    def lane(lane: int):
+        """Run LLM calls made in this context (and tasks created in it) in ``lane``"""
+        token = _current_lane.set(lane)
+        try:
+            yield
+        finally:
+            _current_lane.reset(token)
+    
+    async def _acquire_slot(self, lane: int):
+        if self._active < self.max_concurrent and not self._waiters:
+            self._active += 1
+            return
+        
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (lane, next(self._sequence), future))
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # The slot was handed over just before cancellation
+                self._release_slot()
+            raise
+    
+    def _release_slot(self):
+        while self._waiters:
+            _, _, future = heapq.heappop(self._waiters)
+            if not future.done():
+                future.set_result(None)
+                return
+        self._active -= 1
+    
+    async def _acquire_rate(self, tokens: int, lane: int):
+        """Wait for the rate buckets; only the first waiter in lane order may consume"""
+        entry = (lane, next(self._sequence))
+        async with self._rate_changed:
+            heapq.heappush(self._rate_waiters, entry)
+            # A higher-priority arrival takes over from a waiter sleeping on the buckets
+            self._rate_changed.notify_all()
+            try:
+                while True:
+                    timeout = None
+                    if self._rate_waiters[0] == entry:
+                        wait = max(
+                            self._paused_until - time.monotonic(),
+                            self._requests.wait_time(1),
+                            self._tokens.wait_time(tokens)
+                        )
+                        if wait <= 0:
+                            self._requests.consume(1)
+                            self._tokens.consume(tokens)
+                            return
+                        metrics.observe('llm.throttle_wait', wait)
+                        timeout = wait
+                    try:
+                        await asyncio.wait_for(self._rate_changed.wait(), timeout)
+                    except asyncio.TimeoutError:
+                        pass
+            finally:
+                self._rate_waiters.remove(entry)
+                heapq.heapify(self._rate_waiters)
+                self._rate_changed.notify_all()
+    
+    def _backoff(self, error: RateLimitError, attempt: int) -> float:
+        if error.retry_after is not None:
+            delay = error.retry_after
+        else:
+            delay = min(config.LLM_RETRY_MAX_DELAY, config.LLM_RETRY_BASE_DELAY * 2 ** attempt)
+        return delay * random.uniform(1.0, 1.25)
+    
+    def _pause(self, error: RateLimitError, attempt: int):
+        """Hold back every call after a rate-limit response"""
+        metrics.increment('llm.rate_limited')
+        delay = self._backoff(error, attempt)
+        self._paused_until = max(self._paused_until, time.monotonic() + delay)
+        logger.warning(f"LLM rate limited, retrying in {delay:.1f}s (attempt {attempt + 1})")
+    
+    async def run(self, call: Callable[[], Awaitable[Any]], estimated_tokens: int, operation: str = 'generate') -> Any:
+        """Run an LLM call under the governor
+        
+        If the result is a ``(content, tokens)`` tuple the token bucket is
+        corrected with the actual usage.
+        """
+        lane_name = LANE_NAMES[_current_lane.get()]
+        submitted_at = time.perf_counter()
+        
+        await self._acquire_slot(_current_lane.get())
+        try:
+            for attempt in range(self.max_retries + 1):
+                await self._acquire_rate(estimated_tokens, _current_lane.get())
+                if attempt == 0:
+                    metrics.observe(f"llm.{lane_name}.queue_wait", time.perf_counter() - submitted_at)
+                
+                started_at = time.perf_counter()
+                try:
+                    result = await call()
+                except RateLimitError as e:
+                    if attempt >= self.max_retries:
+                        metrics.increment('llm.rate_limited')
+                        raise
+                    self._pause(e, attempt)
+                    continue
+                except Exception:
+                    metrics.increment(f"llm.{operation}.errors")
+                    raise
+                finally:
+                    metrics.observe(f"llm.{operation}.latency", time.perf_counter() - started_at)
+                
+                if isinstance(result, tuple) and len(result) == 2 and isinstance(result[1], int):
+                    self._tokens.adjust(estimated_tokens - result[1])
+                    metrics.increment('llm.tokens', result[1])
+                metrics.increment(f"llm.{lane_name}.requests")
+                return result
+        finally:
+            self._release_slot()
+    
+    async def stream(
+        self,
+        open_stream: Callable[[], AsyncIterator[Tuple[str, int]]],
+        estimated_tokens: int,
+        operation: str = 'stream'
+    ) -> AsyncIterator[Tuple[str, int]]:
+        """Run a streaming LLM call under the governor, holding a slot until it ends
+        
+        ``open_stream`` yields ``(text, tokens)`` chunks; a non-zero ``tokens``
+        reports the total usage and corrects the token bucket. Rate limits are
+        retried only before the first chunk arrives.
+        """
+        lane_name = LANE_NAMES[_current_lane.get()]
+        submitted_at = time.perf_counter()
+        
+        await self._acquire_slot(_current_lane.get())
+        try:
+            for attempt in range(self.max_retries + 1):
+                await self._acquire_rate(estimated_tokens, _current_lane.get())
+                if attempt == 0:
+                    metrics.observe(f"llm.{lane_name}.queue_wait", time.perf_counter() - submitted_at)
+                
+                started_at = time.perf_counter()
+                first_chunk = True
+                try:
+                    async for text, tokens in open_stream():
+                        if first_chunk:
+                            metrics.observe(f"llm.{operation}.first_token", time.perf_counter() - started_at)
+                            first_chunk = False
+                        if tokens:
+                            self._tokens.adjust(estimated_tokens - tokens)
+                            metrics.increment('llm.tokens', tokens)
+                        yield text, tokens
+                except RateLimitError as e:
+                    if not first_chunk or attempt >= self.max_retries:
+                        metrics.increment('llm.rate_limited')
+                        raise
+                    self._pause(e, attempt)
+                    continue
+                except Exception:
+                    metrics.increment(f"llm.{operation}.errors")
+                    raise
+                finally:
+                    metrics.observe(f"llm.{operation}.latency", time.perf_counter() - started_at)
+                
+                metrics.increment(f"llm.{lane_name}.requests")
+                return
+        finally:
+            self._release_slot()
+
+# Global LLM governor
+llm_governor = LLMGovernor(
+    max_concurrent=config.LLM_MAX_CONCURRENT,
+    requests_per_minute=config.LLM_REQUESTS_PER_MINUTE,
+    tokens_per_minute=config.LLM_TOKENS_PER_MINUTE,
+    max_retries=config.LLM_MAX_RETRIES
+)
@@ -0,0 +1,95 @@
+"""In-process metrics for external calls and background work"""
+from typing import Dict, Callable
+from collections import deque
+from contextlib import contextmanager
+import threading
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+class MetricsRegistry:
+    """Thread-safe counters, gauges and latency summaries"""
+    
+    def __init__(self, sample_size: int = 512):
+        self._lock = threading.Lock()
+        self._sample_size = sample_size
+        self._counters: Dict[str, float] = {}
+        self._gauges: Dict[str, float] = {}
+        self._gauge_callbacks: Dict[str, Callable[[], float]] = {}
+        self._timings: Dict[str, Dict] = {}
+    
+    def increment(self, name: str, value: float = 1):
+        """Increment a counter"""
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + value
+    
+    def set_gauge(self, name: str, value: float):
+        """Set a gauge to an absolute value"""
+        with self._lock:
+            self._gauges[name] = value
+    
+    def register_gauge(self, name: str, callback: Callable[[], float]):
+        """Register a gauge evaluated lazily when a snapshot is taken"""
+        with self._lock:
+            self._gauge_callbacks[name] = callback
+    
+    def observe(self, name: str, seconds: float):
+        """Record a duration in seconds"""
+        with self._lock:
+            timing = self._timings.get(name)
+            if timing is None:
+                timing = {'count': 0, 'total': 0.0, 'max': 0.0, 'samples': deque(maxlen=self._sample_size)}
+                self._timings[name] = timing
+            timing['count'] += 1
+            timing['total'] += seconds
+            timing['max'] = max(timing['max'], seconds)
+            timing['samples'].append(seconds)
+    
+    @contextmanager
+    def timer(self, name: str):
+        """Context manager recording the duration of the wrapped block"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start)
+    
+    def snapshot(self) -> Dict:
+        """Get a point-in-time view of all metrics (durations in milliseconds)"""
+        with self._lock:
+            counters = dict(self._counters)
+            gauges = dict(self._gauges)
+            callbacks = dict(self._gauge_callbacks)
+            timings = {
+                name: (timing['count'], timing['total'], timing['max'], sorted(timing['samples']))
+                for name, timing in self._timings.items()
+            }
+        
+        for name, callback in callbacks.items():
+            try:
+                gauges[name] = callback()
+            except Exception as e:
+                logger.error(f"Error evaluating gauge {name}: {e}")
+        
+        latencies = {}
+        for name, (count, total, maximum, samples) in timings.items():
+            latencies[name] = {
+                'count': count,
+                'avg_ms': round(total / count * 1000, 2) if count else 0.0,
+                'p50_ms': round(self._percentile(samples, 0.50) * 1000, 2),
+                'p95_ms': round(self._percentile(samples, 0.95) * 1000, 2),
+                'max_ms': round(maximum * 1000, 2)
+            }
+        
+        return {'counters': counters, 'gauges': gauges, 'latencies': latencies}
+    
+    @staticmethod
+    def _percentile(samples, fraction: float) -> float:
+        if not samples:
+            return 0.0
+        index = min(len(samples) - 1, int(round(fraction * (len(samples) - 1))))
+        return samples[index]
+
+# Global metrics registry
+metrics = MetricsRegistry()
@@ -3,14 +3,29 @@ import asyncio
 from motor.motor_asyncio import AsyncIOMotorClient
 import logging
 import os
-from datetime import datetime, timezone
+from datetime import datetime, timezone, timedelta
+from typing import Dict, Optional
+import random
 
 from config import config
 from services.email_service import EmailService
-from services.ai_agent_service import AIAgentService
+from services.ai_agent_service_v2 import AIAgentServiceV2
+from services.user_config import user_config_cache
+from services.knowledge_chunks import knowledge_chunker
 from services.calendar_service import CalendarService
+from services.imap_session import imap_session_manager, IMAPIdleSupervisor
+from services.smtp_pool import smtp_pool
+from utils.executors import imap_executor, smtp_executor
+from utils.cache import cache_service
 from models.email_account import EmailAccount
 from models.email import Email
+from repositories.indexes import ensure_indexes
+from workers.processing_queue import ProcessingQueue
+from workers.stage_graph import StageGraph
+from workers.leases import LeaseManager
+from workers.membership import WorkerMembership
+from workers.poll_scheduler import PollScheduler
+from workers.rounds import RoundCoordinator
 
 logger = logging.getLogger(__name__)
 
@@ -18,16 +33,20 @@ logger = logging.getLogger(__name__)
 client = AsyncIOMotorClient(config.MONGO_URL)
 db = client[config.DB_NAME]
 
-async def poll_email_account(account_id: str):
-    """Poll single email account for new emails"""
+IMAP_ACCOUNT_TYPES = ['app_password_gmail', 'custom_smtp']
+
+async def poll_email_account(account_id: str) -> Optional[int]:
+    """Poll single email account for new emails
+    
+    Returns the number of new emails stored, or None if the poll failed.
+    """
     try:
         email_service = EmailService(db)
-        ai_service = AIAgentService(db)
         
         # Get account
         account = await email_service.get_account(account_id)
         if not account or not account.is_active:
-            return
+            return 0
         
         logger.info(f"Polling account {account.email}")
         
@@ -41,41 +60,34 @@ async def poll_email_account(account_id: str):
         emails = []
         if account.account_type == 'oauth_gmail':
             emails = await email_service.fetch_emails_oauth_gmail(account)
-        elif account.account_type in ['app_password_gmail', 'custom_smtp']:
+        elif account.account_type in IMAP_ACCOUNT_TYPES:
             emails = await email_service.fetch_emails_imap(account)
         
         logger.info(f"Found {len(emails)} new emails for {account.email}")
         
-        # Process each email
-        for email_data in emails:
-            # Check if email already exists
-            existing = await db.emails.find_one({
-                "email_account_id": account_id,
-                "message_id": email_data['message_id']
-            })
-            
-            if existing:
-                continue
-            
-            # Save email
-            email_obj = await email_service.save_email(
-                account.user_id,
-                account_id,
-                email_data
-            )
-            
-            # Process email asynchronously
-            await process_email(email_obj.id)
+        # Store new emails in bulk (dedup + unordered insert), then queue them for processing
+        new_emails = await email_service.save_new_emails(account.user_id, account_id, emails)
+        
+        for email_obj in new_emails:
+            await processing_queue.submit(email_obj.id)
+        
+        # Update sync status (and persist the sync cursors now that emails are stored)
+        sync_update = {
+            "sync_status": "success",
+            "last_sync": datetime.now(timezone.utc).isoformat(),
+            "error_message": None
+        }
+        if account.gmail_history_id:
+            sync_update["gmail_history_id"] = account.gmail_history_id
+        if account.imap_last_uid is not None:
+            sync_update["imap_uidvalidity"] = account.imap_uidvalidity
+            sync_update["imap_last_uid"] = account.imap_last_uid
         
-        # Update sync status
         await db.email_accounts.update_one(
             {"id": account_id},
-            {"$set": {
-                "sync_status": "success",
-                "last_sync": datetime.now(timezone.utc).isoformat(),
-                "error_message": None
-            }}
+            {"$set": sync_update}
         )
+        return len(new_emails)
     except Exception as e:
         logger.error(f"Error polling account {account_id}: {e}")
         await db.email_accounts.update_one(
@@ -85,43 +97,40 @@ async def poll_email_account(account_id: str):
                 "error_message": str(e)
             }}
         )
+        return None
 
 async def process_email(email_id: str):
-    """Process email with AI agents"""
+    """Process email with AI agents, unless another worker holds its lease"""
+    email_doc = await email_leases.claim({"id": email_id, "processed": False})
+    if not email_doc:
+        return
+    
     try:
-        ai_service = AIAgentService(db)
+        async with email_leases.heartbeat(email_id):
+            await run_email_pipeline(Email(**email_doc))
+    finally:
+        await email_leases.release(email_id)
+
+async def run_email_pipeline(email: Email):
+    """Run the AI pipeline for a claimed email"""
+    email_id = email.id
+    try:
+        ai_service = AIAgentServiceV2.for_database(db)
         calendar_service = CalendarService(db)
         
-        # Get email
-        email_doc = await db.emails.find_one({"id": email_id})
-        if not email_doc:
-            return
-        
-        email = Email(**email_doc)
-        
-        if email.processed:
-            return
-        
         logger.info(f"Processing email {email.id}")
         
-        # Step 1: Classify intent
-        intent_id, intent_confidence = await ai_service.classify_intent(email, email.user_id)
+        async def classify_intent():
+            return await ai_service.classify_intent(email, email.user_id)
         
-        # Step 2: Detect meeting
-        is_meeting, meeting_confidence, meeting_details = await ai_service.detect_meeting(email)
+        async def detect_meeting():
+            return await ai_service.detect_meeting(email)
         
-        # Update email
-        update_data = {
-            "processed": True,
-            "intent_detected": intent_id,
-            "intent_confidence": intent_confidence,
-            "meeting_detected": is_meeting,
-            "meeting_confidence": meeting_confidence,
-            "updated_at": datetime.now(timezone.utc).isoformat()
-        }
-        
-        # Step 3: If meeting detected, create calendar event
-        if is_meeting and meeting_confidence >= config.MEETING_CONFIDENCE_THRESHOLD and meeting_details:
+        async def schedule_meeting(meeting):
+            is_meeting, meeting_confidence, meeting_details = meeting
+            if not (is_meeting and meeting_confidence >= config.MEETING_CONFIDENCE_THRESHOLD and meeting_details):
+                return
+            
             # Get user's calendar provider
             provider_doc = await db.calendar_providers.find_one({
                 "user_id": email.user_id,
@@ -158,33 +167,45 @@ async def process_email(email_id: str):
                         
                         logger.info(f"Created calendar event for email {email.id}")
         
-        # Step 4: Generate draft
-        draft, tokens = await ai_service.generate_draft(email, email.user_id, intent_id)
+        async def generate_draft(classify):
+            intent_id, _ = classify
+            return await ai_service.generate_draft(email, email.user_id, intent_id)
         
-        update_data['draft_generated'] = True
-        update_data['draft_content'] = draft
-        update_data['tokens_used'] = tokens
+        async def validate_draft(classify, draft):
+            intent_id, _ = classify
+            return await ai_service.validate_draft(draft[0], email, intent_id)
         
-        # Step 5: Validate draft
-        valid, issues = await ai_service.validate_draft(draft, email, email.user_id, intent_id)
+        # Meeting detection and scheduling run alongside classify -> draft -> validate
+        stages = StageGraph('processing.stage')
+        stages.add('classify', classify_intent)
+        stages.add('meeting', detect_meeting)
+        stages.add('calendar', schedule_meeting, depends_on=['meeting'])
+        stages.add('draft', generate_draft, depends_on=['classify'])
+        stages.add('validate', validate_draft, depends_on=['classify', 'draft'])
+        results, stage_timings = await stages.run()
         
-        update_data['draft_validated'] = valid
-        update_data['validation_issues'] = issues
+        intent_id, intent_confidence = results['classify']
+        is_meeting, meeting_confidence, _ = results['meeting']
+        draft, _ = results['draft']
+        valid, issues = results['validate']
         
-        if valid:
-            update_data['status'] = 'draft_ready'
-        else:
-            update_data['status'] = 'escalated'
+        email_service = EmailService(db)
+        # Meeting detection, draft and validation tokens all count toward the email
+        update_data = EmailService.draft_result(intent_id, intent_confidence, draft, valid, issues, ai_service.get_tokens_used())
+        update_data.update({
+            "processed": True,
+            "meeting_detected": is_meeting,
+            "meeting_confidence": meeting_confidence,
+            "stage_timings": stage_timings
+        })
         
         # Step 6: Auto-send if intent allows
         if intent_id and valid:
-            intent_doc = await db.intents.find_one({"id": intent_id})
+            intent_doc = (await user_config_cache.get(db, email.user_id)).intents.get(intent_id)
             if intent_doc and intent_doc.get('auto_send'):
                 # Auto-send reply
-                from services.email_service import EmailService
                 from models.email import EmailSend
                 
-                email_service = EmailService(db)
                 account = await email_service.get_account(email.email_account_id)
                 
                 if account:
@@ -207,15 +228,8 @@ async def process_email(email_id: str):
                         update_data['reply_sent_at'] = datetime.now(timezone.utc).isoformat()
                         logger.info(f"Auto-sent reply for email {email.id}")
         
-        # Update email in DB
-        await db.emails.update_one({"id": email_id}, {"$set": update_data})
-        
-        # Track tokens for user
-        if tokens > 0:
-            await db.users.update_one(
-                {"id": email.user_id},
-                {"$inc": {"tokens_used": tokens}}
-            )
+        # Update email in DB and bill the tokens to the user
+        await email_service.save_draft_result(email, update_data)
         
         logger.info(f"Email {email.id} processed successfully")
     except Exception as e:
@@ -229,101 +243,244 @@ async def process_email(email_id: str):
             }}
         )
 
+# Leases let any number of worker processes split accounts, emails and scheduled sends
+account_leases = LeaseManager(db.email_accounts, config.WORKER_ID, config.LEASE_TTL)
+email_leases = LeaseManager(db.emails, config.WORKER_ID, config.LEASE_TTL)
+follow_up_leases = LeaseManager(db.follow_ups, config.WORKER_ID, config.LEASE_TTL)
+event_leases = LeaseManager(db.calendar_events, config.WORKER_ID, config.LEASE_TTL)
+
+# Consistent-hash ownership of accounts across the worker fleet (WORKER_SHARDING_ENABLED)
+worker_membership = WorkerMembership(
+    db.worker_members, config.WORKER_ID, config.WORKER_MEMBERSHIP_TTL, config.HASH_RING_VNODES
+)
+
+# Pollers enqueue new emails; a bounded pool of workers runs the AI pipeline
+processing_queue = ProcessingQueue(process_email, config.PROCESSING_WORKERS, config.PROCESSING_QUEUE_SIZE)
+
+async def poll_due_accounts():
+    """Start polls for accounts whose next poll is due (called every scheduler tick)"""
+    try:
+        if poll_scheduler.needs_resync():
+            if config.WORKER_SHARDING_ENABLED:
+                await worker_membership.refresh()
+                await poll_scheduler.resync(worker_membership.owns)
+            else:
+                await poll_scheduler.resync()
+        poll_scheduler.start_due()
+    except Exception as e:
+        logger.error(f"Error scheduling account polls: {e}")
+
 async def poll_all_accounts():
-    """Poll all active email accounts"""
+    """Make every active account due for polling right away"""
     try:
-        accounts = await db.email_accounts.find({"is_active": True}).to_list(1000)
-        
-        logger.info(f"Polling {len(accounts)} active accounts")
-        
-        tasks = [poll_email_account(account['id']) for account in accounts]
-        await asyncio.gather(*tasks, return_exceptions=True)
+        now = datetime.now(timezone.utc).isoformat()
+        result = await db.email_accounts.update_many({"is_active": True}, {"$set": {"next_poll_at": now}})
+        poll_scheduler.request_resync()
+        logger.info(f"Scheduled immediate poll of {result.modified_count} accounts")
     except Exception as e:
         logger.error(f"Error polling all accounts: {e}")
 
+async def poll_scheduled_account(account_id: str, forced: bool = False) -> datetime:
+    """Poll a due (or ``forced``) account unless another worker got to it first; returns its next poll time"""
+    now = datetime.now(timezone.utc)
+    filters = {"id": account_id, "is_active": True}
+    if not forced:
+        filters["$or"] = [{"next_poll_at": None}, {"next_poll_at": {"$lte": now.isoformat()}}]
+    
+    account_doc = await account_leases.claim(filters)
+    if account_doc is None:
+        # Polled or being polled elsewhere; a resync picks up its real schedule
+        return now + timedelta(seconds=config.POLL_MIN_INTERVAL)
+    return await poll_leased_account(account_doc)
+
+# Accounts are polled when due, at an interval adapted to their traffic
+poll_scheduler = PollScheduler(
+    db.email_accounts, poll_scheduled_account, config.POLL_MAX_CONCURRENT, config.POLL_RESYNC_INTERVAL
+)
+
+async def poll_leased_account(account_doc: Dict) -> datetime:
+    """Poll an account this worker has leased, then release it until its next poll is due"""
+    new_emails = None
+    try:
+        async with account_leases.heartbeat(account_doc['id']):
+            new_emails = await poll_email_account(account_doc['id'])
+    finally:
+        schedule = next_poll_schedule(account_doc, new_emails)
+        await account_leases.release(account_doc['id'], schedule)
+    return datetime.fromisoformat(schedule['next_poll_at'])
+
+def next_poll_schedule(account_doc: Dict, new_emails: Optional[int]) -> Dict:
+    """Adapt an account's poll interval to its mail arrival rate
+    
+    The interval halves when new mail arrived and grows by POLL_BACKOFF_FACTOR
+    when none did, within [POLL_MIN_INTERVAL, POLL_MAX_INTERVAL]. Failed
+    polls back off exponentially. Jitter spreads accounts apart.
+    """
+    interval = account_doc.get('poll_interval') or config.EMAIL_POLL_INTERVAL
+    errors = account_doc.get('poll_error_count') or 0
+    
+    if new_emails is None:
+        errors += 1
+        delay = min(config.POLL_ERROR_MAX_INTERVAL, interval * 2 ** errors)
+    else:
+        errors = 0
+        if new_emails:
+            interval = max(config.POLL_MIN_INTERVAL, interval / 2)
+        else:
+            interval = min(config.POLL_MAX_INTERVAL, interval * config.POLL_BACKOFF_FACTOR)
+        delay = interval
+    
+    delay *= random.uniform(1 - config.POLL_JITTER, 1 + config.POLL_JITTER)
+    next_poll_at = datetime.now(timezone.utc) + timedelta(seconds=delay)
+    return {
+        "next_poll_at": next_poll_at.isoformat(),
+        "poll_interval": interval,
+        "poll_error_count": errors
+    }
+
+async def poll_account_now(account_id: str):
+    """Poll an account right away (coalesced with a poll already in flight)"""
+    poll_scheduler.request_poll(account_id)
+
+async def requeue_unprocessed_emails():
+    """Queue unprocessed emails left behind by a worker that stopped or crashed
+    
+    Emails still waiting in this process's queue are skipped, and queueing
+    stops when the queue is full (the next round picks up the rest), so a
+    normal backlog is neither duplicated nor able to stall this task.
+    """
+    try:
+        cutoff = datetime.now(timezone.utc) - timedelta(seconds=config.PROCESSING_RECOVERY_AGE)
+        docs = await db.emails.find({
+            "id": {"$nin": processing_queue.pending_ids()},
+            "processed": False,
+            "created_at": {"$lte": cutoff.isoformat()},
+            "$or": [{"lease_owner": None}, {"lease_expires_at": {"$lte": datetime.now(timezone.utc).isoformat()}}]
+        }, {"_id": 0, "id": 1}).to_list(config.PROCESSING_QUEUE_SIZE)
+        
+        requeued = 0
+        for doc in docs:
+            if processing_queue.is_pending(doc['id']):
+                continue
+            if not await processing_queue.submit(doc['id'], wait=False):
+                break
+            requeued += 1
+        
+        if requeued:
+            logger.info(f"Requeued {requeued} unprocessed emails")
+    except Exception as e:
+        logger.error(f"Error requeueing unprocessed emails: {e}")
+
+async def maintain_mail_sessions():
+    """Expire pooled IMAP/SMTP connections and keep IDLE watchers in sync with active accounts"""
+    try:
+        closed = await imap_executor.run(
+            imap_session_manager.close_unused, config.IMAP_SESSION_MAX_IDLE, operation='maintain'
+        )
+        if closed:
+            logger.info(f"Closed {closed} unused IMAP sessions")
+        
+        closed = await smtp_executor.run(smtp_pool.maintain, operation='maintain')
+        if closed:
+            logger.info(f"Closed {closed} idle SMTP connections")
+        
+        if config.IMAP_IDLE_ENABLED:
+            docs = await db.email_accounts.find({
+                "is_active": True,
+                "account_type": {"$in": IMAP_ACCOUNT_TYPES}
+            }).to_list(config.IMAP_IDLE_MAX_ACCOUNTS)
+            if config.WORKER_SHARDING_ENABLED:
+                docs = [doc for doc in docs if worker_membership.owns(doc['id'])]
+            imap_idle_supervisor.sync([EmailAccount(**doc) for doc in docs])
+    except Exception as e:
+        logger.error(f"Error maintaining mail sessions: {e}")
+
+# New mail reported through IMAP IDLE triggers an immediate poll of that account
+imap_idle_supervisor = IMAPIdleSupervisor(imap_session_manager, poll_account_now, config.IMAP_IDLE_MAX_ACCOUNTS)
+
 async def check_follow_ups():
     """Check and send scheduled follow-ups"""
     try:
         now = datetime.now(timezone.utc).isoformat()
         
-        # Get pending follow-ups
-        follow_ups = await db.follow_ups.find({
-            "status": "pending",
-            "scheduled_at": {"$lte": now}
-        }).to_list(100)
-        
-        logger.info(f"Found {len(follow_ups)} follow-ups to send")
-        
         email_service = EmailService(db)
         
-        for follow_up_doc in follow_ups:
-            from models.follow_up import FollowUp
-            from models.email import EmailSend
-            
-            follow_up = FollowUp(**follow_up_doc)
-            
-            # Get account
-            account = await email_service.get_account(follow_up.email_account_id)
-            if not account:
-                continue
-            
-            # Get original email
-            email_doc = await db.emails.find_one({"id": follow_up.email_id})
-            if not email_doc:
-                continue
-            
-            email = Email(**email_doc)
-            
-            # Send follow-up
-            follow_up_email = EmailSend(
-                email_account_id=follow_up.email_account_id,
-                to_email=[email.from_email],
-                subject=follow_up.subject,
-                body=follow_up.body
-            )
-            
-            sent = False
-            if account.account_type == 'oauth_gmail':
-                sent = await email_service.send_email_oauth_gmail(account, follow_up_email)
-            else:
-                sent = await email_service.send_email_smtp(account, follow_up_email)
-            
-            if sent:
-                await db.follow_ups.update_one(
-                    {"id": follow_up.id},
-                    {"$set": {
-                        "status": "sent",
-                        "sent_at": datetime.now(timezone.utc).isoformat()
-                    }}
-                )
-                logger.info(f"Sent follow-up {follow_up.id}")
+        # Claim pending follow-ups one by one so each is sent by a single worker
+        async for follow_up_doc in follow_up_leases.claim_many({
+            "status": "pending",
+            "scheduled_at": {"$lte": now}
+        }, 100):
+            try:
+                await send_follow_up(follow_up_doc, email_service)
+            finally:
+                await follow_up_leases.release(follow_up_doc['id'])
     except Exception as e:
         logger.error(f"Error checking follow-ups: {e}")
 
+async def send_follow_up(follow_up_doc: dict, email_service: EmailService):
+    """Send one claimed follow-up"""
+    from models.follow_up import FollowUp
+    from models.email import EmailSend
+    
+    follow_up = FollowUp(**follow_up_doc)
+    
+    # Get account
+    account = await email_service.get_account(follow_up.email_account_id)
+    if not account:
+        return
+    
+    # Get original email
+    email_doc = await db.emails.find_one({"id": follow_up.email_id})
+    if not email_doc:
+        return
+    
+    email = Email(**email_doc)
+    
+    # Send follow-up
+    follow_up_email = EmailSend(
+        email_account_id=follow_up.email_account_id,
+        to_email=[email.from_email],
+        subject=follow_up.subject,
+        body=follow_up.body
+    )
+    
+    sent = False
+    if account.account_type == 'oauth_gmail':
+        sent = await email_service.send_email_oauth_gmail(account, follow_up_email)
+    else:
+        sent = await email_service.send_email_smtp(account, follow_up_email)
+    
+    if sent:
+        await db.follow_ups.update_one(
+            {"id": follow_up.id},
+            {"$set": {
+                "status": "sent",
+                "sent_at": datetime.now(timezone.utc).isoformat()
+            }}
+        )
+        logger.info(f"Sent follow-up {follow_up.id}")
+
 async def check_reminders():
     """Check and send calendar reminders"""
     try:
-        from datetime import timedelta
-        
         now = datetime.now(timezone.utc)
         reminder_time = (now + timedelta(hours=1)).isoformat()
         
-        # Get events starting in ~1 hour that haven't had reminders sent
-        events = await db.calendar_events.find({
-            "start_time": {"$gte": now.isoformat(), "$lte": reminder_time},
-            "reminder_sent": False
-        }).to_list(100)
-        
-        logger.info(f"Found {len(events)} events needing reminders")
-        
         calendar_service = CalendarService(db)
         email_service = EmailService(db)
         
         from models.calendar import CalendarEvent
         
-        for event_doc in events:
-            event = CalendarEvent(**event_doc)
-            await calendar_service.send_reminder(event, email_service, event.user_id)
+        # Claim events starting in ~1 hour that haven't had reminders sent
+        async for event_doc in event_leases.claim_many({
+            "start_time": {"$gte": now.isoformat(), "$lte": reminder_time},
+            "reminder_sent": False
+        }, 100):
+            try:
+                event = CalendarEvent(**event_doc)
+                await calendar_service.send_reminder(event, email_service, event.user_id)
+            finally:
+                await event_leases.release(event_doc['id'])
     except Exception as e:
         logger.error(f"Error checking reminders: {e}")
 
@@ -332,34 +489,56 @@ async def run_worker():
     """Main worker loop"""
     logger.info("Starting email worker...")
     
+    from utils.google_api import google_service_cache
+    google_service_cache.load_discovery_documents()
+    await ensure_indexes(db)
+    user_config_cache.start_watching(db)
+    asyncio.create_task(knowledge_chunker.backfill(db))
+    
     poll_counter = 0
     follow_up_counter = 0
     reminder_counter = 0
+    rounds = RoundCoordinator('worker')
     
-    while True:
-        try:
-            # Poll emails every 60 seconds
-            if poll_counter % config.EMAIL_POLL_INTERVAL == 0:
-                await poll_all_accounts()
-                poll_counter = 0
-            
-            # Check follow-ups every 5 minutes
-            if follow_up_counter % config.FOLLOW_UP_CHECK_INTERVAL == 0:
-                await check_follow_ups()
-                follow_up_counter = 0
-            
-            # Check reminders every hour
-            if reminder_counter % config.REMINDER_CHECK_INTERVAL == 0:
-                await check_reminders()
-                reminder_counter = 0
-            
-            await asyncio.sleep(1)
-            poll_counter += 1
-            follow_up_counter += 1
-            reminder_counter += 1
-        except Exception as e:
-            logger.error(f"Worker error: {e}")
-            await asyncio.sleep(5)
+    processing_queue.start()
+    try:
+        while True:
+            try:
+                # Poll accounts as they come due
+                rounds.start('poll', poll_due_accounts)
+                
+                # Maintain mail sessions and recover stuck emails every 60 seconds
+                if poll_counter % config.EMAIL_POLL_INTERVAL == 0:
+                    rounds.start('maintain_sessions', maintain_mail_sessions)
+                    rounds.start('requeue', requeue_unprocessed_emails)
+                    poll_counter = 0
+                
+                # Check follow-ups every 5 minutes
+                if follow_up_counter % config.FOLLOW_UP_CHECK_INTERVAL == 0:
+                    rounds.start('follow_ups', check_follow_ups)
+                    follow_up_counter = 0
+                
+                # Check reminders every hour
+                if reminder_counter % config.REMINDER_CHECK_INTERVAL == 0:
+                    rounds.start('reminders', check_reminders)
+                    reminder_counter = 0
+                
+                await rounds.sleep()
+                poll_counter += 1
+                follow_up_counter += 1
+                reminder_counter += 1
+            except Exception as e:
+                logger.error(f"Worker error: {e}")
+                await asyncio.sleep(5)
+    finally:
+        await rounds.stop()
+        await poll_scheduler.stop()
+        imap_idle_supervisor.stop()
+        await processing_queue.drain(config.PROCESSING_DRAIN_TIMEOUT)
+        if config.WORKER_SHARDING_ENABLED:
+            await worker_membership.leave()
+        await user_config_cache.stop()
+        await cache_service.close()
 
 if __name__ == "__main__":
     logging.basicConfig(
@@ -0,0 +1,55 @@
+"""Worker fleet membership and consistent-hash ownership of email accounts"""
+from datetime import datetime, timezone, timedelta
+from motor.motor_asyncio import AsyncIOMotorCollection
+import logging
+
+from utils.hash_ring import HashRing
+from utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+class WorkerMembership:
+    """Tracks live workers in a Mongo collection and maps accounts to owners
+    
+    Each worker heartbeats its own document; workers whose heartbeat is older
+    than ``ttl`` are considered gone. Accounts are assigned to live workers
+    on a consistent hash ring, so an account keeps its owner (and that
+    node's warm IMAP/SMTP sessions and token caches) until the fleet changes.
+    """
+    
+    def __init__(self, collection: AsyncIOMotorCollection, worker_id: str, ttl: float, vnodes: int):
+        self.collection = collection
+        self.worker_id = worker_id
+        self.ttl = ttl
+        self.vnodes = vnodes
+        self.ring = HashRing([worker_id], vnodes)
+        metrics.register_gauge('workers.members', lambda: len(self.ring.nodes))
+    
+    async def refresh(self) -> HashRing:
+        """Heartbeat this worker, drop expired members and rebuild the ring if membership changed"""
+        now = datetime.now(timezone.utc)
+        cutoff = (now - timedelta(seconds=self.ttl)).isoformat()
+        
+        await self.collection.update_one(
+            {"id": self.worker_id},
+            {"$set": {"last_seen": now.isoformat()}, "$setOnInsert": {"joined_at": now.isoformat()}},
+            upsert=True
+        )
+        await self.collection.delete_many({"last_seen": {"$lt": cutoff}})
+        
+        docs = await self.collection.find({}, {"_id": 0, "id": 1}).to_list(None)
+        members = sorted({doc['id'] for doc in docs} | {self.worker_id})
+        
+        if members != self.ring.nodes:
+            logger.info(f"Worker membership changed: {len(self.ring.nodes)} -> {len(members)} workers, rebalancing accounts")
+            metrics.increment('workers.rebalances')
+            self.ring = HashRing(members, self.vnodes)
+        return self.ring
+    
+    def owns(self, account_id: str) -> bool:
+        """Check whether this worker owns an account on the current ring"""
+        return self.ring.owner(account_id) == self.worker_id
+    
+    async def leave(self):
+        """Remove this worker so its accounts move to the others right away"""
+        await self.collection.delete_one({"id": self.worker_id})
@@ -0,0 +1,128 @@
+"""Per-account poll scheduling on a min-heap keyed by next poll time"""
+from datetime import datetime, timezone
+from typing import Awaitable, Callable, Dict, List, Optional, Set, Tuple
+from motor.motor_asyncio import AsyncIOMotorCollection
+import asyncio
+import heapq
+import time
+import logging
+
+from utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+class PollScheduler:
+    """Starts account polls when their ``next_poll_at`` comes due
+    
+    Accounts are streamed from Mongo with a cursor (no fixed cap) into a
+    min-heap every ``resync_interval`` seconds, which also picks up new
+    accounts and schedules changed by other workers. ``poll`` polls one
+    account and returns when it should be polled next; at most
+    ``max_concurrent`` polls run at once. An account is never polled twice
+    concurrently: a poll requested while one is in flight is coalesced into
+    a single follow-up poll.
+    """
+    
+    def __init__(
+        self,
+        collection: AsyncIOMotorCollection,
+        poll: Callable[[str, bool], Awaitable[datetime]],
+        max_concurrent: int,
+        resync_interval: float
+    ):
+        self.collection = collection
+        self.poll = poll
+        self.max_concurrent = max_concurrent
+        self.resync_interval = resync_interval
+        self._heap: List[Tuple[float, str]] = []
+        self._due_at: Dict[str, float] = {}
+        self._in_flight: Set[str] = set()
+        self._forced: Set[str] = set()
+        self._tasks: Set[asyncio.Task] = set()
+        self._last_resync = 0.0
+        metrics.register_gauge('scheduler.accounts', lambda: len(self._due_at))
+        metrics.register_gauge('scheduler.in_flight', lambda: len(self._in_flight))
+    
+    def needs_resync(self) -> bool:
+        return time.time() - self._last_resync >= self.resync_interval
+    
+    def request_resync(self):
+        """Reload accounts from the database on the next tick"""
+        self._last_resync = 0.0
+    
+    async def resync(self, owns: Optional[Callable[[str], bool]] = None):
+        """Rebuild the heap from active accounts (optionally only those ``owns`` accepts)"""
+        now = time.time()
+        due_at = {}
+        cursor = self.collection.find({"is_active": True}, {"_id": 0, "id": 1, "next_poll_at": 1})
+        async for doc in cursor:
+            if owns is not None and not owns(doc['id']):
+                continue
+            next_poll_at = doc.get('next_poll_at')
+            due_at[doc['id']] = datetime.fromisoformat(next_poll_at).timestamp() if next_poll_at else now
+        
+        self._due_at = due_at
+        self._heap = [(due, account_id) for account_id, due in due_at.items() if account_id not in self._in_flight]
+        heapq.heapify(self._heap)
+        self._last_resync = time.time()
+        logger.info(f"Poll scheduler tracking {len(due_at)} accounts")
+    
+    def schedule(self, account_id: str, due: datetime):
+        """(Re)schedule an account's next poll"""
+        timestamp = due.timestamp()
+        self._due_at[account_id] = timestamp
+        if account_id not in self._in_flight:
+            heapq.heappush(self._heap, (timestamp, account_id))
+    
+    def request_poll(self, account_id: str):
+        """Poll an account as soon as possible, even if it is not due yet"""
+        self._forced.add(account_id)
+        if account_id in self._in_flight:
+            metrics.increment('scheduler.polls_coalesced')
+            return
+        self.schedule(account_id, datetime.now(timezone.utc))
+        self.start_due()
+    
+    def start_due(self) -> int:
+        """Start polls for due accounts, up to the concurrency limit; returns how many started"""
+        now = time.time()
+        started = 0
+        while self._heap and self._heap[0][0] <= now and len(self._in_flight) < self.max_concurrent:
+            due, account_id = heapq.heappop(self._heap)
+            # Skip entries superseded by a later schedule() or dropped by a resync
+            if self._due_at.get(account_id) != due or account_id in self._in_flight:
+                continue
+            
+            metrics.observe('scheduler.start_lag', now - due)
+            self._in_flight.add(account_id)
+            task = asyncio.create_task(self._run(account_id))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+            started += 1
+        
+        if started:
+            metrics.increment('scheduler.polls_started', started)
+        return started
+    
+    async def _run(self, account_id: str):
+        forced = account_id in self._forced
+        self._forced.discard(account_id)
+        next_due = None
+        try:
+            next_due = await self.poll(account_id, forced)
+        except Exception as e:
+            logger.error(f"Scheduled poll of account {account_id} failed: {e}")
+        finally:
+            self._in_flight.discard(account_id)
+        
+        if account_id in self._forced:
+            # Requested again while this poll ran
+            self.schedule(account_id, datetime.now(timezone.utc))
+        elif next_due is not None and account_id in self._due_at:
+            self.schedule(account_id, next_due)
+    
+    async def stop(self):
+        """Cancel running polls (their leases are released on the way out)"""
+        for task in list(self._tasks):
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
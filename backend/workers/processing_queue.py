@@ -0,0 +1,106 @@
+"""Bounded in-process queue between email ingestion and AI processing"""
+from typing import Awaitable, Callable, List, Optional, Set
+import asyncio
+import time
+import logging
+
+from utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+class ProcessingQueue:
+    """Pollers enqueue email IDs; a fixed pool of workers processes them
+    
+    ``submit`` waits while the queue is full, so pollers slow down instead of
+    piling up work, and the worker count caps concurrent LLM pipelines.
+    An email already queued or being processed is not queued again.
+    Workers start on first use inside the running event loop.
+    """
+    
+    def __init__(self, handler: Callable[[str], Awaitable], concurrency: int, max_size: int):
+        self.handler = handler
+        self.concurrency = concurrency
+        self.max_size = max_size
+        self._queue: Optional[asyncio.Queue] = None
+        self._workers: List[asyncio.Task] = []
+        # Queued or in-progress email IDs
+        self._pending: Set[str] = set()
+        metrics.register_gauge('processing.queue_depth', lambda: self._queue.qsize() if self._queue else 0)
+    
+    def start(self):
+        """Start the processing workers (idempotent)"""
+        if self._workers:
+            return
+        self._queue = asyncio.Queue(maxsize=self.max_size)
+        self._workers = [
+            asyncio.create_task(self._work(), name=f"email-processor-{i}")
+            for i in range(self.concurrency)
+        ]
+        logger.info(f"Email processing queue started ({self.concurrency} workers)")
+    
+    async def submit(self, email_id: str, wait: bool = True) -> bool:
+        """Enqueue an email for processing; returns whether it was queued
+        
+        Waits while the queue is full, or gives up right away if ``wait`` is
+        False. Emails already pending are skipped.
+        """
+        self.start()
+        if email_id in self._pending:
+            metrics.increment('processing.duplicates_skipped')
+            return False
+        if self._queue.full():
+            if not wait:
+                return False
+            metrics.increment('processing.backpressure_waits')
+        
+        self._pending.add(email_id)
+        try:
+            await self._queue.put((email_id, time.perf_counter()))
+        except BaseException:
+            self._pending.discard(email_id)
+            raise
+        return True
+    
+    def is_pending(self, email_id: str) -> bool:
+        """Whether an email is queued or being processed here"""
+        return email_id in self._pending
+    
+    def pending_ids(self) -> List[str]:
+        """IDs of emails queued or being processed here"""
+        return list(self._pending)
+    
+    async def _work(self):
+        while True:
+            email_id, enqueued_at = await self._queue.get()
+            started_at = time.perf_counter()
+            metrics.observe('processing.queue_wait', started_at - enqueued_at)
+            try:
+                await self.handler(email_id)
+            except Exception as e:
+                metrics.increment('processing.errors')
+                logger.error(f"Error in processing worker for email {email_id}: {e}")
+            finally:
+                self._pending.discard(email_id)
+                metrics.observe('processing.latency', time.perf_counter() - started_at)
+                self._queue.task_done()
+    
+    async def drain(self, timeout: float):
+        """Wait up to ``timeout`` seconds for queued emails, then stop the workers
+        
+        Emails still queued afterwards stay unprocessed in the database.
+        """
+        if not self._workers:
+            return
+        
+        try:
+            await asyncio.wait_for(self._queue.join(), timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"Processing queue drain timed out with {self._queue.qsize()} emails left")
+        
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        self._queue = None
+        self._pending.clear()
+        logger.info("Email processing queue stopped")
@@ -0,0 +1,54 @@
+"""Overlap protection for periodic background rounds"""
+from typing import Awaitable, Callable, Dict
+import asyncio
+import time
+import logging
+
+from utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+class RoundCoordinator:
+    """Starts periodic rounds as tasks, never running two rounds of the same job
+    
+    A round whose previous run is still in flight is skipped instead of piling
+    up behind it. ``sleep`` paces the loop on a fixed tick and records how far
+    behind schedule each tick woke up.
+    """
+    
+    def __init__(self, name: str, tick_interval: float = 1.0):
+        self.name = name
+        self.tick_interval = tick_interval
+        self._running: Dict[str, asyncio.Task] = {}
+        self._next_tick = time.monotonic()
+        metrics.register_gauge(f"{name}.rounds_in_flight", lambda: len(self._running))
+    
+    def start(self, job: str, func: Callable[[], Awaitable]) -> bool:
+        """Start a round of ``job`` unless its previous round is still running"""
+        if job in self._running:
+            logger.warning(f"Skipping {job} round: previous round still running")
+            metrics.increment(f"{self.name}.rounds_skipped.{job}")
+            return False
+        
+        task = asyncio.create_task(func())
+        self._running[job] = task
+        task.add_done_callback(lambda _: self._running.pop(job, None))
+        return True
+    
+    async def sleep(self):
+        """Sleep until the next tick and record the tick lag"""
+        self._next_tick += self.tick_interval
+        await asyncio.sleep(max(0.0, self._next_tick - time.monotonic()))
+        
+        lag = time.monotonic() - self._next_tick
+        metrics.set_gauge(f"{self.name}.tick_lag_ms", round(lag * 1000, 2))
+        if lag > self.tick_interval:
+            # Fell behind (e.g. a blocked loop): resynchronize instead of bursting
+            self._next_tick = time.monotonic()
+    
+    async def stop(self):
+        """Cancel running rounds"""
+        tasks = list(self._running.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
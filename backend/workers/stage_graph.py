@@ -0,0 +1,57 @@
+"""Run dependent async stages concurrently"""
+from typing import Any, Awaitable, Callable, Dict, List, Tuple
+import asyncio
+import time
+
+from utils.metrics import metrics
+
+class StageGraph:
+    """Small DAG executor for async pipeline stages
+    
+    Each stage is a coroutine function taking the results of its
+    dependencies (by stage name). A stage starts as soon as all its
+    dependencies finish, so independent stages overlap. If any stage fails
+    the remaining ones are cancelled and the error propagates.
+    """
+    
+    def __init__(self, metric_prefix: str):
+        self.metric_prefix = metric_prefix
+        self._stages: Dict[str, Tuple[Callable[..., Awaitable], List[str]]] = {}
+    
+    def add(self, name: str, func: Callable[..., Awaitable], depends_on: List[str] = None):
+        """Add a stage; dependencies must already be added (so the graph has no cycles)"""
+        if name in self._stages:
+            raise ValueError(f"Stage {name} already added")
+        depends_on = depends_on or []
+        for dependency in depends_on:
+            if dependency not in self._stages:
+                raise ValueError(f"Stage {name} depends on unknown stage {dependency}")
+        self._stages[name] = (func, depends_on)
+    
+    async def run(self) -> Tuple[Dict[str, Any], Dict[str, float]]:
+        """Run all stages; returns results and per-stage durations in milliseconds"""
+        tasks: Dict[str, asyncio.Task] = {}
+        timings: Dict[str, float] = {}
+        
+        async def run_stage(name: str, func: Callable[..., Awaitable], depends_on: List[str]):
+            inputs = {dependency: await tasks[dependency] for dependency in depends_on}
+            started_at = time.perf_counter()
+            try:
+                return await func(**inputs)
+            finally:
+                elapsed = time.perf_counter() - started_at
+                timings[name] = round(elapsed * 1000, 2)
+                metrics.observe(f"{self.metric_prefix}.{name}", elapsed)
+        
+        for name, (func, depends_on) in self._stages.items():
+            tasks[name] = asyncio.create_task(run_stage(name, func, depends_on))
+        
+        try:
+            results = await asyncio.gather(*tasks.values())
+        except BaseException:
+            for task in tasks.values():
+                task.cancel()
+            await asyncio.gather(*tasks.values(), return_exceptions=True)
+            raise
+        
+        return dict(zip(tasks, results)), timings
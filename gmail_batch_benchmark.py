@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+"""
+Gmail Batch Benchmark Script
+Compares Gmail message retrieval against a fake Gmail service with simulated
+network latency: the old serial ``messages().get(format='full')`` per
+message against the two-pass batch retrieval of EmailService (one metadata
+batch per GMAIL_BATCH_SIZE messages, then one full batch for the messages
+that are not stored yet).
+
+Some messages are marked as already stored and one is deleted (404) between
+listing and fetching, as happens on a busy mailbox.
+
+Usage: python gmail_batch_benchmark.py [messages] [known_percent] [latency_ms]
+"""
+
+import base64
+import os
+import random
+import statistics
+import sys
+import time
+from datetime import datetime
+from types import SimpleNamespace
+
+os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "backend"))
+
+from googleapiclient.errors import HttpError
+
+from config import config
+from services.email_service import EmailService
+
+# Configuration
+ROUNDS = 3
+PER_MESSAGE_MS = {"metadata": 0.2, "full": 1.0}  # simulated transfer per message
+SEED = 42
+
+class FakeGmail:
+    """Gmail service stand-in: every HTTP round trip sleeps ``latency`` seconds"""
+    
+    def __init__(self, mailbox: dict, deleted: set, latency: float):
+        self.mailbox = mailbox
+        self.deleted = deleted
+        self.latency = latency
+        self.round_trips = 0
+    
+    def users(self):
+        return self
+    
+    def messages(self):
+        return self
+    
+    def lookup(self, msg_id: str, fmt: str) -> dict:
+        if msg_id in self.deleted:
+            raise HttpError(SimpleNamespace(status=404, reason="Not Found"), b"")
+        message = self.mailbox[msg_id]
+        if fmt == "metadata":
+            return {"id": msg_id, "labelIds": message["labelIds"]}
+        return message
+    
+    def get(self, userId, id, format, metadataHeaders=None):
+        return FakeRequest(self, [(id, format)])
+    
+    def new_batch_http_request(self, callback):
+        return FakeBatch(self, callback)
+    
+    def round_trip(self, requests: list):
+        self.round_trips += 1
+        time.sleep(self.latency + sum(PER_MESSAGE_MS[fmt] for _, fmt in requests) / 1000)
+
+class FakeRequest:
+    def __init__(self, gmail: FakeGmail, requests: list):
+        self.gmail = gmail
+        self.requests = requests
+    
+    def execute(self, http=None):
+        self.gmail.round_trip(self.requests)
+        msg_id, fmt = self.requests[0]
+        return self.gmail.lookup(msg_id, fmt)
+
+class FakeBatch:
+    def __init__(self, gmail: FakeGmail, callback):
+        self.gmail = gmail
+        self.callback = callback
+        self.requests = []
+    
+    def add(self, request, request_id):
+        self.requests.append((request_id, request.requests[0][1]))
+    
+    def execute(self, http=None):
+        self.gmail.round_trip(self.requests)
+        for msg_id, fmt in self.requests:
+            try:
+                self.callback(msg_id, self.gmail.lookup(msg_id, fmt), None)
+            except HttpError as e:
+                self.callback(msg_id, None, e)
+
+class GmailBatchBenchmark:
+    def __init__(self, messages: int, known_percent: int, latency_ms: float):
+        rng = random.Random(SEED)
+        body = base64.urlsafe_b64encode(b"Hello, could we meet next week?\n" * 40).decode()
+        self.message_ids = [f"msg-{i}" for i in range(messages)]
+        self.messages = {
+            msg_id: {
+                "id": msg_id,
+                "labelIds": ["INBOX", "UNREAD"],
+                "payload": {
+                    "headers": [
+                        {"name": "From", "value": "sender@example.com"},
+                        {"name": "To", "value": "me@example.com"},
+                        {"name": "Subject", "value": f"Message {msg_id}"},
+                        {"name": "Date", "value": "Mon, 1 Jun 2026 10:00:00 +0000"}
+                    ],
+                    "body": {"data": body}
+                }
+            }
+            for msg_id in self.message_ids
+        }
+        self.known = set(rng.sample(self.message_ids, messages * known_percent // 100))
+        self.deleted = {rng.choice([msg_id for msg_id in self.message_ids if msg_id not in self.known])}
+        self.latency = latency_ms / 1000
+        self.known_percent = known_percent
+    
+    def log(self, message, level="INFO"):
+        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        print(f"[{timestamp}] {level}: {message}")
+    
+    def serial_fetch(self, gmail: FakeGmail) -> list:
+        """The old approach: one full get per listed message, then drop known ones"""
+        emails = []
+        for msg_id in self.message_ids:
+            try:
+                message = gmail.users().messages().get(userId="me", id=msg_id, format="full").execute()
+            except HttpError:
+                continue
+            if msg_id not in self.known:
+                emails.append(EmailService._parse_gmail_message(message))
+        return emails
+    
+    def batch_fetch(self, gmail: FakeGmail) -> list:
+        """The two passes of EmailService.iter_emails_oauth_gmail"""
+        emails = []
+        batch_size = config.GMAIL_BATCH_SIZE
+        for start in range(0, len(self.message_ids), batch_size):
+            chunk = self.message_ids[start:start + batch_size]
+            metadata, failed = EmailService._batch_get_gmail_messages(
+                None, gmail, None, chunk, "metadata", metadata_headers=["From", "To", "Subject", "Date"]
+            )
+            if failed:
+                raise RuntimeError(f"Unexpected failed messages: {failed}")
+            candidates = [msg_id for msg_id in metadata if msg_id not in self.known]
+            if not candidates:
+                continue
+            messages, failed = EmailService._batch_get_gmail_messages(None, gmail, None, candidates, "full")
+            emails.extend(EmailService._parse_gmail_message(messages[msg_id]) for msg_id in candidates if msg_id in messages)
+        return emails
+    
+    def measure(self, fetch) -> tuple:
+        timings = []
+        for _ in range(ROUNDS):
+            gmail = FakeGmail(self.messages, self.deleted, self.latency)
+            started_at = time.perf_counter()
+            emails = fetch(gmail)
+            timings.append((time.perf_counter() - started_at) * 1000)
+        return timings, gmail.round_trips, emails
+    
+    def report(self, name: str, timings: list, round_trips: int):
+        self.log(f"{name}: mean {statistics.mean(timings):.0f} ms, max {max(timings):.0f} ms, {round_trips} round trips")
+    
+    def run(self):
+        self.log(
+            f"{len(self.message_ids)} messages ({self.known_percent}% already stored, 1 deleted), "
+            f"{self.latency * 1000:.0f} ms per round trip, {ROUNDS} rounds"
+        )
+        
+        serial, serial_trips, serial_emails = self.measure(self.serial_fetch)
+        batched, batched_trips, batched_emails = self.measure(self.batch_fetch)
+        self.report("Serial full gets", serial, serial_trips)
+        self.report("Two-pass batches", batched, batched_trips)
+        
+        if sorted(e["message_id"] for e in serial_emails) != sorted(e["message_id"] for e in batched_emails):
+            self.log("❌ Serial and batched retrieval returned different messages", "ERROR")
+            return False
+        
+        self.log(f"✅ Same {len(batched_emails)} new messages; speedup {statistics.mean(serial) / statistics.mean(batched):.1f}x")
+        return True
+
+if __name__ == "__main__":
+    messages = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    known_percent = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+    latency_ms = float(sys.argv[3]) if len(sys.argv) > 3 else 20
+    success = GmailBatchBenchmark(messages, known_percent, latency_ms).run()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,320 @@
+#!/usr/bin/env python3
+"""
+IMAP Session Benchmark Script
+Runs a local IMAP stub server (implicit TLS, simulated network latency) and
+compares polling with a new connection per poll (connect, LOGIN, SELECT,
+SEARCH UNSEEN and one FETCH per message, the old fetch path) against the
+persistent session and UID-incremental fetch of EmailService.
+
+Also checks that every delivered message is fetched exactly once, including
+across a server-side drop of every connection, and measures how quickly an
+IMAP IDLE watcher hears about new mail.
+
+Requires the openssl command line tool.
+
+Usage: python imap_session_benchmark.py [polls] [messages_per_poll] [latency_ms]
+"""
+
+import os
+import re
+import select
+import socket
+import socketserver
+import ssl
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import imaplib
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "backend"))
+
+from services.email_service import EmailService
+from services.imap_session import IMAPSession, imap_session_manager
+
+# Configuration
+HOST = "127.0.0.1"
+PORT = 8993
+UIDVALIDITY = 1
+IDLE_ROUNDS = 5
+
+class Mailbox:
+    """INBOX of the stub server; UIDs double as sequence numbers (nothing is expunged)"""
+    
+    def __init__(self):
+        self.messages = []  # [uid, raw, seen]
+        self.changed = threading.Condition()
+    
+    def deliver(self, raw: bytes):
+        with self.changed:
+            self.messages.append([len(self.messages) + 1, raw, False])
+            self.changed.notify_all()
+    
+    def uidnext(self) -> int:
+        return len(self.messages) + 1
+
+class IMAPStubHandler(socketserver.StreamRequestHandler):
+    """Just enough IMAP4rev1 for imaplib and EmailService"""
+    
+    def setup(self):
+        super().setup()
+        self.server.connections.add(self.connection)
+    
+    def finish(self):
+        self.server.connections.discard(self.connection)
+        try:
+            super().finish()
+        except OSError:
+            pass
+    
+    def send(self, data: bytes):
+        self.wfile.write(data)
+        self.wfile.flush()
+    
+    def handle(self):
+        mailbox = self.server.mailbox
+        time.sleep(2 * self.server.latency)  # TCP + TLS handshake round trips
+        self.send(b"* OK [CAPABILITY IMAP4rev1 IDLE] IMAP stub ready\r\n")
+        
+        while True:
+            try:
+                line = self.rfile.readline()
+            except OSError:
+                return
+            if not line:
+                return
+            time.sleep(self.server.latency)
+            tag, command, args = (line.rstrip(b"\r\n").split(b" ", 2) + [b""])[:3]
+            command = command.upper()
+            if command == b"UID":
+                command, args = (args.split(b" ", 1) + [b""])[:2]
+                command = b"UID " + command.upper()
+            
+            if command == b"CAPABILITY":
+                self.send(b"* CAPABILITY IMAP4rev1 IDLE\r\n")
+            elif command == b"SELECT":
+                self.send(b"* %d EXISTS\r\n* OK [UIDVALIDITY %d] UIDs valid\r\n" % (len(mailbox.messages), UIDVALIDITY))
+            elif command == b"STATUS":
+                self.send(b"* STATUS INBOX (UIDVALIDITY %d UIDNEXT %d)\r\n" % (UIDVALIDITY, mailbox.uidnext()))
+            elif command in (b"SEARCH", b"UID SEARCH"):
+                self.send(b"* SEARCH " + b" ".join(b"%d" % uid for uid in self.search(args)) + b"\r\n")
+            elif command in (b"FETCH", b"UID FETCH"):
+                self.fetch(args)
+            elif command == b"IDLE":
+                self.idle()
+            elif command == b"LOGOUT":
+                self.send(b"* BYE logging out\r\n" + tag + b" OK LOGOUT completed\r\n")
+                return
+            elif command not in (b"LOGIN", b"NOOP", b"CLOSE"):
+                self.send(tag + b" BAD unsupported command\r\n")
+                continue
+            self.send(tag + b" OK " + command + b" completed\r\n")
+    
+    def search(self, criteria: bytes) -> list:
+        messages = self.server.mailbox.messages
+        if b"UNSEEN" in criteria:
+            return [uid for uid, _, seen in messages if not seen]
+        start = int(re.search(rb"UID (\d+):\*", criteria).group(1))
+        uids = [uid for uid, _, _ in messages if uid >= start]
+        # "n:*" always matches the highest UID, as on real servers
+        return (uids or [messages[-1][0]]) if messages else []
+    
+    def fetch(self, args: bytes):
+        message_set, items = args.split(b" ", 1)
+        partial = re.search(rb"<0\.(\d+)>", items)
+        for part in message_set.split(b","):
+            first, _, last = part.partition(b":")
+            for uid in range(int(first), int(last or first) + 1):
+                _, raw, seen = message = self.server.mailbox.messages[uid - 1]
+                if b"PEEK" in items:
+                    body = raw[:int(partial.group(1))] if partial else raw
+                    section = b"BODY[]<0>" if partial else b"BODY[]"
+                    flags = b"\\Seen" if seen else b""
+                    self.send(b"* %d FETCH (UID %d FLAGS (%s) %s {%d}\r\n%s)\r\n" % (uid, uid, flags, section, len(body), body))
+                else:
+                    message[2] = True
+                    self.send(b"* %d FETCH (RFC822 {%d}\r\n%s)\r\n" % (uid, len(raw), raw))
+    
+    def idle(self):
+        mailbox = self.server.mailbox
+        exists = len(mailbox.messages)
+        self.send(b"+ idling\r\n")
+        while True:
+            with mailbox.changed:
+                mailbox.changed.wait_for(lambda: len(mailbox.messages) > exists, timeout=0.01)
+            if len(mailbox.messages) > exists:
+                exists = len(mailbox.messages)
+                self.send(b"* %d EXISTS\r\n" % exists)
+            if self.connection.pending() or select.select([self.connection], [], [], 0)[0]:
+                self.rfile.readline()  # DONE
+                return
+
+class IMAPStubServer(socketserver.ThreadingMixIn, socketserver.TCPServer):
+    allow_reuse_address = True
+    daemon_threads = True
+    
+    def __init__(self, context: ssl.SSLContext, latency: float):
+        self.context = context
+        self.latency = latency
+        self.mailbox = Mailbox()
+        self.connections = set()
+        super().__init__((HOST, PORT), IMAPStubHandler)
+    
+    def get_request(self):
+        sock, address = super().get_request()
+        # Responses are several small writes; don't let Nagle hold them back
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        return self.context.wrap_socket(sock, server_side=True), address
+    
+    def drop_connections(self):
+        """Simulate a server restart: close every open connection"""
+        for connection in list(self.connections):
+            try:
+                connection.shutdown(2)
+            except OSError:
+                pass
+
+class IMAPSessionBenchmark:
+    def __init__(self, polls: int, messages_per_poll: int, latency_ms: float):
+        self.polls = polls
+        self.messages_per_poll = messages_per_poll
+        self.latency = latency_ms / 1000
+        self.delivered = 0
+    
+    def log(self, message, level="INFO"):
+        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        print(f"[{timestamp}] {level}: {message}")
+    
+    def start_server(self, directory: str) -> IMAPStubServer:
+        """IMAP stub with implicit TLS on a throwaway self-signed certificate"""
+        cert = os.path.join(directory, "cert.pem")
+        key = os.path.join(directory, "key.pem")
+        subprocess.run(
+            ["openssl", "req", "-x509", "-newkey", "rsa:2048", "-nodes", "-days", "1",
+             "-subj", f"/CN={HOST}", "-keyout", key, "-out", cert],
+            check=True, capture_output=True
+        )
+        context = ssl.create_default_context(ssl.Purpose.CLIENT_AUTH)
+        context.load_cert_chain(cert, key)
+        
+        server = IMAPStubServer(context, self.latency)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        return server
+    
+    def deliver(self, server: IMAPStubServer, count: int):
+        for _ in range(count):
+            self.delivered += 1
+            server.mailbox.deliver(
+                f"Message-ID: <bench-{self.delivered}@example.com>\r\n"
+                f"From: sender@example.com\r\nTo: me@example.com\r\nSubject: Message {self.delivered}\r\n\r\n"
+                f"{'Could we meet next week? ' * 40}\r\n".encode()
+            )
+    
+    def poll_fresh_connection(self) -> int:
+        """One poll the old way: connect, log in, search UNSEEN, fetch per message, log out"""
+        mail = imaplib.IMAP4_SSL(HOST, PORT)
+        mail.login("bench@example.com", "secret")
+        mail.select("inbox")
+        status, data = mail.search(None, "(UNSEEN SINCE 01-Jan-2026)")
+        fetched = 0
+        for seq in data[0].split()[-50:]:
+            status, msg_data = mail.fetch(seq, "(RFC822)")
+            fetched += sum(1 for part in msg_data if isinstance(part, tuple))
+        mail.close()
+        mail.logout()
+        return fetched
+    
+    def measure(self, server: IMAPStubServer, poll, drop_at: int = None) -> tuple:
+        timings = []
+        fetched = []
+        for i in range(self.polls):
+            if i == drop_at:
+                server.drop_connections()
+            self.deliver(server, self.messages_per_poll)
+            started_at = time.perf_counter()
+            fetched.append(poll())
+            timings.append((time.perf_counter() - started_at) * 1000)
+        return timings, fetched
+    
+    def report(self, name: str, timings: list):
+        self.log(f"{name}: mean {statistics.mean(timings):.1f} ms, p50 {statistics.median(timings):.1f} ms, max {max(timings):.1f} ms per poll")
+    
+    def measure_idle(self, server: IMAPStubServer) -> list:
+        """Delay between delivery and the IDLE watcher reporting new mail"""
+        session = IMAPSession(HOST, PORT, "bench@example.com", "secret")
+        latencies = []
+        try:
+            for _ in range(IDLE_ROUNDS):
+                result = {}
+                watcher = threading.Thread(target=lambda: result.update(new_mail=session.idle(5), at=time.perf_counter()))
+                watcher.start()
+                time.sleep(0.1)
+                delivered_at = time.perf_counter()
+                self.deliver(server, 1)
+                watcher.join()
+                if not result.get("new_mail"):
+                    return []
+                latencies.append((result["at"] - delivered_at) * 1000)
+        finally:
+            session.close()
+        return latencies
+    
+    def run(self):
+        self.log(f"{self.polls} polls, {self.messages_per_poll} new messages per poll, {self.latency * 1000:.0f} ms per round trip")
+        
+        with tempfile.TemporaryDirectory() as directory:
+            server = self.start_server(directory)
+            try:
+                fresh, fresh_fetched = self.measure(server, self.poll_fresh_connection)
+                self.report("New connection per poll", fresh)
+                
+                server.mailbox = Mailbox()
+                self.delivered = 0
+                account = SimpleNamespace(
+                    id="bench", email="bench@example.com", password="secret", imap_host=HOST, imap_port=PORT,
+                    imap_uidvalidity=None, imap_last_uid=None, last_sync=None,
+                    created_at=datetime.now(timezone.utc).isoformat()
+                )
+                service = EmailService(None)
+                message_ids = []
+                
+                def poll_session():
+                    emails = service._fetch_imap_sync(account)
+                    message_ids.extend(email["message_id"] for email in emails)
+                    return len(emails)
+                
+                persistent, _ = self.measure(server, poll_session, drop_at=self.polls // 2)
+                self.report("Persistent session, UID fetch", persistent)
+                
+                idle = self.measure_idle(server)
+            finally:
+                imap_session_manager.close_all()
+                server.shutdown()
+                server.server_close()
+        
+        expected = self.polls * self.messages_per_poll
+        if sum(fresh_fetched) != expected:
+            self.log(f"❌ Fresh connections fetched {sum(fresh_fetched)} of {expected} messages", "ERROR")
+            return False
+        if len(message_ids) != expected or len(set(message_ids)) != expected:
+            self.log(f"❌ Persistent session fetched {len(message_ids)} messages ({len(set(message_ids))} distinct) of {expected}", "ERROR")
+            return False
+        if not idle:
+            self.log("❌ IDLE watcher did not report new mail", "ERROR")
+            return False
+        
+        self.log(f"IDLE push: mean {statistics.mean(idle):.1f} ms from delivery to notification")
+        self.log(f"✅ Every message fetched exactly once (across a connection drop); speedup {statistics.mean(fresh) / statistics.mean(persistent):.1f}x")
+        return True
+
+if __name__ == "__main__":
+    polls = int(sys.argv[1]) if len(sys.argv) > 1 else 40
+    messages_per_poll = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+    latency_ms = float(sys.argv[3]) if len(sys.argv) > 3 else 5
+    success = IMAPSessionBenchmark(polls, messages_per_poll, latency_ms).run()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+SMTP Pool Benchmark Script
+Compares sending with a fresh connection per message (SMTP_SSL + LOGIN +
+QUIT, the old send path) against the pooled connections of SMTPConnectionPool,
+against a local aiosmtpd server with implicit TLS. Also checks that the pool
+recovers when the server drops its pooled connections with a 421.
+
+Requires aiosmtpd (pip install aiosmtpd) and the openssl command line tool.
+
+Usage: python smtp_pool_benchmark.py [messages] [threads]
+"""
+
+import logging
+import os
+import smtplib
+import ssl
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from types import SimpleNamespace
+
+os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "backend"))
+
+from aiosmtpd.controller import Controller
+from aiosmtpd.smtp import AuthResult
+
+from services.smtp_pool import SMTPConnectionPool
+
+# aiosmtpd logs a deprecation warning about its own attribute on every AUTH
+logging.getLogger("mail.log").setLevel(logging.ERROR)
+
+# Configuration
+HOST = "127.0.0.1"
+PORT = 8465
+MESSAGE = "Subject: Benchmark\r\n\r\n" + "Hello from the SMTP pool benchmark.\r\n" * 20
+
+class CountingHandler:
+    """Accepts every message and counts deliveries"""
+    
+    def __init__(self):
+        self.delivered = 0
+        self.sessions = set()
+        self.dropped = set()
+    
+    def restart(self):
+        """Simulate a server restart: connections opened so far get a 421"""
+        self.dropped = set(self.sessions)
+    
+    async def handle_MAIL(self, server, session, envelope, address, mail_options):
+        if id(session) in self.dropped:
+            return "421 Service closing transmission channel"
+        self.sessions.add(id(session))
+        envelope.mail_from = address
+        return "250 OK"
+    
+    async def handle_DATA(self, server, session, envelope):
+        self.delivered += 1
+        return "250 OK"
+
+def accept_any_login(server, session, envelope, mechanism, auth_data):
+    return AuthResult(success=True)
+
+class SMTPPoolBenchmark:
+    def __init__(self, messages: int, threads: int):
+        self.messages = messages
+        self.threads = threads
+        self.account = SimpleNamespace(smtp_host=HOST, smtp_port=PORT, email="bench@example.com", password="secret")
+        self.handler = CountingHandler()
+    
+    def log(self, message, level="INFO"):
+        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        print(f"[{timestamp}] {level}: {message}")
+    
+    def start_server(self, directory: str) -> Controller:
+        """aiosmtpd with implicit TLS on a throwaway self-signed certificate"""
+        cert = os.path.join(directory, "cert.pem")
+        key = os.path.join(directory, "key.pem")
+        subprocess.run(
+            ["openssl", "req", "-x509", "-newkey", "rsa:2048", "-nodes", "-days", "1",
+             "-subj", f"/CN={HOST}", "-keyout", key, "-out", cert],
+            check=True, capture_output=True
+        )
+        context = ssl.create_default_context(ssl.Purpose.CLIENT_AUTH)
+        context.load_cert_chain(cert, key)
+        
+        controller = Controller(
+            self.handler, hostname=HOST, port=PORT, ssl_context=context,
+            authenticator=accept_any_login, auth_require_tls=False
+        )
+        controller.start()
+        return controller
+    
+    def send_fresh(self, _):
+        """One message the old way: connect, authenticate, send, quit"""
+        server = smtplib.SMTP_SSL(HOST, PORT, timeout=30)
+        try:
+            server.login(self.account.email, self.account.password)
+            server.sendmail(self.account.email, ["to@example.com"], MESSAGE)
+        finally:
+            server.quit()
+    
+    def measure(self, send) -> list:
+        timings = []
+        
+        def timed(i):
+            started_at = time.perf_counter()
+            send(i)
+            return (time.perf_counter() - started_at) * 1000
+        
+        with ThreadPoolExecutor(max_workers=self.threads) as executor:
+            timings.extend(executor.map(timed, range(self.messages)))
+        return timings
+    
+    def report(self, name: str, timings: list, elapsed: float):
+        self.log(
+            f"{name}: {len(timings) / elapsed:.0f} msg/s, mean {statistics.mean(timings):.2f} ms, "
+            f"p50 {statistics.median(timings):.2f} ms, max {max(timings):.2f} ms"
+        )
+    
+    def run_timed(self, name: str, send) -> float:
+        started_at = time.perf_counter()
+        timings = self.measure(send)
+        elapsed = time.perf_counter() - started_at
+        self.report(name, timings, elapsed)
+        return elapsed
+    
+    def run(self):
+        self.log(f"{self.messages} messages over {self.threads} threads to {HOST}:{PORT}")
+        
+        with tempfile.TemporaryDirectory() as directory:
+            controller = self.start_server(directory)
+            try:
+                pool = SMTPConnectionPool(max_sessions_per_host=self.threads, idle_timeout=240, keepalive_interval=30)
+                send_pooled = lambda _: pool.send(self.account, ["to@example.com"], MESSAGE)
+                
+                fresh = self.run_timed("Fresh connection per message", self.send_fresh)
+                pooled = self.run_timed("Pooled connections", send_pooled)
+                
+                # Every pooled connection now gets a 421 and must be replaced
+                idle = pool.idle_count()
+                self.handler.restart()
+                self.measure(send_pooled)
+                pool.close_all()
+            finally:
+                controller.stop()
+        
+        expected = self.messages * 3
+        if self.handler.delivered != expected:
+            self.log(f"❌ Delivered {self.handler.delivered} of {expected} messages", "ERROR")
+            return False
+        
+        self.log(f"✅ All {expected} messages delivered ({idle} pooled connections replaced after a 421); speedup {fresh / pooled:.1f}x")
+        return True
+
+if __name__ == "__main__":
+    messages = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    threads = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+    success = SMTPPoolBenchmark(messages, threads).run()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,9 @@
+"""Shared test setup: import backend modules the way the server does"""
+import os
+import sys
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "backend")
+sys.path.insert(0, BACKEND_DIR)
+
+# config reads MONGO_URL at import; Motor connects lazily, so nothing is contacted
+os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
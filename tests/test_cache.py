@@ -0,0 +1,87 @@
+"""Tests for the in-process cache backend and single-flight loading"""
+from types import SimpleNamespace
+import asyncio
+
+from utils import cache
+from utils.cache import CacheService, MemoryCacheBackend
+
+def test_memory_backend_evicts_least_recently_used():
+    async def scenario():
+        backend = MemoryCacheBackend(max_entries=2, max_bytes=1024, sweep_interval=60)
+        await backend.set('a', b'1', 60)
+        await backend.set('b', b'2', 60)
+        await backend.get('a')  # 'b' is now least recently used
+        await backend.set('c', b'3', 60)
+        values = [await backend.get(key) for key in ('a', 'b', 'c')]
+        await backend.close()
+        return values
+    
+    assert asyncio.run(scenario()) == [b'1', None, b'3']
+
+def test_memory_backend_bounds_total_bytes():
+    async def scenario():
+        backend = MemoryCacheBackend(max_entries=10, max_bytes=8, sweep_interval=60)
+        await backend.set('a', b'xxxx', 60)
+        await backend.set('b', b'yyyy', 60)
+        await backend.set('c', b'zzzz', 60)
+        await backend.set('huge', b'x' * 9, 60)  # never stored
+        values = [await backend.get(key) for key in ('a', 'b', 'c', 'huge')]
+        await backend.close()
+        return values, backend._bytes
+    
+    assert asyncio.run(scenario()) == ([None, b'yyyy', b'zzzz', None], 8)
+
+def test_memory_backend_expires_entries(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(cache, 'time', SimpleNamespace(monotonic=lambda: now[0]))
+    
+    async def scenario():
+        backend = MemoryCacheBackend(max_entries=10, max_bytes=1024, sweep_interval=60)
+        await backend.set('short', b'1', 5)
+        await backend.set('long', b'2', 50)
+        now[0] += 10
+        swept = backend.sweep()
+        values = [await backend.get('short'), await backend.get('long')]
+        now[0] += 50
+        expired_on_read = await backend.get('long')
+        await backend.close()
+        return swept, values, expired_on_read, backend._bytes
+    
+    assert asyncio.run(scenario()) == (1, [None, b'2'], None, 0)
+
+def test_concurrent_misses_share_one_load():
+    async def scenario():
+        service = CacheService(MemoryCacheBackend(max_entries=10, max_bytes=1024, sweep_interval=60))
+        loads = []
+        
+        async def load():
+            loads.append(1)
+            await asyncio.sleep(0.01)
+            return {'value': 42}
+        
+        results = await asyncio.gather(*[service.get_or_load('key', load, 60) for _ in range(5)])
+        cached_result = await service.get_or_load('key', load, 60)
+        await service.close()
+        return results, cached_result, len(loads)
+    
+    results, cached_result, loads = asyncio.run(scenario())
+    assert results == [{'value': 42}] * 5
+    assert cached_result == {'value': 42}
+    assert loads == 1
+
+def test_failed_load_reaches_every_waiter_and_is_not_cached():
+    async def scenario():
+        service = CacheService(MemoryCacheBackend(max_entries=10, max_bytes=1024, sweep_interval=60))
+        
+        async def failing():
+            await asyncio.sleep(0.01)
+            raise RuntimeError("provider down")
+        
+        results = await asyncio.gather(*[service.get_or_load('key', failing, 60) for _ in range(3)], return_exceptions=True)
+        stored = await service.get('key')
+        await service.close()
+        return results, stored
+    
+    results, stored = asyncio.run(scenario())
+    assert all(isinstance(result, RuntimeError) for result in results)
+    assert stored is None
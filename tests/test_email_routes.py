@@ -0,0 +1,74 @@
+"""Tests for the streamed draft endpoint"""
+from types import SimpleNamespace
+import asyncio
+
+from config import config
+from routes import email_routes
+from services.ai_agent_service_v2 import AIAgentServiceV2
+
+EMAIL = {
+    'id': 'email-1', 'user_id': 'user-1', 'email_account_id': 'account-1', 'message_id': 'msg-1',
+    'from_email': 'sender@example.com', 'to_email': ['me@example.com'],
+    'subject': 'Meeting', 'body': 'Could we meet next week?', 'received_at': '2026-06-01T10:00:00+00:00',
+    'draft_generated': True, 'draft_content': 'Reviewed draft'
+}
+
+class FakeCollection:
+    def __init__(self, docs):
+        self.docs = {doc['id']: dict(doc) for doc in docs}
+    
+    async def find_one(self, query):
+        doc = self.docs.get(query['id'])
+        return dict(doc) if doc else None
+    
+    async def update_one(self, query, update):
+        self.docs.setdefault(query['id'], {'id': query['id']}).update(update.get('$set', {}))
+
+class FakeAIService:
+    def __init__(self, chunks, fail: bool):
+        self.chunks = chunks
+        self.fail = fail
+    
+    async def classify_intent(self, email, user_id):
+        return None, 0.0
+    
+    async def stream_draft(self, email, user_id, intent_id=None):
+        for text in self.chunks:
+            yield text
+        if self.fail:
+            raise RuntimeError('stream dropped')
+    
+    async def validate_draft(self, draft, email, intent_id=None):
+        return True, []
+    
+    def get_tokens_used(self):
+        return 42
+
+def stream(monkeypatch, fail: bool):
+    db = SimpleNamespace(emails=FakeCollection([EMAIL]), users=FakeCollection([{'id': 'user-1'}]))
+    service = FakeAIService(['Hello, ', 'next week ', 'works.'], fail)
+    monkeypatch.setattr(AIAgentServiceV2, 'for_database', classmethod(lambda cls, db: service))
+    monkeypatch.setattr(config, 'DRAFT_STREAM_SAVE_INTERVAL', 0)
+    
+    async def scenario():
+        response = await email_routes.stream_draft('email-1', user=SimpleNamespace(id='user-1'), db=db)
+        return [event async for event in response.body_iterator]
+    
+    events = asyncio.run(scenario())
+    return events, db.emails.docs['email-1']
+
+def test_failed_stream_keeps_the_existing_draft(monkeypatch):
+    events, doc = stream(monkeypatch, fail=True)
+    
+    assert events[-1].startswith('event: error')
+    assert doc['draft_content'] == 'Reviewed draft'
+    assert doc['draft_generated'] is True
+    assert doc['draft_partial'] == 'Hello, next week works.'
+
+def test_completed_stream_replaces_the_draft_and_clears_the_partial(monkeypatch):
+    events, doc = stream(monkeypatch, fail=False)
+    
+    assert events[-1].startswith('event: done')
+    assert doc['draft_content'] == 'Hello, next week works.'
+    assert doc['draft_partial'] is None
+    assert doc['status'] == 'draft_ready'
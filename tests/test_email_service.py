@@ -0,0 +1,140 @@
+"""Tests for EmailService helpers that do not touch a mailbox"""
+from types import SimpleNamespace
+import asyncio
+import threading
+
+from googleapiclient.errors import HttpError
+import pytest
+
+from services import email_service
+from services.email_service import EmailService
+
+def http_error(status: int) -> HttpError:
+    return HttpError(SimpleNamespace(status=status, reason=''), b'')
+
+class FakeBatch:
+    """Gmail batch request answering each message from a fixed table"""
+    
+    def __init__(self, callback, outcomes):
+        self.callback = callback
+        self.outcomes = outcomes
+        self.request_ids = []
+    
+    def add(self, request, request_id):
+        self.request_ids.append(request_id)
+    
+    def execute(self, http=None):
+        for request_id in self.request_ids:
+            outcome = self.outcomes[request_id]
+            if isinstance(outcome, Exception):
+                self.callback(request_id, None, outcome)
+            else:
+                self.callback(request_id, outcome, None)
+
+class FakeGmailService:
+    def __init__(self, outcomes):
+        self.outcomes = outcomes
+    
+    def new_batch_http_request(self, callback):
+        return FakeBatch(callback, self.outcomes)
+    
+    def users(self):
+        return self
+    
+    def messages(self):
+        return self
+    
+    def get(self, **params):
+        return params
+
+def test_batch_get_treats_deleted_messages_as_done():
+    service = FakeGmailService({
+        'kept': {'id': 'kept'},
+        'deleted': http_error(404),
+        'throttled': http_error(429),
+    })
+    
+    messages, failed = EmailService._batch_get_gmail_messages(
+        None, service, None, ['kept', 'deleted', 'throttled'], 'metadata'
+    )
+    
+    assert set(messages) == {'kept'}
+    # Only the transient error keeps the history cursor pinned
+    assert failed == ['throttled']
+
+class RecordingCollection:
+    def __init__(self):
+        self.updates = []
+    
+    async def update_one(self, filters, update):
+        self.updates.append((filters, update))
+
+def test_save_draft_result_stores_issues_and_bills_tokens():
+    db = SimpleNamespace(emails=RecordingCollection(), users=RecordingCollection())
+    service = EmailService.__new__(EmailService)
+    service.db = db
+    email = SimpleNamespace(id='email-1', user_id='user-1')
+    
+    update_data = EmailService.draft_result('intent-1', 0.9, 'Hello', True, [], 120)
+    asyncio.run(service.save_draft_result(email, update_data))
+    
+    (filters, update), = db.emails.updates
+    assert filters == {'id': 'email-1'}
+    assert update['$set']['validation_issues'] == []
+    assert update['$set']['status'] == 'draft_ready'
+    assert update['$set']['tokens_used'] == 120
+    assert db.users.updates == [({'id': 'user-1'}, {'$inc': {'tokens_used': 120}})]
+
+def test_compress_uid_set_renders_ranges():
+    assert EmailService._compress_uid_set([7, 1, 3, 2, 9, 10]) == '1:3,7,9:10'
+    assert EmailService._compress_uid_set([5]) == '5'
+    assert EmailService._compress_uid_set([]) == ''
+
+def test_iter_imap_fetch_response_reads_flags_on_either_side():
+    msg_data = [
+        (b'1 (UID 11 FLAGS (\\Seen) BODY[] {5}', b'first'),
+        b')',
+        (b'2 (UID 12 BODY[] {6}', b'second'),
+        b' FLAGS ())',
+        (b'3 (BODY[] {4}', b'none'),
+        b')',
+    ]
+    
+    assert list(EmailService._iter_imap_fetch_response(msg_data)) == [
+        (11, b'\\Seen', b'first'),
+        (12, b'', b'second'),
+    ]
+
+class FakeMailbox:
+    def status(self, mailbox, items):
+        return 'OK', [b'INBOX (UIDVALIDITY 42 UIDNEXT 101)']
+
+class FakeSession:
+    def __init__(self):
+        self.lock = threading.Lock()
+    
+    def connection(self):
+        return FakeMailbox()
+
+def imap_account():
+    return SimpleNamespace(id='account', email='me@example.com', imap_uidvalidity=None, imap_last_uid=None)
+
+def test_first_imap_sync_seeds_high_water_for_accounts_with_stored_mail(monkeypatch):
+    monkeypatch.setattr(email_service.imap_session_manager, 'get', lambda account: FakeSession())
+    service = EmailService(None)
+    service._search_imap_unseen = lambda mail, account: pytest.fail("searched mail stored under legacy keys")
+    account = imap_account()
+    
+    assert service._fetch_imap_sync(account, seed_high_water=True) == []
+    assert (account.imap_uidvalidity, account.imap_last_uid) == (42, 100)
+
+def test_first_imap_sync_searches_unseen_for_new_accounts(monkeypatch):
+    monkeypatch.setattr(email_service.imap_session_manager, 'get', lambda account: FakeSession())
+    service = EmailService(None)
+    searched = []
+    service._search_imap_unseen = lambda mail, account: searched.append(account) or []
+    account = imap_account()
+    
+    assert service._fetch_imap_sync(account) == []
+    assert searched == [account]
+    assert account.imap_last_uid == 100
@@ -0,0 +1,28 @@
+"""Tests for consistent-hash account ownership"""
+from utils.hash_ring import HashRing
+
+KEYS = [f"account-{i}" for i in range(2000)]
+
+def test_empty_ring_has_no_owner():
+    assert HashRing([]).owner('account-1') is None
+
+def test_ownership_is_deterministic_and_spread_across_nodes():
+    ring = HashRing(['w3', 'w1', 'w2'], vnodes=64)
+    again = HashRing(['w1', 'w2', 'w3', 'w1'], vnodes=64)
+    
+    owners = [ring.owner(key) for key in KEYS]
+    assert owners == [again.owner(key) for key in KEYS]
+    for node in ring.nodes:
+        assert 0.2 < owners.count(node) / len(KEYS) < 0.47
+
+def test_membership_change_only_moves_keys_of_the_changed_node():
+    before = HashRing(['w1', 'w2', 'w3'], vnodes=64)
+    after = HashRing(['w1', 'w2', 'w3', 'w4'], vnodes=64)
+    
+    moved = [key for key in KEYS if before.owner(key) != after.owner(key)]
+    # Keys only move to the new node, and roughly a quarter of them do
+    assert all(after.owner(key) == 'w4' for key in moved)
+    assert 0.15 < len(moved) / len(KEYS) < 0.35
+    
+    shrunk = HashRing(['w1', 'w3'], vnodes=64)
+    assert all(shrunk.owner(key) == before.owner(key) for key in KEYS if before.owner(key) != 'w2')
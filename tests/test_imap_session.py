@@ -0,0 +1,43 @@
+"""Tests for persistent IMAP session management"""
+from types import SimpleNamespace
+import asyncio
+import threading
+
+from services.imap_session import IMAPIdleSupervisor, IMAPSessionManager
+
+class FakeConnection:
+    def __init__(self):
+        self.closed = threading.Event()
+    
+    def shutdown(self):
+        self.closed.set()
+
+def test_stopping_a_watcher_closes_its_idle_connection(monkeypatch):
+    connection = FakeConnection()
+    idling = threading.Event()
+    
+    def idle_once(session):
+        # Stands in for a blocking IDLE: returns once the socket is closed
+        session._conn = connection
+        idling.set()
+        connection.closed.wait(5)
+        return False
+    
+    monkeypatch.setattr(IMAPIdleSupervisor, '_idle_once', staticmethod(idle_once))
+    account = SimpleNamespace(id='account', email='me@example.com', imap_host='imap.example.com', imap_port=993, password='secret')
+    
+    async def scenario():
+        async def on_new_mail(account_id):
+            pass
+        
+        manager = IMAPSessionManager()
+        supervisor = IMAPIdleSupervisor(manager, on_new_mail, max_accounts=2)
+        supervisor.sync([account])
+        assert await asyncio.to_thread(idling.wait, 5)
+        
+        supervisor.sync([])  # account deactivated
+        closed = await asyncio.to_thread(connection.closed.wait, 1)
+        supervisor.stop()
+        return closed, manager._sessions
+    
+    assert asyncio.run(scenario()) == (True, {})
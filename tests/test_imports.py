@@ -0,0 +1,11 @@
+"""Import smoke tests: module-level wiring must not fail at import time"""
+import importlib
+
+import pytest
+
+@pytest.mark.parametrize("module", [
+    "workers.email_worker",
+    "server",
+])
+def test_module_imports(module):
+    importlib.import_module(module)
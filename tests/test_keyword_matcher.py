@@ -0,0 +1,48 @@
+"""Tests for Aho-Corasick keyword matching and intent selection"""
+import random
+import string
+
+from utils.keyword_matcher import IntentMatcher, KeywordAutomaton
+
+def naive_count(keywords, text):
+    """Overlapping substring occurrences per label, the slow way"""
+    counts = {}
+    text = text.lower()
+    for keyword, label in keywords:
+        keyword = keyword.lower()
+        hits = sum(1 for i in range(len(text)) if text.startswith(keyword, i))
+        if hits:
+            counts[label] = counts.get(label, 0) + hits
+    return counts
+
+def test_counts_overlapping_and_nested_keywords():
+    automaton = KeywordAutomaton([('he', 0), ('she', 1), ('hers', 2), ('his', 3)])
+    assert automaton.count('ushers') == {0: 1, 1: 1, 2: 1}
+    assert KeywordAutomaton([('aa', 0)]).count('aaaa') == {0: 3}
+
+def test_matching_is_case_insensitive_and_ignores_empty_keywords():
+    automaton = KeywordAutomaton([('Meeting', 0), ('', 1)])
+    assert automaton.count('MEETING about the meeting') == {0: 2}
+
+def test_agrees_with_naive_substring_counting():
+    rng = random.Random(7)
+    keywords = [(''.join(rng.choice('abc') for _ in range(rng.randint(1, 4))), label) for label in range(20)]
+    automaton = KeywordAutomaton(keywords)
+    for _ in range(50):
+        text = ''.join(rng.choice('abc' + string.ascii_uppercase[:3]) for _ in range(200))
+        assert automaton.count(text) == naive_count(keywords, text)
+
+def test_intent_matcher_prefers_priority_then_hits_then_load_order():
+    matcher = IntentMatcher([
+        {'id': 'support', 'priority': 1, 'keywords': ['help', 'issue']},
+        {'id': 'sales', 'priority': 1, 'keywords': ['pricing', 'Pricing']},
+        {'id': 'urgent', 'priority': 5, 'keywords': ['asap']},
+        {'id': 'other', 'priority': 1, 'keywords': ['help']},
+    ])
+    
+    # Duplicate keywords of one intent count once
+    assert matcher.hits('Pricing help') == {'support': 1, 'sales': 1, 'other': 1}
+    assert matcher.best(matcher.hits('Pricing help')) == 'support'
+    assert matcher.best(matcher.hits('help with an issue, pricing')) == 'support'
+    assert matcher.best(matcher.hits('pricing help ASAP')) == 'urgent'
+    assert matcher.best(matcher.hits('nothing relevant')) is None
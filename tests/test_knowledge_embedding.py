@@ -0,0 +1,56 @@
+"""Tests for background knowledge base embedding"""
+from types import SimpleNamespace
+import asyncio
+
+import pytest
+
+from config import config
+from services import embedding_service, user_config
+from services.user_config import UserConfigCache
+
+class SlowEmbedder:
+    """Embedder whose runs block until released"""
+    
+    enabled = True
+    
+    def __init__(self):
+        self.runs = 0
+        self.release = asyncio.Event()
+    
+    async def embed_pending(self, db, user_id):
+        self.runs += 1
+        await self.release.wait()
+        return 0
+
+def test_embedding_runs_in_background_and_reruns_after_concurrent_writes(monkeypatch):
+    async def scenario():
+        embedder = SlowEmbedder()
+        monkeypatch.setattr(user_config, 'knowledge_embedder', embedder)
+        cache = UserConfigCache(max_size=10, check_interval=60)
+        
+        # Returns right away, like the knowledge base routes need
+        cache.embed_pending(None, 'user')
+        cache.embed_pending(None, 'user')
+        cache.embed_pending(None, 'user')
+        await asyncio.sleep(0)
+        runs_while_blocked = embedder.runs
+        
+        embedder.release.set()
+        while cache._embedding:
+            await asyncio.sleep(0)
+        return runs_while_blocked, embedder.runs
+    
+    # Writes made during a run are picked up by exactly one more run
+    assert asyncio.run(scenario()) == (1, 2)
+
+def test_embedding_is_skipped_when_disabled(monkeypatch):
+    monkeypatch.setattr(user_config, 'knowledge_embedder', SimpleNamespace(enabled=False))
+    cache = UserConfigCache(max_size=10, check_interval=60)
+    cache.embed_pending(None, 'user')
+    assert cache._embedding == {}
+
+def test_local_provider_requires_sentence_transformers(monkeypatch):
+    monkeypatch.setattr(config, 'EMBEDDING_PROVIDER', 'local')
+    monkeypatch.setattr(embedding_service.importlib.util, 'find_spec', lambda name: None)
+    with pytest.raises(RuntimeError, match='sentence-transformers'):
+        embedding_service.create_embedding_provider()
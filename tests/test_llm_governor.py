@@ -0,0 +1,128 @@
+"""Tests for LLM call admission: lanes, rate limits and retries"""
+import asyncio
+
+import pytest
+
+from exceptions import RateLimitError
+from utils.llm_governor import LANE_BACKGROUND, LANE_INTERACTIVE, LLMGovernor
+
+def governor(max_concurrent=1, max_retries=2):
+    return LLMGovernor(max_concurrent, requests_per_minute=6000, tokens_per_minute=10 ** 6, max_retries=max_retries)
+
+def test_interactive_lane_is_served_before_queued_background_calls():
+    async def scenario():
+        llm = governor()
+        release = asyncio.Event()
+        order = []
+        
+        async def call(name):
+            order.append(name)
+            if name == 'first':
+                await release.wait()
+            return name
+        
+        def submit(name, lane):
+            with LLMGovernor.lane(lane):
+                return asyncio.create_task(llm.run(lambda: call(name), 10))
+        
+        tasks = [submit('first', LANE_BACKGROUND)]
+        await asyncio.sleep(0)
+        tasks.append(submit('background', LANE_BACKGROUND))
+        tasks.append(submit('interactive', LANE_INTERACTIVE))
+        await asyncio.sleep(0)
+        release.set()
+        await asyncio.gather(*tasks)
+        return order
+    
+    assert asyncio.run(scenario()) == ['first', 'interactive', 'background']
+
+def test_rate_limited_call_is_retried_after_retry_after():
+    async def scenario():
+        llm = governor()
+        attempts = []
+        
+        async def call():
+            attempts.append(asyncio.get_running_loop().time())
+            if len(attempts) == 1:
+                raise RateLimitError('Groq', 'API error: 429', retry_after=0.05)
+            return 'ok', 12
+        
+        result = await llm.run(call, 100)
+        return result, attempts
+    
+    result, attempts = asyncio.run(scenario())
+    assert result == ('ok', 12)
+    assert attempts[1] - attempts[0] >= 0.05
+
+def test_rate_limit_error_propagates_after_max_retries():
+    async def scenario():
+        llm = governor(max_retries=1)
+        attempts = []
+        
+        async def call():
+            attempts.append(1)
+            raise RateLimitError('Groq', 'API error: 429', retry_after=0.01)
+        
+        with pytest.raises(RateLimitError):
+            await llm.run(call, 100)
+        return len(attempts), llm._active
+    
+    # One retry, and the concurrency slot is released afterwards
+    assert asyncio.run(scenario()) == (2, 0)
+
+def test_stream_is_not_retried_after_first_chunk():
+    async def scenario():
+        llm = governor()
+        opened = []
+        
+        async def open_stream():
+            opened.append(1)
+            yield 'Hello', 0
+            raise RateLimitError('Groq', 'API error: 429', retry_after=0.01)
+        
+        chunks = []
+        with pytest.raises(RateLimitError):
+            async for text, tokens in llm.stream(open_stream, 100):
+                chunks.append(text)
+        return chunks, len(opened)
+    
+    assert asyncio.run(scenario()) == (['Hello'], 1)
+
+def test_interactive_call_overtakes_background_calls_waiting_for_rate():
+    async def scenario():
+        llm = LLMGovernor(max_concurrent=5, requests_per_minute=1200, tokens_per_minute=10 ** 6, max_retries=0)
+        llm._requests.tokens = 0  # throttled: one request per 50 ms
+        order = []
+        
+        async def call(name):
+            order.append(name)
+            return name
+        
+        def submit(name, lane):
+            with LLMGovernor.lane(lane):
+                return asyncio.create_task(llm.run(lambda: call(name), 10))
+        
+        tasks = [submit(f"bg{i}", LANE_BACKGROUND) for i in range(4)]
+        await asyncio.sleep(0.01)  # background calls hold slots and wait for the bucket
+        tasks.append(submit('interactive', LANE_INTERACTIVE))
+        await asyncio.gather(*tasks)
+        return order
+    
+    assert asyncio.run(scenario()) == ['interactive', 'bg0', 'bg1', 'bg2', 'bg3']
+
+def test_cancelled_rate_waiter_lets_the_next_one_through():
+    async def scenario():
+        llm = LLMGovernor(max_concurrent=5, requests_per_minute=1200, tokens_per_minute=10 ** 6, max_retries=0)
+        llm._requests.tokens = 0
+        
+        async def call():
+            return 'ok'
+        
+        first = asyncio.create_task(llm.run(call, 10))
+        second = asyncio.create_task(llm.run(call, 10))
+        await asyncio.sleep(0.01)
+        first.cancel()
+        result = await asyncio.wait_for(second, 1)
+        return result, llm._rate_waiters, llm._active
+    
+    assert asyncio.run(scenario()) == ('ok', [], 0)
@@ -0,0 +1,46 @@
+"""Tests for adaptive poll scheduling"""
+from datetime import datetime, timezone
+
+import pytest
+
+from config import config
+from workers import email_worker
+from workers.email_worker import next_poll_schedule
+
+@pytest.fixture
+def no_jitter(monkeypatch):
+    monkeypatch.setattr(email_worker.random, 'uniform', lambda low, high: 1.0)
+
+def delay_of(schedule):
+    return (datetime.fromisoformat(schedule['next_poll_at']) - datetime.now(timezone.utc)).total_seconds()
+
+def test_new_mail_halves_interval_down_to_minimum(no_jitter):
+    schedule = next_poll_schedule({'poll_interval': 120}, 3)
+    assert schedule['poll_interval'] == 60
+    assert delay_of(schedule) == pytest.approx(60, abs=1)
+    
+    assert next_poll_schedule({'poll_interval': config.POLL_MIN_INTERVAL}, 1)['poll_interval'] == config.POLL_MIN_INTERVAL
+
+def test_idle_mailbox_backs_off_up_to_maximum(no_jitter):
+    schedule = next_poll_schedule({}, 0)
+    assert schedule['poll_interval'] == config.EMAIL_POLL_INTERVAL * config.POLL_BACKOFF_FACTOR
+    
+    assert next_poll_schedule({'poll_interval': config.POLL_MAX_INTERVAL}, 0)['poll_interval'] == config.POLL_MAX_INTERVAL
+
+def test_failed_polls_back_off_exponentially_and_success_resets(no_jitter):
+    first = next_poll_schedule({'poll_interval': 60}, None)
+    assert first['poll_error_count'] == 1
+    assert first['poll_interval'] == 60
+    assert delay_of(first) == pytest.approx(120, abs=1)
+    
+    second = next_poll_schedule({'poll_interval': 60, 'poll_error_count': 1}, None)
+    assert delay_of(second) == pytest.approx(240, abs=1)
+    
+    capped = next_poll_schedule({'poll_interval': 60, 'poll_error_count': 20}, None)
+    assert delay_of(capped) == pytest.approx(config.POLL_ERROR_MAX_INTERVAL, abs=1)
+    
+    assert next_poll_schedule({'poll_interval': 60, 'poll_error_count': 5}, 0)['poll_error_count'] == 0
+
+def test_jitter_stays_within_bounds():
+    delays = [delay_of(next_poll_schedule({'poll_interval': 100}, 1)) for _ in range(50)]
+    assert all(50 * (1 - config.POLL_JITTER) - 1 <= delay <= 50 * (1 + config.POLL_JITTER) for delay in delays)
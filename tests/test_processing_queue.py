@@ -0,0 +1,30 @@
+"""Tests for the bounded email processing queue"""
+import asyncio
+
+from workers.processing_queue import ProcessingQueue
+
+def test_pending_emails_are_not_queued_twice():
+    async def scenario():
+        release = asyncio.Event()
+        handled = []
+        
+        async def handler(email_id):
+            await release.wait()
+            handled.append(email_id)
+        
+        queue = ProcessingQueue(handler, concurrency=1, max_size=1)
+        assert await queue.submit('a')
+        await asyncio.sleep(0)  # 'a' is now in progress
+        
+        assert not await queue.submit('a')
+        assert await queue.submit('b')  # fills the queue
+        assert not await queue.submit('c', wait=False)
+        assert not queue.is_pending('c')
+        assert sorted(queue.pending_ids()) == ['a', 'b']
+        
+        release.set()
+        await queue.drain(timeout=1)
+        assert handled == ['a', 'b']
+        assert queue.pending_ids() == []
+    
+    asyncio.run(scenario())
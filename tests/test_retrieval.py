@@ -0,0 +1,52 @@
+"""Tests for knowledge base chunking and BM25 lexical search"""
+from services.knowledge_chunks import split_text
+from utils.bm25 import BM25Index, tokenize
+
+def test_split_text_respects_size_and_overlaps_chunks():
+    text = ' '.join(f"word{i:02d}" for i in range(40))  # 6 characters per word
+    chunks = split_text(text, size=34, overlap=14)
+    
+    assert all(len(chunk) <= 34 for chunk in chunks)
+    assert chunks[0] == 'word00 word01 word02 word03 word04'
+    # The next chunk repeats up to 14 characters (two words) of the previous one
+    assert chunks[1].startswith('word03 word04 word05')
+    assert chunks[-1].endswith('word39')
+    assert set(' '.join(chunks).split()) == set(text.split())
+
+def test_split_text_edge_cases():
+    assert split_text('', 100, 10) == []
+    assert split_text('short text', 100, 10) == ['short text']
+    # A word longer than the chunk size gets a chunk of its own, and overlap never stalls progress
+    assert split_text('a ' + 'x' * 20 + ' b', 5, 5) == ['a', 'x' * 20, 'b']
+
+def test_tokenize_drops_stopwords():
+    assert tokenize('What is the Refund policy for your orders?') == ['refund', 'policy', 'orders']
+
+def test_search_ranks_by_bm25():
+    index = BM25Index()
+    index.add('refunds', 'Refund policy: refunds are issued within 14 days of a refund request')
+    index.add('shipping', 'Shipping takes 3-5 business days; express shipping is available')
+    index.add('mixed', 'Shipping fees are not refunded')
+    
+    results = index.search('how do refunds work', k=5)
+    assert [doc_id for doc_id, _ in results] == ['refunds']
+    assert [doc_id for doc_id, _ in index.search('express shipping', k=1)] == ['shipping']
+    assert index.search('the and of', k=5) == []
+    assert index.search('shipping', k=0) == []
+
+def test_add_remove_and_sync_keep_index_consistent():
+    index = BM25Index()
+    index.add('a', 'alpha beta')
+    index.add('a', 'gamma')  # replaces
+    assert index.search('alpha', k=5) == []
+    assert [doc_id for doc_id, _ in index.search('gamma', k=5)] == ['a']
+    
+    assert index.sync({'a': 'ignored: id unchanged', 'b': 'delta', 'c': 'delta gamma'}) == (2, 0)
+    assert index.sync({'b': 'delta', 'd': 'epsilon'}) == (1, 2)
+    assert len(index) == 2 and 'a' not in index and 'c' not in index
+    assert [doc_id for doc_id, _ in index.search('delta gamma epsilon', k=5)] in (['b', 'd'], ['d', 'b'])
+    
+    index.remove('b')
+    index.remove('d')
+    index.remove('missing')
+    assert len(index) == 0 and index._postings == {} and index._total_length == 0
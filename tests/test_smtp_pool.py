@@ -0,0 +1,87 @@
+"""Tests for SMTPConnectionPool reuse and reconnects"""
+from types import SimpleNamespace
+import smtplib
+
+import pytest
+
+from services import smtp_pool as smtp_pool_module
+from services.smtp_pool import SMTPConnectionPool
+
+class FakeSMTP:
+    """SMTP_SSL stand-in whose sends fail with queued errors"""
+    
+    instances = []
+    
+    def __init__(self, host, port, timeout=None):
+        self.errors = []
+        self.sent = []
+        self.closed = False
+        FakeSMTP.instances.append(self)
+    
+    def login(self, user, password):
+        pass
+    
+    def sendmail(self, sender, recipients, message):
+        if self.errors:
+            raise self.errors.pop(0)
+        self.sent.append(message)
+    
+    def noop(self):
+        return 250, b'OK'
+    
+    def quit(self):
+        self.closed = True
+    
+    def close(self):
+        self.closed = True
+
+@pytest.fixture
+def pool(monkeypatch):
+    FakeSMTP.instances = []
+    monkeypatch.setattr(smtp_pool_module.smtplib, 'SMTP_SSL', FakeSMTP)
+    return SMTPConnectionPool(max_sessions_per_host=2, idle_timeout=300, keepalive_interval=60)
+
+def account():
+    return SimpleNamespace(smtp_host='smtp.example.com', smtp_port=465, email='me@example.com', password='secret')
+
+def test_send_reuses_idle_connection(pool):
+    pool.send(account(), ['you@example.com'], 'first')
+    pool.send(account(), ['you@example.com'], 'second')
+    
+    assert len(FakeSMTP.instances) == 1
+    assert FakeSMTP.instances[0].sent == ['first', 'second']
+    assert pool.idle_count() == 1
+
+def test_reused_connection_reconnects_on_421(pool):
+    pool.send(account(), ['you@example.com'], 'first')
+    stale = FakeSMTP.instances[0]
+    stale.errors.append(smtplib.SMTPResponseException(421, b'Service closing transmission channel'))
+    
+    pool.send(account(), ['you@example.com'], 'second')
+    
+    fresh = FakeSMTP.instances[1]
+    assert stale.closed
+    assert fresh.sent == ['second']
+    assert pool.idle_count() == 1
+
+def test_rejected_message_is_not_retried(pool):
+    pool.send(account(), ['you@example.com'], 'first')
+    FakeSMTP.instances[0].errors.append(smtplib.SMTPResponseException(550, b'Mailbox unavailable'))
+    
+    with pytest.raises(smtplib.SMTPResponseException):
+        pool.send(account(), ['you@example.com'], 'second')
+    
+    assert len(FakeSMTP.instances) == 1
+    assert pool.idle_count() == 0
+
+def test_fresh_connection_is_not_retried(pool, monkeypatch):
+    def refusing_smtp(*args, **kwargs):
+        server = FakeSMTP(*args, **kwargs)
+        server.errors.append(smtplib.SMTPServerDisconnected('gone'))
+        return server
+    monkeypatch.setattr(smtp_pool_module.smtplib, 'SMTP_SSL', refusing_smtp)
+    
+    with pytest.raises(smtplib.SMTPServerDisconnected):
+        pool.send(account(), ['you@example.com'], 'only')
+    
+    assert len(FakeSMTP.instances) == 1
@@ -0,0 +1,82 @@
+"""Tests for the pipeline stage DAG executor"""
+import asyncio
+
+import pytest
+
+from workers.stage_graph import StageGraph
+
+def test_stages_wait_for_dependencies_and_independent_ones_overlap():
+    async def scenario():
+        events = []
+        
+        async def meeting():
+            events.append('meeting:start')
+            await asyncio.sleep(0.02)
+            events.append('meeting:end')
+            return 'meeting'
+        
+        async def classify():
+            events.append('classify:start')
+            await asyncio.sleep(0.01)
+            events.append('classify:end')
+            return 'intent'
+        
+        async def draft(classify):
+            events.append('draft:start')
+            return f"draft for {classify}"
+        
+        async def validate(classify, draft):
+            return (classify, draft)
+        
+        graph = StageGraph('test.stage')
+        graph.add('meeting', meeting)
+        graph.add('classify', classify)
+        graph.add('draft', draft, depends_on=['classify'])
+        graph.add('validate', validate, depends_on=['classify', 'draft'])
+        results, timings = await graph.run()
+        return events, results, timings
+    
+    events, results, timings = asyncio.run(scenario())
+    
+    assert results['validate'] == ('intent', 'draft for intent')
+    assert set(timings) == {'meeting', 'classify', 'draft', 'validate'}
+    # Both roots start before either finishes; draft starts after classify ends
+    assert events.index('classify:start') < events.index('meeting:end')
+    assert events.index('classify:end') < events.index('draft:start') < events.index('meeting:end')
+
+def test_dependencies_must_exist_so_cycles_cannot_form():
+    async def stage(**inputs):
+        return None
+    
+    graph = StageGraph('test.stage')
+    with pytest.raises(ValueError):
+        graph.add('a', stage, depends_on=['a'])
+    
+    graph.add('a', stage)
+    graph.add('b', stage, depends_on=['a'])
+    with pytest.raises(ValueError):
+        graph.add('a', stage, depends_on=['b'])
+
+def test_failure_cancels_remaining_stages():
+    async def scenario():
+        cancelled = asyncio.Event()
+        
+        async def slow():
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                cancelled.set()
+                raise
+        
+        async def failing():
+            raise RuntimeError("stage failed")
+        
+        graph = StageGraph('test.stage')
+        graph.add('slow', slow)
+        graph.add('failing', failing)
+        graph.add('after', slow, depends_on=['failing'])
+        with pytest.raises(RuntimeError):
+            await graph.run()
+        return cancelled.is_set()
+    
+    assert asyncio.run(scenario())
@@ -0,0 +1,50 @@
+"""Tests for the per-user configuration snapshot cache"""
+import asyncio
+
+from services.user_config import UserConfigCache
+
+class BlockingLoadCache(UserConfigCache):
+    """Cache whose first load blocks until cancelled"""
+    
+    def __init__(self):
+        super().__init__(max_size=10, check_interval=60)
+        self.loads = 0
+        self.first_load_started = asyncio.Event()
+    
+    async def _load(self, db, user_id):
+        self.loads += 1
+        if self.loads == 1:
+            self.first_load_started.set()
+            await asyncio.Event().wait()
+        return f"snapshot {self.loads}"
+
+def test_waiter_loads_again_when_the_loading_caller_is_cancelled():
+    async def scenario():
+        cache = BlockingLoadCache()
+        loader = asyncio.create_task(cache.get(None, 'user'))
+        await cache.first_load_started.wait()
+        waiter = asyncio.create_task(cache.get(None, 'user'))
+        await asyncio.sleep(0)
+        
+        loader.cancel()
+        snapshot = await waiter
+        return loader.cancelled(), snapshot, cache.loads
+    
+    assert asyncio.run(scenario()) == (True, 'snapshot 2', 2)
+
+def test_cancelled_waiter_is_cancelled():
+    async def scenario():
+        cache = BlockingLoadCache()
+        loader = asyncio.create_task(cache.get(None, 'user'))
+        await cache.first_load_started.wait()
+        waiter = asyncio.create_task(cache.get(None, 'user'))
+        await asyncio.sleep(0)
+        
+        waiter.cancel()
+        await asyncio.gather(waiter, return_exceptions=True)
+        cancelled = waiter.cancelled()
+        loader.cancel()
+        await asyncio.gather(loader, return_exceptions=True)
+        return cancelled, cache.loads
+    
+    assert asyncio.run(scenario()) == (True, 1)